@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Non-interactive batch runs.
+
+    python batch.py search prompts.txt -o results.jsonl --parallel 4
+    cat topics.jsonl | python batch.py research - -o research.jsonl
+
+Input is one prompt per line, or JSON lines with "prompt" (search) or
+"topic" and optional "description" and "files" (research; the files are
+digested as in the interactive workflow).  Items run concurrently
+in one process, so the Gemini client, provider rate limiters, circuit
+breakers and token caches are shared by all of them.  Each result is
+written as one JSON line the moment it finishes; the CLI's progress
+output goes to stderr so stdout stays valid JSONL.
+
+Re-running with the same --output resumes: items whose id (a hash of
+mode and input) already has an "ok" line are skipped, failed ones are
+retried.
+"""
+import argparse
+import contextlib
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from dotenv import load_dotenv
+
+
+def read_items(source):
+    """Items from a file path or '-' (stdin): plain lines or JSON objects"""
+    stream = sys.stdin if source == '-' else open(source, 'r', encoding='utf-8')
+    try:
+        items = []
+        for line in stream:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            if line.startswith('{'):
+                items.append(json.loads(line))
+            else:
+                items.append({'prompt': line, 'topic': line})
+        return items
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+
+def item_id(mode, item):
+    text = item.get('prompt') or item.get('topic') or ''
+    canonical = json.dumps([mode, text, item.get('description', '')], sort_keys=True)
+    return hashlib.sha1(canonical.encode('utf-8')).hexdigest()[:12]
+
+
+def completed_ids(path):
+    """Ids with an 'ok' result in an existing output file"""
+    done = set()
+    if not path or not os.path.exists(path):
+        return done
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # a line cut short by an interrupted run
+            if record.get('status') == 'ok':
+                done.add(record.get('id'))
+    return done
+
+
+def run_search(item, args):
+    import search_engine
+
+    prompt = item.get('prompt') or item['topic']
+    results = search_engine.get().search(prompt, args.deadline)
+    return {'prompt': prompt, 'complete': results.complete, 'results': list(results)}
+
+
+def run_research(item, args):
+    import ingest
+    import main
+
+    topic = item.get('topic') or item['prompt']
+    research_data = {
+        'topic': topic,
+        'description': item.get('description') or topic,
+        'input_files': [ingest.digest_file(path, main.model) for path in item.get('files') or []],
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+    record = {'topic': topic}
+    critique = main.critique_research_proposal(research_data, main.model)
+    if not critique:
+        raise RuntimeError('critique failed')
+    record['critique'] = critique
+    package = main.collect_research_resources(research_data, main.model)
+    if not package:
+        raise RuntimeError('resource collection failed')
+    record['resource_counts'] = package['resource_counts']
+    record['source_completeness'] = package.get('source_completeness')
+    direction = main.analyze_research_direction(package, main.model)
+    if not direction:
+        raise RuntimeError('direction analysis failed')
+    record['direction'] = direction
+    paper = main.generate_research_paper_template(package, direction, main.model)
+    if not paper:
+        raise RuntimeError('paper template failed')
+    record['paper_file'] = paper['paper_file']
+    record['template_file'] = paper['template_file']
+    record['draft_id'] = paper['draft_id']
+    return record
+
+
+MODES = {'search': run_search, 'research': run_research}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run searches or research workflows for many prompts")
+    parser.add_argument('mode', choices=sorted(MODES))
+    parser.add_argument('input', help="file with one prompt/topic (or JSON object) per line, '-' for stdin")
+    parser.add_argument('-o', '--output', help="JSONL file to append results to (default: stdout)")
+    parser.add_argument('--parallel', type=int, default=4, help="items processed at the same time")
+    parser.add_argument('--deadline', type=float, default=None, help="time budget per search in seconds")
+    parser.add_argument('--no-resume', action='store_true', help="process items even if --output has them")
+    args = parser.parse_args()
+
+    load_dotenv()
+    import search_engine
+    # Built once and shared by every item; tokens and query history load while the input is read
+    search_engine.get().warm_up(background=True)
+
+    items = read_items(args.input)
+    done = set() if args.no_resume else completed_ids(args.output)
+    pending = [(item_id(args.mode, item), item) for item in items]
+    pending = [(key, item) for key, item in pending if key not in done]
+    print(f"{len(items)} items, {len(items) - len(pending)} already done, {len(pending)} to run "
+          f"({args.parallel} at a time)", file=sys.stderr)
+
+    out = open(args.output, 'a', encoding='utf-8') if args.output else sys.stdout
+    write_lock = threading.Lock()
+    run = MODES[args.mode]
+    failures = 0
+
+    def process(key, item):
+        started = time.monotonic()
+        try:
+            record = {'id': key, 'status': 'ok', **run(item, args)}
+        except Exception as e:
+            record = {'id': key, 'status': 'error', 'error': f"{type(e).__name__}: {e}", 'input': item}
+        record['seconds'] = round(time.monotonic() - started, 2)
+        return record
+
+    # Everything the CLI prints goes to stderr; results are the only thing on stdout
+    with contextlib.redirect_stdout(sys.stderr), ThreadPoolExecutor(max_workers=max(1, args.parallel)) as pool:
+        futures = {pool.submit(process, key, item): key for key, item in pending}
+        try:
+            for future in as_completed(futures):
+                record = future.result()
+                failures += record['status'] != 'ok'
+                with write_lock:
+                    out.write(json.dumps(record, ensure_ascii=False, default=str) + '\n')
+                    out.flush()
+        except KeyboardInterrupt:
+            print("\nInterrupted; finished items are saved, re-run to resume", file=sys.stderr)
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise SystemExit(130)
+        finally:
+            if out is not sys.stdout:
+                out.close()
+
+    print(f"Done: {len(pending) - failures} ok, {failures} failed", file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark suite.
+
+Starts stub_servers.StubServer, points every provider module and the
+Gemini client at it, then measures throughput and p50/p95/p99 latency
+for search_for_links, each /api/* endpoint of server.py and the full
+research workflow (critique -> resources -> direction -> paper).
+
+    python benchmark.py --iterations 20 --concurrency 4 --latency 0.1
+    python benchmark.py --targets api --error-rate 0.1 --json bench.json
+
+Quora is only exercised when a local Chrome/chromedriver is available;
+without one its calls fail fast and show up as provider errors.
+"""
+import argparse
+import contextlib
+import json
+import math
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from stub_servers import StubServer
+
+DEFAULT_PROMPTS = [
+    "graph neural networks for drug discovery",
+    "retrieval augmented generation evaluation",
+    "federated learning on medical images",
+    "climate downscaling with diffusion models",
+    "low-resource speech recognition",
+    "causal inference for recommender systems",
+]
+
+API_ENDPOINTS = ["/api/critique", "/api/literature", "/api/community", "/api/directions", "/api/draft"]
+
+
+def percentile(samples, q):
+    """Nearest-rank percentile of samples (q in 0..100)"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, math.ceil(q / 100.0 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def summarize(name, latencies, errors, wall):
+    total = len(latencies)
+    return {
+        "target": name,
+        "requests": total,
+        "errors": errors,
+        "error_rate": errors / total if total else 0.0,
+        "throughput": total / wall if wall else 0.0,
+        "mean": sum(latencies) / total if total else 0.0,
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "p99": percentile(latencies, 99),
+    }
+
+
+def run_load(fn, items, concurrency):
+    """Call fn(item) for every item with `concurrency` workers; fn returns False on error"""
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+
+    def one(item):
+        nonlocal errors
+        start = time.perf_counter()
+        try:
+            ok = fn(item) is not False
+        except Exception:
+            ok = False
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies.append(elapsed)
+            if not ok:
+                errors += 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, items))
+    return latencies, errors, time.perf_counter() - started
+
+
+def configure_environment(base_url, min_interval):
+    """Point providers and Gemini at the stubs; must run before main/server are imported"""
+    os.environ.update({
+        "UPSTREAM_BASE_URL": base_url,
+        "GEMINI_BASE_URL": base_url,
+        "GEMINI_API_KEY": "stub",
+        "GITHUB_TOKEN": "stub",
+        "REDDIT_CLIENT_ID": "stub",
+        "REDDIT_CLIENT_SECRET": "stub",
+        "SEMANTIC_SCHOLAR_API_KEY": "stub",
+        "SERPAPI_KEY": "stub",
+        # Kaggle goes through its own SDK and cannot be redirected
+        "KAGGLE_USERNAME": "",
+        "KAGGLE_KEY": "",
+        "PROVIDER_MIN_INTERVAL": str(min_interval),
+        # Repeated prompts should measure the upstream calls, not the provider result cache
+        "PROVIDER_CACHE_SECONDS": "0",
+    })
+
+
+@contextlib.contextmanager
+def quiet(enabled=True):
+    """Silence the CLI's progress printing while measuring"""
+    if not enabled:
+        yield
+        return
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+def bench_search(prompts, args):
+    import main
+
+    def one(prompt):
+        return main.search_for_links(prompt, args.deadline) is not None
+
+    with quiet(not args.verbose):
+        return [summarize("search_for_links", *run_load(one, prompts, args.concurrency))]
+
+
+def bench_api(prompts, args):
+    import server
+
+    local = threading.local()
+
+    def client():
+        if not hasattr(local, "client"):
+            local.client = server.app.test_client()
+        return local.client
+
+    reports = []
+    for endpoint in API_ENDPOINTS:
+        def one(idea, endpoint=endpoint):
+            return client().post(endpoint, json={"idea": idea}).status_code < 400
+
+        with quiet(not args.verbose):
+            reports.append(summarize(endpoint, *run_load(one, prompts, args.concurrency)))
+    return reports
+
+
+def bench_workflow(prompts, args):
+    import main
+
+    def one(prompt):
+        research_data = {
+            "topic": prompt,
+            "description": f"We study {prompt} with a focus on robust evaluation.",
+            "input_files": [],
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+        critique = main.critique_research_proposal(research_data, main.model)
+        package = main.collect_research_resources(research_data, main.model)
+        direction = package and main.analyze_research_direction(package, main.model)
+        paper = direction and main.generate_research_paper_template(package, direction, main.model)
+        return bool(critique and paper)
+
+    previous = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        # The workflow writes its JSON/Markdown outputs to the current directory
+        os.chdir(workdir)
+        try:
+            with quiet(not args.verbose):
+                return [summarize("workflow", *run_load(one, prompts, args.concurrency))]
+        finally:
+            os.chdir(previous)
+
+
+TARGETS = {"search": bench_search, "api": bench_api, "workflow": bench_workflow}
+
+
+def print_report(reports, stub):
+    print(f"\n{'target':<20} {'reqs':>5} {'err%':>6} {'req/s':>8} {'mean':>8} {'p50':>8} {'p95':>8} {'p99':>8}")
+    print("-" * 78)
+    for r in reports:
+        print(f"{r['target']:<20} {r['requests']:>5} {r['error_rate'] * 100:>5.1f}% {r['throughput']:>8.2f} "
+              f"{r['mean']:>7.3f}s {r['p50']:>7.3f}s {r['p95']:>7.3f}s {r['p99']:>7.3f}s")
+    print(f"\nStub upstream requests served: {stub.config.requests}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark search, API and workflow against local stub upstreams")
+    parser.add_argument("--targets", default="search,api,workflow", help="comma-separated: search, api, workflow")
+    parser.add_argument("--iterations", type=int, default=12, help="operations per target")
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--latency", type=float, default=0.05, help="stub response latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--items", type=int, default=10, help="results per stub response")
+    parser.add_argument("--min-interval", type=float, default=0.0,
+                        help="per-provider rate limiter spacing (the CLI default is 1.0)")
+    parser.add_argument("--deadline", type=float, default=None, help="time budget per search in seconds")
+    parser.add_argument("--prompts", help="file with one prompt per line")
+    parser.add_argument("--json", help="write the report to this file")
+    parser.add_argument("--verbose", action="store_true", help="keep the CLI's own output")
+    args = parser.parse_args()
+
+    prompts = DEFAULT_PROMPTS
+    if args.prompts:
+        with open(args.prompts, encoding="utf-8") as f:
+            prompts = [line.strip() for line in f if line.strip()]
+    items = [prompts[i % len(prompts)] for i in range(args.iterations)]
+
+    stub = StubServer(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate, items=args.items, seed=0)
+    configure_environment(stub.start(), args.min_interval)
+    print(f"Stub upstreams on {stub.base_url} (latency {args.latency}s, error rate {args.error_rate:.0%})")
+
+    reports = []
+    try:
+        for name in [t.strip() for t in args.targets.split(",") if t.strip()]:
+            if name not in TARGETS:
+                print(f"Unknown target: {name}")
+                sys.exit(2)
+            print(f"Running {name} ({args.iterations} iterations, concurrency {args.concurrency})...")
+            reports.extend(TARGETS[name](items, args))
+    finally:
+        stub.stop()
+
+    print_report(reports, stub)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"config": vars(args), "results": reports}, f, indent=2)
+        print(f"Report written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
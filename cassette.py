@@ -0,0 +1,226 @@
+"""
+HTTP and Gemini record/replay.
+
+    HTTP_CASSETTE=runs/gnn.jsonl.gz HTTP_CASSETTE_MODE=record python main.py
+    HTTP_CASSETTE=runs/gnn.jsonl.gz HTTP_CASSETTE_MODE=replay CASSETTE_SPEED=0 python benchmark.py
+
+In record mode every upstream exchange made through http_client and
+every gemini.generate_text call is appended to a gzip-compressed JSON
+lines file.  In replay mode the same calls are answered from that file
+without touching the network; CASSETTE_SPEED scales the recorded
+latencies (1 = as recorded, 10 = ten times faster, 0 = instant).
+Requests missing from the cassette raise CassetteMiss.
+
+Kaggle (own SDK) and Quora (browser) do not go through http_client and
+are not captured.  Credentials stay out of the file: credential query
+parameters (SerpAPI's api_key) are left out of request keys, and tokens
+in JSON responses (Reddit's OAuth access_token) are recorded redacted.
+"""
+import atexit
+import base64
+import gzip
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from types import SimpleNamespace
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+PATH = os.environ.get('HTTP_CASSETTE')
+MODE = os.environ.get('HTTP_CASSETTE_MODE', 'replay' if PATH and os.path.exists(PATH) else 'record')
+SPEED = float(os.environ.get('CASSETTE_SPEED', '1'))
+ACTIVE = bool(PATH)
+
+KEPT_HEADERS = ('Content-Type', 'ETag', 'Last-Modified')
+# Request parameters left out of keys, and response fields redacted before writing
+# (not plain 'token': Semantic Scholar's bulk search pages with one)
+CREDENTIAL_FIELDS = frozenset({'api_key', 'apikey', 'key', 'access_token', 'refresh_token', 'id_token',
+                               'client_secret', 'password'})
+REDACTED = 'REDACTED'
+
+_lock = threading.Lock()
+_writer = None
+_entries = None
+_cursors = {}
+
+
+class CassetteMiss(Exception):
+    """Replay mode was asked for an exchange that was never recorded"""
+
+
+def _key(kind, *parts):
+    canonical = json.dumps([kind, *parts], sort_keys=True, default=str)
+    return hashlib.sha1(canonical.encode('utf-8')).hexdigest()[:20]
+
+
+def _without_credentials(fields):
+    if isinstance(fields, dict):
+        return sorted((k, str(v)) for k, v in fields.items() if k.lower() not in CREDENTIAL_FIELDS)
+    return fields
+
+
+def http_key(method, url, params=None, data=None, json_body=None):
+    """Identify a request by method, URL, query parameters and body (never headers/credentials)"""
+    return _key('http', method.upper(), url, _without_credentials(params), _without_credentials(data), json_body)
+
+
+def _redact(content):
+    """Response body with credential fields of a JSON object replaced by REDACTED"""
+    if not content.lstrip().startswith(b'{'):
+        return content
+    try:
+        body = json.loads(content)
+    except ValueError:
+        return content
+    secrets = [field for field in body if field.lower() in CREDENTIAL_FIELDS]
+    if not secrets:
+        return content
+    body.update(dict.fromkeys(secrets, REDACTED))
+    return json.dumps(body).encode('utf-8')
+
+
+def gemini_key(model_name, prompt):
+    return _key('gemini', model_name, prompt)
+
+
+def _write(entry):
+    global _writer
+    with _lock:
+        if _writer is None:
+            directory = os.path.dirname(PATH)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            _writer = gzip.open(PATH, 'at', encoding='utf-8')
+            atexit.register(close)
+        _writer.write(json.dumps(entry, separators=(',', ':')) + '\n')
+        # Keep the file readable while a long-running server is still recording
+        _writer.flush()
+
+
+def close():
+    global _writer
+    with _lock:
+        if _writer is not None:
+            _writer.close()
+            _writer = None
+
+
+def load(path=None):
+    """Read a cassette into {key: [entry, ...]} (repeat exchanges replay in order, then cycle)"""
+    entries = {}
+    with gzip.open(path or PATH, 'rt', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                entry = json.loads(line)
+                entries.setdefault(entry['k'], []).append(entry)
+    return entries
+
+
+def _lookup(key, description):
+    global _entries
+    with _lock:
+        if _entries is None:
+            _entries = load()
+        recorded = _entries.get(key)
+        if not recorded:
+            raise CassetteMiss(f"no recording for {description}")
+        index = _cursors.get(key, 0)
+        _cursors[key] = index + 1
+        entry = recorded[index % len(recorded)]
+    if SPEED > 0:
+        time.sleep(entry.get('t', 0) / SPEED)
+    return entry
+
+
+def _encode_body(content):
+    try:
+        return {'b': content.decode('utf-8')}
+    except UnicodeDecodeError:
+        return {'b64': base64.b64encode(content).decode('ascii')}
+
+
+def _decode_body(entry):
+    if 'b64' in entry:
+        return base64.b64decode(entry['b64'])
+    return entry.get('b', '').encode('utf-8')
+
+
+def _to_response(entry, url):
+    response = requests.models.Response()
+    response.status_code = entry['s']
+    response.headers = CaseInsensitiveDict(entry.get('h', {}))
+    response._content = _decode_body(entry)
+    response.url = url
+    response.reason = 'Replayed'
+    return response
+
+
+def wrap_http(send):
+    """Wrap send(method, url, **kwargs) so it records to or replays from the cassette"""
+    def recorded_send(method, url, **kwargs):
+        key = http_key(method, url, kwargs.get('params'), kwargs.get('data'), kwargs.get('json'))
+        if MODE == 'replay':
+            return _to_response(_lookup(key, f"{method} {url}"), url)
+        start = time.monotonic()
+        response = send(method, url, **kwargs)
+        entry = {
+            'k': key,
+            'u': url,
+            's': response.status_code,
+            'h': {h: response.headers[h] for h in KEPT_HEADERS if h in response.headers},
+            't': round(time.monotonic() - start, 4),
+        }
+        entry.update(_encode_body(_redact(response.content)))
+        _write(entry)
+        return response
+    return recorded_send
+
+
+def wrap_gemini(generate, response_text):
+    """Wrap generate(prompt, model_name) -> SDK-like response for record/replay"""
+    def recorded_generate(prompt, model_name):
+        key = gemini_key(model_name, prompt)
+        if MODE == 'replay':
+            entry = _lookup(key, f"Gemini {model_name} prompt")
+            return SimpleNamespace(text=entry['text'], usage_metadata=SimpleNamespace(**entry['usage']) if entry.get('usage') else None)
+        start = time.monotonic()
+        resp = generate(prompt, model_name)
+        usage = getattr(resp, 'usage_metadata', None)
+        _write({
+            'k': key,
+            'u': f"gemini:{model_name}",
+            'text': response_text(resp),
+            'usage': {
+                'prompt_token_count': getattr(usage, 'prompt_token_count', None),
+                'candidates_token_count': getattr(usage, 'candidates_token_count', None),
+            } if usage is not None else None,
+            't': round(time.monotonic() - start, 4),
+        })
+        return resp
+    return recorded_generate
+
+
+def main():
+    """python cassette.py <file>: summarize what a cassette contains"""
+    if len(sys.argv) != 2:
+        print("Usage: python cassette.py <cassette.jsonl.gz>")
+        sys.exit(2)
+    entries = load(sys.argv[1])
+    by_target = {}
+    total_latency = 0.0
+    for recorded in entries.values():
+        for entry in recorded:
+            target = entry.get('u', '?').split('?')[0]
+            by_target[target] = by_target.get(target, 0) + 1
+            total_latency += entry.get('t', 0)
+    print(f"{sum(by_target.values())} exchanges, {len(entries)} distinct, {total_latency:.1f}s recorded upstream time")
+    for target, count in sorted(by_target.items(), key=lambda item: -item[1]):
+        print(f"  {count:5}  {target}")
+
+
+if __name__ == '__main__':
+    main()
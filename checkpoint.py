@@ -0,0 +1,92 @@
+"""
+Research workflow checkpoints.
+
+Every run of the research workflow gets an id and a directory under
+WORKFLOW_DIR.  Each stage that finishes writes its output there as
+<stage>.json (via a temporary file and a rename, so an interrupted write
+never leaves half a checkpoint), and a resumed run loads those instead of
+repeating the stages:
+
+    .workflow_runs/20250921_050027_3f9a1c/input.json
+                                          critique.json
+                                          resources.json
+"""
+import hashlib
+import json
+import os
+import time
+from datetime import datetime
+
+WORKFLOW_DIR = os.environ.get('WORKFLOW_DIR', '.workflow_runs')
+
+
+def _path(run_id, stage=None):
+    directory = os.path.join(WORKFLOW_DIR, run_id)
+    return directory if stage is None else os.path.join(directory, f"{stage}.json")
+
+
+def new_run(topic):
+    """Create the directory for a new run and return its id"""
+    digest = hashlib.sha1(f"{topic}\0{time.time_ns()}".encode('utf-8')).hexdigest()[:6]
+    run_id = f"{datetime.now():%Y%m%d_%H%M%S}_{digest}"
+    os.makedirs(_path(run_id), exist_ok=True)
+    return run_id
+
+
+def save(run_id, stage, value):
+    path = _path(run_id, stage)
+    temporary = f"{path}.tmp"
+    with open(temporary, 'w', encoding='utf-8') as f:
+        json.dump(value, f, indent=2, ensure_ascii=False, default=str)
+    os.replace(temporary, path)
+
+
+def load(run_id):
+    """{stage: output} of every checkpointed stage of run_id ({} if there is no such run)"""
+    directory = _path(run_id)
+    if not os.path.isdir(directory):
+        return {}
+    state = {}
+    for name in os.listdir(directory):
+        if not name.endswith('.json'):
+            continue
+        try:
+            with open(os.path.join(directory, name), 'r', encoding='utf-8') as f:
+                state[name[:-len('.json')]] = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable checkpoint {name} of run {run_id}: {e}")
+    return state
+
+
+def runs(limit=10, unfinished=None):
+    """
+    Newest runs first: [{'id', 'topic', 'stages', 'updated'}].  With
+    unfinished (a list of stages), only runs still missing one of them
+    are listed, so older unfinished runs are not crowded out by newer
+    finished ones.
+    """
+    if not os.path.isdir(WORKFLOW_DIR):
+        return []
+    found = []
+    for run_id in sorted(os.listdir(WORKFLOW_DIR), reverse=True):
+        if len(found) >= limit:
+            break
+        directory = _path(run_id)
+        if not os.path.isdir(directory):
+            continue
+        stages = [name[:-len('.json')] for name in os.listdir(directory) if name.endswith('.json')]
+        if unfinished is not None and not set(unfinished) - set(stages):
+            continue
+        topic = ''
+        try:
+            with open(_path(run_id, 'input'), 'r', encoding='utf-8') as f:
+                topic = json.load(f).get('topic', '')
+        except (OSError, ValueError):
+            pass
+        found.append({
+            'id': run_id,
+            'topic': topic,
+            'stages': stages,
+            'updated': datetime.fromtimestamp(os.path.getmtime(directory)).isoformat(timespec='seconds'),
+        })
+    return found
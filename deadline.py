@@ -0,0 +1,166 @@
+"""
+End-to-end time budgets.
+
+A Deadline is created once at the entry point ("return within 5 s") and
+handed down through stages.  The active deadline lives in a context
+variable so http_client can clamp every socket timeout to what is left
+without each provider function having to accept a timeout argument.
+"""
+import contextlib
+import contextvars
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+_current = contextvars.ContextVar('deadline', default=None)
+
+# How often run_all looks for a deadline that was cancelled while it waits
+CANCEL_POLL_SECONDS = 0.1
+
+
+class DeadlineExceeded(Exception):
+    """Raised when work is started after the budget has run out"""
+
+
+class Deadline:
+    """Absolute point in time (monotonic clock) by which work must finish"""
+
+    def __init__(self, seconds=None, at=None, parent=None):
+        if at is not None:
+            self.at = at
+        elif seconds is not None:
+            self.at = time.monotonic() + float(seconds)
+        else:
+            self.at = None
+        # A child stage never outlives its parent, including a cancelled one
+        self.parent = parent
+
+    def remaining(self):
+        remaining = None if self.at is None else max(0.0, self.at - time.monotonic())
+        inherited = self.parent.remaining() if self.parent is not None else None
+        if inherited is not None:
+            remaining = inherited if remaining is None else min(remaining, inherited)
+        return remaining
+
+    def expired(self):
+        if self.parent is not None and self.parent.expired():
+            return True
+        return self.at is not None and time.monotonic() >= self.at
+
+    def timeout(self, cap=None):
+        """Time left, but never more than cap (e.g. a provider's own timeout)"""
+        remaining = self.remaining()
+        if remaining is None:
+            return cap
+        return remaining if cap is None else min(cap, remaining)
+
+    def cancel(self):
+        """Expire now: work under this deadline stops at its next check"""
+        self.at = time.monotonic()
+
+    def child(self, fraction):
+        """Sub-budget for one stage: a fraction of whatever is left right now"""
+        remaining = self.remaining()
+        if remaining is None:
+            return Deadline(parent=self)
+        return Deadline(seconds=remaining * fraction, parent=self)
+
+
+@contextlib.contextmanager
+def activate(deadline):
+    """Make deadline the active one for everything called inside the block"""
+    token = _current.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current.reset(token)
+
+
+def current():
+    """Deadline active in this context, or None"""
+    return _current.get()
+
+
+def clamp_timeout(timeout):
+    """Clamp an HTTP timeout to the active deadline; fail fast once it has passed"""
+    active = current()
+    if active is None:
+        return timeout
+    if active.expired():
+        raise DeadlineExceeded("deadline exceeded before request was sent")
+    return active.timeout(timeout)
+
+
+class PartialResults(list):
+    """
+    Result list that also records which sources finished in time.
+
+    Behaves exactly like the plain list search_for_links used to return;
+    `complete` maps each source name to True/False.
+    """
+
+    def __init__(self, items=(), complete=None):
+        super().__init__(items)
+        self.complete = dict(complete or {})
+
+    @property
+    def is_complete(self):
+        return all(self.complete.values())
+
+
+def run_all(tasks, deadline=None, max_workers=None, executor=None):
+    """
+    Run {name: callable} concurrently and wait at most until the deadline.
+    executor is a long-lived pool to run them on; without one, a pool is
+    made for this call.
+
+    Returns (results, complete): results holds the return value of every
+    task that finished, complete maps every name to whether it did.  A
+    task that fails must raise (providers.call raises ProviderError) to
+    be counted incomplete; returning an empty value counts as done.
+    Tasks not yet started when time runs out (or the deadline is
+    cancelled) are cancelled; tasks still running are abandoned (their
+    HTTP timeouts are already clamped to the same deadline, so they wind
+    down shortly after).
+    """
+    deadline = deadline or Deadline()
+    if not tasks:
+        return {}, {}
+    owned = executor is None
+    if owned:
+        executor = ThreadPoolExecutor(max_workers=max_workers or len(tasks),
+                                      thread_name_prefix='deadline')
+    futures = {}
+    for name, fn in tasks.items():
+        ctx = contextvars.copy_context()
+        futures[executor.submit(ctx.run, _with_deadline, deadline, fn)] = name
+    pending = set(futures)
+    while pending and not deadline.expired():
+        _, pending = wait(pending, timeout=deadline.timeout(CANCEL_POLL_SECONDS))
+    done = set(futures) - pending
+    if owned:
+        executor.shutdown(wait=False, cancel_futures=True)
+    else:
+        for future in pending:
+            future.cancel()
+
+    results, complete = {}, {}
+    for future, name in futures.items():
+        complete[name] = False
+        if future in done:
+            try:
+                results[name] = future.result()
+                complete[name] = True
+            except Exception as e:
+                print(f"{name} failed: {e}")
+    return results, complete
+
+
+def call(fn, deadline=None, default=None):
+    """Run a single callable under a deadline; returns (value, finished_in_time)"""
+    results, complete = run_all({'call': fn}, deadline)
+    return results.get('call', default), complete['call']
+
+
+def _with_deadline(deadline, fn):
+    with activate(deadline):
+        return fn()
@@ -12,6 +12,11 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.by import By
 
+import http_client
+import incremental
+import metrics
+import resilience
+
 reddit_access_token = None
 
 def get_reddit_access_token():
@@ -29,8 +34,8 @@ def get_reddit_access_token():
         data = {'grant_type': 'client_credentials'}
         headers = {'User-Agent': REDDIT_USER_AGENT}
 
-        response = requests.post('https://www.reddit.com/api/v1/access_token',
-                               auth=auth, data=data, headers=headers, timeout=10)
+        response = http_client.post('Reddit', 'https://www.reddit.com/api/v1/access_token',
+                                    auth=auth, data=data, headers=headers, timeout=10)
 
         if response.status_code == 200:
             reddit_access_token = response.json()['access_token']
@@ -43,14 +48,18 @@ def get_reddit_access_token():
         print(f"Reddit authentication error: {e}")
         return None
 
-def search_reddit_api(query, limit=5):
-    """Search Reddit using official API"""
+def search_reddit_api(query, limit=5, since=None):
+    """
+    Search Reddit using official API (since: only posts created after it);
+    without credentials, the public JSON search is used instead
+    """
     try:
         global reddit_access_token
+        metrics.record_cache('reddit_token', bool(reddit_access_token))
         if not reddit_access_token:
             token = get_reddit_access_token()
             if not token:
-                return []
+                return _search_reddit_public(query, limit, since)
 
         headers = {
             'Authorization': f'bearer {reddit_access_token}',
@@ -62,11 +71,11 @@ def search_reddit_api(query, limit=5):
             'type': 'link',
             'sort': 'relevance',
             'limit': limit,
-            't': 'all'
+            't': incremental.reddit_window(since)
         }
 
-        response = requests.get('https://oauth.reddit.com/search',
-                              headers=headers, params=params, timeout=15)
+        response = http_client.get('Reddit', 'https://oauth.reddit.com/search',
+                                   headers=headers, params=params, timeout=15)
 
         if response.status_code == 200:
             data = response.json()
@@ -79,6 +88,8 @@ def search_reddit_api(query, limit=5):
                     # Skip if no URL or if it's a self post
                     if not post_data.get('url') or post_data.get('is_self'):
                         continue
+                    if since and post_data.get('created_utc', 0) < since.timestamp():
+                        continue
 
                     results.append({
                         'title': post_data.get('title', ''),
@@ -88,16 +99,83 @@ def search_reddit_api(query, limit=5):
                         'score': post_data.get('score', 0),
                         'comments': post_data.get('num_comments', 0),
                         'created': post_data.get('created_utc', 0),
+                        'permalink': f"https://www.reddit.com{post_data.get('permalink', '')}",
                         'source': 'Reddit'
                     })
 
             return results
         else:
             print(f"Reddit API error: {response.status_code}")
+            resilience.report_failure('Reddit', f"HTTP {response.status_code}")
             return []
 
     except Exception as e:
         print(f"Reddit search error: {e}")
+        resilience.report_failure('Reddit', e)
+        return []
+
+def _search_reddit_public(query, limit, since):
+    """Unauthenticated search.json; threads link to their discussion page"""
+    params = {'q': query, 'sort': 'relevance', 't': incremental.reddit_window(since) if since else 'year', 'limit': limit}
+    headers = {'User-Agent': os.getenv('REDDIT_USER_AGENT', 'LinkSearchBot/1.0')}
+    response = http_client.get('Reddit', 'https://www.reddit.com/search.json', params=params, headers=headers, timeout=15)
+    response.raise_for_status()
+
+    results = []
+    for post in response.json().get('data', {}).get('children', []):
+        post_data = post.get('data', {})
+        if not post_data.get('title') or not post_data.get('permalink'):
+            continue
+        if since and post_data.get('created_utc', 0) < since.timestamp():
+            continue
+        permalink = f"https://www.reddit.com{post_data['permalink']}"
+        results.append({
+            'title': post_data['title'],
+            'url': permalink,
+            'description': f"Discussion in r/{post_data.get('subreddit', '')} - {post_data.get('num_comments', 0)} comments",
+            'subreddit': post_data.get('subreddit', ''),
+            'score': post_data.get('score', 0),
+            'comments': post_data.get('num_comments', 0),
+            'created': post_data.get('created_utc', 0),
+            'permalink': permalink,
+            'source': 'Reddit'
+        })
+    return results
+
+def search_hacker_news(query, limit=5, since=None):
+    """Search Hacker News stories through Algolia (since: only stories created after it)"""
+    try:
+        params = {'query': query, 'tags': 'story', 'hitsPerPage': limit}
+        if since:
+            params['numericFilters'] = f"created_at_i>{int(since.timestamp())}"
+
+        response = http_client.get('Hacker News', 'https://hn.algolia.com/api/v1/search', params=params,
+                                   headers={'User-Agent': 'LinkSearchBot/1.0'}, timeout=15)
+
+        if response.status_code == 200:
+            results = []
+            for hit in response.json().get('hits', []):
+                if not hit.get('title'):
+                    continue
+                results.append({
+                    'title': hit['title'],
+                    'url': hit.get('url') or f"https://news.ycombinator.com/item?id={hit.get('objectID')}",
+                    'description': f"Hacker News story - {hit.get('points') or 0} points, {hit.get('num_comments') or 0} comments",
+                    'score': hit.get('points') or 0,
+                    'comments': hit.get('num_comments') or 0,
+                    'created': hit.get('created_at_i', 0),
+                    'source': 'Hacker News'
+                })
+
+            return results
+        else:
+            print(f"Hacker News API error: {response.status_code}")
+            resilience.report_failure('Hacker News', f"HTTP {response.status_code}")
+            return []
+
+    except Exception as e:
+        print(f"Hacker News search error: {e}")
+        resilience.report_failure('Hacker News', e)
         return []
 
 def search_medium(query, limit=5):
@@ -112,13 +190,14 @@ def search_medium(query, limit=5):
         }
         url = f"https://medium.com/search?q={quote(query)}"
         session = requests.Session()
-        response = session.get(url, headers=headers, timeout=15)
+        response = http_client.get('Medium', url, session=session, headers=headers, timeout=15)
         if response.status_code == 429:
             print("Medium rate limit hit. Waiting for 30 seconds...")
             time.sleep(30)
-            response = session.get(url, headers=headers, timeout=15)
+            response = http_client.get('Medium', url, session=session, headers=headers, timeout=15)
         if response.status_code != 200:
             print(f"Medium scraping error: Status code {response.status_code}")
+            resilience.report_failure('Medium', f"HTTP {response.status_code}")
             return []
         soup = BeautifulSoup(response.text, 'html.parser')
         results = []
@@ -151,10 +230,21 @@ def search_medium(query, limit=5):
         return results
     except Exception as e:
         print(f"Medium scraping error: {e}")
+        resilience.report_failure('Medium', e)
         return []
 
 def search_quora(query, limit=5):
     """Search Quora for Q&A discussions using Selenium"""
+    try:
+        return resilience.call('Quora', _scrape_quora, query, limit, hedge=False)
+    except Exception as e:
+        print(f"Quora scraping error: {e}")
+        resilience.report_failure('Quora', e)
+        return []
+
+def _scrape_quora(query, limit):
+    """Drive a headless browser through Quora's search page"""
+    driver = None
     try:
         options = Options()
         options.add_argument("--headless")
@@ -162,7 +252,7 @@ def search_quora(query, limit=5):
         options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36")
         driver = webdriver.Chrome(options=options)
         url = f"https://www.quora.com/search?q={quote(query)}"
-        driver.get(url)
+        driver.get(http_client.resolve_url(url))
         time.sleep(3)  # Allow page to load
         results = []
         questions = WebDriverWait(driver, 10).until(
@@ -180,8 +270,7 @@ def search_quora(query, limit=5):
                 'description': 'Q&A discussion on Quora',
                 'source': 'Quora'
             })
-        driver.quit()
         return results
-    except Exception as e:
-        print(f"Quora scraping error: {e}")
-        return []
\ No newline at end of file
+    finally:
+        if driver is not None:
+            driver.quit()
\ No newline at end of file
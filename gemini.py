@@ -1,10 +1,16 @@
 # gemini.py
-import os, json
+import functools, os, json, time
 import google.generativeai as genai
 
+import cassette
+import metrics
+import tracing
+
 genai.configure(api_key=os.environ.get("GEMINI_API_KEY", ""))
 
 DEFAULT_MODEL_NAME = os.environ.get("GEMINI_MODEL", "gemini-1.5-flash")
+# Point Gemini calls at a local stand-in (see stub_servers.py) instead of the real API
+GEMINI_BASE_URL = os.environ.get("GEMINI_BASE_URL")
 
 
 def _extract_json(text: str):
@@ -26,13 +32,91 @@ def _extract_json(text: str):
         return {}
 
 
-def analyze_prompt_with_gemini(prompt: str, model_name: str = DEFAULT_MODEL_NAME):
+def _response_text(resp):
+    """Text of a response, falling back to concatenated candidate parts."""
+    text = getattr(resp, "text", None)
+    if not text and getattr(resp, "candidates", None):
+        for c in resp.candidates:
+            if getattr(c, "content", None) and getattr(c.content, "parts", None):
+                text = "".join(getattr(p, "text", "") for p in c.content.parts)
+                if text:
+                    break
+    return text or ""
+
+
+def _record_usage(stage: str, prompt: str, text: str, resp):
+    """Token counts from usage_metadata when the SDK reports it, else a ~4 chars/token estimate."""
+    usage = getattr(resp, "usage_metadata", None)
+    prompt_tokens = getattr(usage, "prompt_token_count", None)
+    output_tokens = getattr(usage, "candidates_token_count", None)
+    if prompt_tokens is None:
+        prompt_tokens = len(prompt) // 4
+    if output_tokens is None:
+        output_tokens = len(text) // 4
+    metrics.inc("gemini_tokens_total", prompt_tokens, stage=stage, kind="prompt")
+    metrics.inc("gemini_tokens_total", output_tokens, stage=stage, kind="output")
+
+
+def _model_name(model):
+    if model is None:
+        return DEFAULT_MODEL_NAME
+    if isinstance(model, str):
+        return model
+    return getattr(model, "model_name", DEFAULT_MODEL_NAME)
+
+
+def _generate_via_base_url(prompt: str, model_name: str):
+    """POST the prompt to GEMINI_BASE_URL/gemini/generate and wrap the reply like an SDK response."""
+    import requests
+    from types import SimpleNamespace
+
+    r = requests.post(
+        f"{GEMINI_BASE_URL.rstrip('/')}/gemini/generate",
+        json={"model": model_name, "prompt": prompt},
+        timeout=60,
+    )
+    r.raise_for_status()
+    return SimpleNamespace(text=r.json().get("text", ""), usage_metadata=None)
+
+
+def _generate_with_sdk(prompt: str, model_name: str, model=None):
+    gm = model if hasattr(model, "generate_content") else genai.GenerativeModel(model_name)
+    return gm.generate_content(prompt)
+
+
+def generate_text(prompt: str, stage: str = "generic", model=None):
+    """
+    Single entry point for Gemini calls: returns the response text.
+    `model` may be a GenerativeModel or a model name; latency, outcome and
+    token usage are recorded per stage.
+    """
+    with tracing.span(f"gemini.{stage}", stage=stage, prompt_chars=len(prompt)) as span:
+        start = time.monotonic()
+        try:
+            generate = functools.partial(_generate_with_sdk, model=model)
+            if GEMINI_BASE_URL:
+                generate = _generate_via_base_url
+            if cassette.ACTIVE:
+                generate = cassette.wrap_gemini(generate, _response_text)
+            resp = generate(prompt, _model_name(model))
+        except Exception:
+            metrics.inc("gemini_requests_total", stage=stage, outcome="error")
+            metrics.observe("gemini_request_seconds", time.monotonic() - start, stage=stage)
+            raise
+        metrics.observe("gemini_request_seconds", time.monotonic() - start, stage=stage)
+        metrics.inc("gemini_requests_total", stage=stage, outcome="ok")
+        text = _response_text(resp)
+        _record_usage(stage, prompt, text, resp)
+        span.set(output_chars=len(text))
+        return text
+
+
+def analyze_prompt_with_gemini(prompt: str, model_name=DEFAULT_MODEL_NAME):
     """
     Ask Gemini to extract search scaffolding for downstream APIs.
     Always returns a dict with all expected keys (sensible fallbacks).
     """
     try:
-        gm = genai.GenerativeModel(model_name)
         ask = f"""
 Analyze this user prompt and return ONLY valid JSON with keys:
 main_topics, search_terms, related_concepts, academic_terms,
@@ -40,17 +124,9 @@ github_queries, reddit_queries, kaggle_queries, medium_queries, quora_queries.
 
 User prompt: "{prompt}"
 """
-        resp = gm.generate_content(ask)
+        text = generate_text(ask, "analysis", model_name)
 
-        text = getattr(resp, "text", None)
-        if not text and getattr(resp, "candidates", None):
-            for c in resp.candidates:
-                if getattr(c, "content", None) and getattr(c.content, "parts", None):
-                    text = "".join(getattr(p, "text", "") for p in c.content.parts)
-                    if text:
-                        break
-
-        data = _extract_json(text or "")
+        data = _extract_json(text)
 
         # sensible fallbacks
         data.setdefault("main_topics", prompt.split()[:3])
@@ -70,14 +146,29 @@ User prompt: "{prompt}"
 
     except Exception as e:
         print(f"Error with Gemini API: {e}")
-        return {
-            "main_topics": prompt.split()[:3],
-            "search_terms": [prompt],
-            "related_concepts": [],
-            "academic_terms": [prompt],
-            "github_queries": [prompt],
-            "reddit_queries": [prompt],
-            "kaggle_queries": [prompt],
-            "medium_queries": [prompt],
-            "quora_queries": [prompt],
-        }
\ No newline at end of file
+        return fallback_analysis(prompt)
+
+
+def fallback_analysis(prompt: str):
+    """Analysis used when Gemini fails or runs out of time: search the raw prompt everywhere."""
+    return {
+        "main_topics": prompt.split()[:3],
+        "search_terms": [prompt],
+        "related_concepts": [],
+        "academic_terms": [prompt],
+        "github_queries": [prompt],
+        "reddit_queries": [prompt],
+        "kaggle_queries": [prompt],
+        "medium_queries": [prompt],
+        "quora_queries": [prompt],
+    }
+
+
+def print_analysis(analysis):
+    """Show the search scaffolding Gemini extracted from the prompt."""
+    print("\nGEMINI ANALYSIS:")
+    print("-" * 50)
+    for key in ["main_topics", "search_terms", "academic_terms", "github_queries"]:
+        values = analysis.get(key) or []
+        if values:
+            print(f"   {key.replace('_', ' ').title()}: {', '.join(str(v) for v in values[:4])}")
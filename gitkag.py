@@ -1,14 +1,99 @@
 import os
-import requests
 from urllib.parse import quote
 
-def search_github_api(query, limit=5):
-    """Search GitHub using official API"""
+import http_client
+import incremental
+import resilience
+
+GITHUB_GRAPHQL_URL = 'https://api.github.com/graphql'
+
+# Fields the REST search returns plus last commit date and license, which
+# REST would need extra requests per repository for
+GITHUB_REPO_FRAGMENT = """
+fragment repo on Repository {
+  nameWithOwner url description stargazerCount forkCount updatedAt pushedAt
+  primaryLanguage { name }
+  licenseInfo { spdxId }
+  repositoryTopics(first: 10) { nodes { topic { name } } }
+  defaultBranchRef { target { ... on Commit { committedDate } } }
+}
+"""
+
+def _github_headers():
+    headers = {'User-Agent': 'LinkSearchBot/1.0'}
+    if os.getenv('GITHUB_TOKEN'):
+        headers['Authorization'] = f'token {os.getenv("GITHUB_TOKEN")}'
+    return headers
+
+def _parse_graphql_repo(repo):
+    target = (repo.get('defaultBranchRef') or {}).get('target') or {}
+    return {
+        'title': repo['nameWithOwner'],
+        'url': repo['url'],
+        'description': repo.get('description') or 'No description available',
+        'stars': repo.get('stargazerCount', 0),
+        'forks': repo.get('forkCount', 0),
+        'language': (repo.get('primaryLanguage') or {}).get('name', 'Unknown'),
+        'updated': repo.get('updatedAt', ''),
+        'pushed': repo.get('pushedAt', ''),
+        'last_commit': target.get('committedDate', ''),
+        'license': (repo.get('licenseInfo') or {}).get('spdxId', ''),
+        'topics': [node['topic']['name'] for node in (repo.get('repositoryTopics') or {}).get('nodes', [])],
+        'source': 'GitHub'
+    }
+
+def search_github_graphql(queries, limit=5, since=None):
+    """
+    Run several repository searches as aliased fields of one GraphQL
+    request (one round trip, one hit on the rate limit).  Needs
+    GITHUB_TOKEN; without it, or if the GraphQL request fails, each query
+    goes through search_github_api instead.
+    """
+    if isinstance(queries, str):
+        queries = [queries]
+    if not os.getenv('GITHUB_TOKEN'):
+        return [repo for query in queries for repo in search_github_api(query, limit, since)]
+    try:
+        qualifiers = ' sort:stars'
+        if since:
+            qualifiers += f" pushed:>={since:%Y-%m-%d}"
+        aliases = [f"q{i}" for i in range(len(queries))]
+        document = (
+            f"query({', '.join(f'${alias}: String!' for alias in aliases)}, $n: Int!) {{\n"
+            + ''.join(f"  {alias}: search(query: ${alias}, type: REPOSITORY, first: $n) "
+                      "{ nodes { ...repo } }\n" for alias in aliases)
+            + "}\n" + GITHUB_REPO_FRAGMENT
+        )
+        variables = {alias: query + qualifiers for alias, query in zip(aliases, queries)}
+        variables['n'] = limit
+
+        response = http_client.post('GitHub', GITHUB_GRAPHQL_URL, headers=_github_headers(),
+                                    json={'query': document, 'variables': variables}, timeout=20)
+        if response.status_code != 200:
+            raise RuntimeError(f"HTTP {response.status_code}")
+        payload = response.json()
+        data = payload.get('data') or {}
+        if not data:
+            raise RuntimeError('; '.join(e.get('message', '') for e in payload.get('errors', [])) or 'no data')
+
+        results = []
+        for alias in aliases:
+            for repo in (data.get(alias) or {}).get('nodes') or []:
+                # Non-repository nodes come back as empty objects
+                if repo.get('nameWithOwner'):
+                    results.append(_parse_graphql_repo(repo))
+        return results
+    except Exception as e:
+        print(f"GitHub GraphQL search error: {e}, falling back to REST")
+        return [repo for query in queries for repo in search_github_api(query, limit, since)]
+
+def search_github_api(query, limit=5, since=None):
+    """Search GitHub using official API (since: only repositories pushed to after it)"""
     try:
-        headers = {'User-Agent': 'LinkSearchBot/1.0'}
-        if os.getenv('GITHUB_TOKEN'):
-            headers['Authorization'] = f'token {os.getenv("GITHUB_TOKEN")}'
+        headers = _github_headers()
 
+        if since:
+            query = f"{query} pushed:>={since:%Y-%m-%d}"
         params = {
             'q': query,
             'sort': 'stars',
@@ -16,8 +101,8 @@ def search_github_api(query, limit=5):
             'per_page': limit
         }
 
-        response = requests.get('https://api.github.com/search/repositories',
-                              headers=headers, params=params, timeout=15)
+        response = http_client.get('GitHub', 'https://api.github.com/search/repositories',
+                                   headers=headers, params=params, timeout=15)
 
         if response.status_code == 200:
             data = response.json()
@@ -40,14 +125,16 @@ def search_github_api(query, limit=5):
             return results
         else:
             print(f"GitHub API error: {response.status_code}")
+            resilience.report_failure('GitHub', f"HTTP {response.status_code}")
             return []
 
     except Exception as e:
         print(f"GitHub search error: {e}")
+        resilience.report_failure('GitHub', e)
         return []
 
-def search_kaggle(query, limit=5):
-    """Search Kaggle for datasets"""
+def search_kaggle(query, limit=5, since=None):
+    """Search Kaggle for datasets (since: only datasets updated after it)"""
     try:
         from kaggle.api.kaggle_api_extended import KaggleApi
         if not os.getenv('KAGGLE_USERNAME') or not os.getenv('KAGGLE_KEY'):
@@ -57,9 +144,13 @@ def search_kaggle(query, limit=5):
         os.environ['KAGGLE_KEY'] = os.getenv('KAGGLE_KEY')
         api = KaggleApi()
         api.authenticate()
-        datasets = api.dataset_list(search=query, sort_by='votes', max_size=limit)
+        datasets = resilience.call('Kaggle', api.dataset_list, search=query,
+                                   sort_by='updated' if since else 'votes', max_size=limit)
         results = []
         for ds in datasets:
+            updated = getattr(ds, 'lastUpdated', None)
+            if since and updated and incremental.parse_since(updated) < since:
+                continue
             votes = getattr(ds, 'upvoteCount', 0)
             results.append({
                 'title': ds.title,
@@ -71,7 +162,9 @@ def search_kaggle(query, limit=5):
         return results
     except ImportError as e:
         print(f"Kaggle search error: Failed to import KaggleApi. Ensure 'kaggle' package is installed (pip install kaggle --upgrade). Error: {e}")
+        resilience.report_failure('Kaggle', e)
         return []
     except Exception as e:
         print(f"Kaggle search error: {e}. Ensure Kaggle API credentials are valid and try again.")
+        resilience.report_failure('Kaggle', e)
         return []
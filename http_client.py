@@ -0,0 +1,168 @@
+"""
+Shared HTTP helpers for all upstream providers.
+
+All provider modules go through get()/post() so that circuit breaking
+and hedging (see resilience.py) apply uniformly to every source.
+
+Setting UPSTREAM_BASE_URL (e.g. to a stub_servers.py instance) sends
+every request to <base>/<original host>/<original path> instead.
+
+GET responses carrying an ETag or Last-Modified header are kept (up to
+CONDITIONAL_CACHE_SIZE of them, least recently used dropped first), and
+repeating the same request sends If-None-Match / If-Modified-Since.  A
+304 answer is turned back into the stored 200 response, so callers never
+see it; GitHub does not count 304s against its rate limit.
+
+A provider given a session with set_session() (search_engine.py gives
+each one a pooled requests.Session) keeps its connections alive between
+requests instead of opening a new one every time.
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from urllib.parse import urlsplit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+import cassette
+import deadline
+import metrics
+import resilience
+import tracing
+
+DEFAULT_TIMEOUT = 15
+CONDITIONAL_CACHE_SIZE = int(os.environ.get('CONDITIONAL_CACHE_SIZE', '1024'))
+
+# Request headers that change what the upstream returns, so they are part of the key
+_VARY_HEADERS = ('Authorization', 'X-API-KEY', 'Accept')
+
+_validated = OrderedDict()      # request key -> (headers, content, encoding) of the last 200
+_validated_lock = threading.Lock()
+_sessions = {}                  # provider -> requests.Session
+
+
+def resolve_url(url):
+    """Redirect an upstream URL to UPSTREAM_BASE_URL when it is set"""
+    base = os.environ.get('UPSTREAM_BASE_URL')
+    if not base:
+        return url
+    parts = urlsplit(url)
+    rewritten = f"{base.rstrip('/')}/{parts.netloc}{parts.path}"
+    return f"{rewritten}?{parts.query}" if parts.query else rewritten
+
+
+def _is_server_failure(response):
+    """5xx and 429 responses count against the provider's health"""
+    return response.status_code >= 500 or response.status_code == 429
+
+
+def _conditional_key(url, params, headers):
+    if isinstance(params, dict):
+        params = sorted((str(k), str(v)) for k, v in params.items())
+    vary = [str((headers or {}).get(name, '')) for name in _VARY_HEADERS]
+    return hashlib.sha1(repr((url, params, vary)).encode('utf-8')).hexdigest()
+
+
+def _add_validators(key, headers):
+    """Copy of headers with If-None-Match/If-Modified-Since from the stored response, if any"""
+    with _validated_lock:
+        entry = _validated.get(key)
+    headers = dict(headers or {})
+    if entry is None:
+        return headers, False
+    stored = entry[0]
+    if stored.get('ETag'):
+        headers.setdefault('If-None-Match', stored['ETag'])
+    if stored.get('Last-Modified'):
+        headers.setdefault('If-Modified-Since', stored['Last-Modified'])
+    return headers, True
+
+
+def _revalidate(provider, key, conditional, response):
+    """Store a fresh 200 with validators; replace a 304 with the stored response"""
+    if response.status_code == 304:
+        with _validated_lock:
+            entry = _validated.get(key)
+            if entry is not None:
+                _validated.move_to_end(key)
+        if entry is None:
+            return response
+        metrics.record_cache('http_conditional', True)
+        metrics.inc('http_not_modified_total', provider=provider)
+        headers, content, encoding = entry
+        cached = requests.models.Response()
+        cached.status_code = 200
+        cached.headers = headers.copy()
+        cached._content = content
+        cached.encoding = encoding
+        cached.url = response.url
+        cached.request = response.request
+        cached.elapsed = response.elapsed
+        cached.reason = 'Not Modified (cached)'
+        return cached
+
+    if conditional:
+        metrics.record_cache('http_conditional', False)
+    if response.status_code == 200 and ('ETag' in response.headers or 'Last-Modified' in response.headers):
+        # Case-insensitive: HTTP/2 front ends send 'etag' and 'last-modified'
+        entry = (CaseInsensitiveDict(response.headers), response.content, response.encoding)
+        with _validated_lock:
+            _validated[key] = entry
+            _validated.move_to_end(key)
+            while len(_validated) > CONDITIONAL_CACHE_SIZE:
+                _validated.popitem(last=False)
+    return response
+
+
+def set_session(provider, session):
+    """Send provider's requests through session (None: a fresh connection per request)"""
+    if session is None:
+        _sessions.pop(provider, None)
+    else:
+        _sessions[provider] = session
+
+
+def request(provider, method, url, session=None, timeout=DEFAULT_TIMEOUT, hedge=None, **kwargs):
+    """Send one HTTP request on behalf of provider, within the active deadline"""
+    sender = session or _sessions.get(provider) or requests
+
+    # Cassettes record exact responses, so they are never mixed with revalidation
+    key = None
+    conditional = False
+    if method == 'GET' and CONDITIONAL_CACHE_SIZE > 0 and not cassette.ACTIVE:
+        key = _conditional_key(url, kwargs.get('params'), kwargs.get('headers'))
+        kwargs['headers'], conditional = _add_validators(key, kwargs.get('headers'))
+
+    def send(method, url, **kwargs):
+        return sender.request(method, resolve_url(url), **kwargs)
+
+    if cassette.ACTIVE:
+        send = cassette.wrap_http(send)
+
+    with tracing.span('http.request', provider=provider, method=method, url=url) as span:
+        response = resilience.call(
+            provider,
+            send,
+            method,
+            url,
+            timeout=deadline.clamp_timeout(timeout),
+            hedge=hedge,
+            is_failure=_is_server_failure,
+            **kwargs
+        )
+        span.set(status=response.status_code, bytes=len(response.content))
+    if key is not None:
+        response = _revalidate(provider, key, conditional, response)
+    return response
+
+
+def get(provider, url, **kwargs):
+    return request(provider, 'GET', url, **kwargs)
+
+
+def post(provider, url, **kwargs):
+    # Never duplicate non-idempotent requests
+    kwargs.setdefault('hedge', False)
+    return request(provider, 'POST', url, **kwargs)
@@ -0,0 +1,121 @@
+"""
+Incremental resource refresh helpers.
+
+A refresh starts from the newest saved research_resources_*.json for a
+topic and asks each provider only for items newer than that package,
+using the provider's own date filter:
+
+    GitHub            pushed:>=DATE qualifier
+    Reddit            t=hour/day/week/month/year window, then created_utc
+    Kaggle            sort_by=updated, then lastUpdated
+    Semantic Scholar  publicationDateOrYear=DATE:
+    Google Scholar    as_ylo=YEAR (year granularity; older hits are deduped)
+    OpenAlex          from_publication_date:DATE
+    arXiv             submittedDate:[DATE TO *]   (server /api/literature)
+    Hacker News       numericFilters=created_at_i>TS (server /api/community)
+
+Medium and Quora have no date filter and are skipped.  Each source keeps
+its own watermark in the package's 'source_timestamps', advanced only
+when that source answered in full, so a source cut off by the deadline
+is asked again from its old watermark next time.  The server's
+/api/literature and /api/community take the same cut-off as an ISO
+"since" field in the JSON body.
+"""
+import glob
+import json
+import os
+from datetime import datetime
+
+import storage
+
+RESOURCE_DIR = os.environ.get('RESOURCE_DIR', '.')
+
+REDDIT_WINDOWS = [('hour', 3600), ('day', 86400), ('week', 7 * 86400), ('month', 31 * 86400), ('year', 366 * 86400)]
+
+
+def parse_since(value):
+    """datetime or ISO-8601 string -> naive local datetime (None passes through)"""
+    if value is None or value == '':
+        return None
+    if not isinstance(value, datetime):
+        value = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    if value.tzinfo is not None:
+        value = value.astimezone().replace(tzinfo=None)
+    return value
+
+
+def reddit_window(since):
+    """Smallest Reddit search time window that still covers everything after since"""
+    if since is None:
+        return 'all'
+    elapsed = (datetime.now() - since).total_seconds()
+    for name, seconds in REDDIT_WINDOWS:
+        if elapsed <= seconds:
+            return name
+    return 'all'
+
+
+def _topic_key(topic):
+    return ' '.join(str(topic).lower().split())
+
+
+def latest_package(topic, directory=RESOURCE_DIR):
+    """
+    (where, package) of the newest saved collection for topic, or (None,
+    None): an index lookup in the research store, else a scan of the
+    research_resources_*.json files written before the store existed
+    """
+    run_id, package = storage.latest_package(topic)
+    if package is not None:
+        return f"{storage.RESEARCH_DB} run #{run_id}", package
+    wanted = _topic_key(topic)
+    newest = (None, None)
+    newest_time = ''
+    for path in glob.glob(os.path.join(directory, 'research_resources_*.json')):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                package = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if _topic_key((package.get('research_info') or {}).get('topic', '')) != wanted:
+            continue
+        collected = package.get('collection_timestamp', '')
+        if collected > newest_time:
+            newest, newest_time = (path, package), collected
+    return newest
+
+
+def source_since(package, source):
+    """Watermark for one source of a saved package (its own, else the package's)"""
+    watermarks = package.get('source_timestamps') or {}
+    return parse_since(watermarks.get(source) or package.get('collection_timestamp'))
+
+
+def merge_delta(package, delta, complete, started_at):
+    """
+    Add newly found resources (already organized by category) to package
+    in place, newest first and deduplicated by URL.  Returns how many
+    were added.
+    """
+    seen = {r.get('url') for resources in package.get('resources', {}).values() for r in resources}
+    added = 0
+    for category, resources in delta.items():
+        fresh = [r for r in resources if r.get('url') and r.get('url') not in seen]
+        seen.update(r['url'] for r in fresh)
+        package.setdefault('resources', {}).setdefault(category, [])[:0] = fresh
+        added += len(fresh)
+
+    watermarks = package.setdefault('source_timestamps', {})
+    previous = package.get('collection_timestamp')
+    for source, done in complete.items():
+        if done:
+            watermarks[source] = started_at
+        elif previous:
+            # Not fully searched: keep asking from the old watermark
+            watermarks.setdefault(source, previous)
+    package.setdefault('source_completeness', {}).update(complete)
+    package['collection_timestamp'] = started_at
+    package['resource_counts'] = {key: len(value) for key, value in package['resources'].items()}
+    package['total_resources'] = sum(package['resource_counts'].values())
+    package.setdefault('refresh_history', []).append({'timestamp': started_at, 'added': added})
+    return added
@@ -0,0 +1,171 @@
+"""
+Input file ingestion for research proposals.
+
+    python ingest.py draft.md dataset_notes.txt
+    python ingest.py thesis.txt --json
+
+Files small enough for the critique prompt are passed through as they
+are.  Larger ones are split on token budgets (about CHARS_PER_TOKEN
+characters per token, cut at paragraph, line or sentence breaks), the
+chunks are summarized by parallel Gemini calls, and the summaries are
+reduced to one digest of at most INGEST_DIGEST_TOKENS.  Files from
+MMAP_THRESHOLD bytes up are memory-mapped: only the chunk being
+summarized is ever decoded, so a file's size costs no memory.
+
+Chunks grow when a file would need more than INGEST_MAX_CHUNKS of them,
+so the number of Gemini calls per file is bounded and the whole file is
+always covered.  Chunks whose summary has not arrived within
+INGEST_DEADLINE_SECONDS are represented by a short excerpt instead.
+"""
+import argparse
+import json
+import math
+import mmap
+import os
+from functools import partial
+
+import tracing
+from deadline import Deadline, run_all
+from deadline import call as run_with_deadline
+from gemini import generate_text
+
+CHARS_PER_TOKEN = 4
+INGEST_CHUNK_TOKENS = int(os.environ.get('INGEST_CHUNK_TOKENS', '8000'))
+INGEST_MAX_CHUNKS = int(os.environ.get('INGEST_MAX_CHUNKS', '32'))
+INGEST_SUMMARY_TOKENS = int(os.environ.get('INGEST_SUMMARY_TOKENS', '300'))
+INGEST_DIGEST_TOKENS = int(os.environ.get('INGEST_DIGEST_TOKENS', '1500'))
+INGEST_PARALLEL = int(os.environ.get('INGEST_PARALLEL', '4'))
+INGEST_DEADLINE_SECONDS = float(os.environ.get('INGEST_DEADLINE_SECONDS', '60'))
+MMAP_THRESHOLD = 1024 * 1024
+
+# Preferred cut points, best first; a cut is looked for in the last quarter of a chunk
+_SEPARATORS = (b'\n\n', b'\n', b'. ', b' ')
+
+
+def chunk_spans(buf, size, chunk_bytes):
+    """(start, end) byte offsets of consecutive chunks of at most chunk_bytes"""
+    start = 0
+    while start < size:
+        end = min(start + chunk_bytes, size)
+        if end < size:
+            floor = start + chunk_bytes * 3 // 4
+            for separator in _SEPARATORS:
+                cut = buf.rfind(separator, floor, end)
+                if cut != -1:
+                    end = cut + len(separator)
+                    break
+            else:
+                # No whitespace at all: at least do not split a UTF-8 sequence
+                while end > start + 1 and buf[end] & 0xC0 == 0x80:
+                    end -= 1
+        yield start, end
+        start = end
+
+
+def _decode(buf, start, end):
+    return bytes(buf[start:end]).decode('utf-8', errors='replace')
+
+
+def _summarize_chunk(buf, span, index, total, name, model):
+    text = _decode(buf, *span)
+    words = INGEST_SUMMARY_TOKENS * 3 // 4
+    prompt = f"""
+Summarize this excerpt ({index + 1} of {total}) of the file "{name}", which a researcher attached to a research proposal.
+Keep the concrete content: claims, methods, data, numbers, results and open problems.
+Plain text, at most {words} words.
+
+EXCERPT:
+{text}
+"""
+    return generate_text(prompt, 'ingest_map', model).strip()
+
+
+def _join(summaries, share=None):
+    return '\n\n'.join(f"[Part {i + 1}/{len(summaries)}] {s[:share]}" for i, s in enumerate(summaries))
+
+
+def _reduce(summaries, name, model, deadline):
+    """Join the chunk summaries, condensing them with one more call if they exceed the digest budget"""
+    limit = INGEST_DIGEST_TOKENS * CHARS_PER_TOKEN
+    joined = _join(summaries)
+    if len(joined) <= limit:
+        return joined
+    # Without the condensing call every part keeps an equal share, so the end of the file is not lost
+    share = (limit - len(_join([''] * len(summaries)))) // len(summaries)
+    trimmed = _join(summaries, max(share, 0))[:limit]
+    if deadline.expired():
+        return trimmed
+    prompt = f"""
+Merge these consecutive part summaries of the file "{name}" into one digest for an expert reviewer.
+Keep the concrete claims, methods, data, numbers and results; drop repetition.
+Plain text, at most {INGEST_DIGEST_TOKENS * 3 // 4} words.
+
+PART SUMMARIES:
+{joined}
+"""
+    digest, finished = run_with_deadline(lambda: generate_text(prompt, 'ingest_reduce', model).strip(), deadline)
+    return digest[:limit] if finished and digest else trimmed
+
+
+def digest_file(path, model=None, deadline=None):
+    """
+    Input file record for research_data['input_files']: 'content' holds
+    the file itself when it fits the digest budget, else the digest.
+    deadline (seconds or a Deadline) bounds the Gemini calls.
+    """
+    name = os.path.basename(path)
+    size = os.path.getsize(path)
+    record = {'path': path, 'name': name, 'size': size, 'chunks': 1, 'summarized': False}
+    with open(path, 'rb') as f:
+        if size <= INGEST_DIGEST_TOKENS * CHARS_PER_TOKEN:
+            record['content'] = f.read().decode('utf-8', errors='replace')
+            return record
+
+        budget = deadline if isinstance(deadline, Deadline) else Deadline(deadline or INGEST_DEADLINE_SECONDS)
+        mapped = size >= MMAP_THRESHOLD
+        buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if mapped else f.read()
+        complete = {}
+        try:
+            # Cuts land up to a quarter early, so aim for 3/4 of the maximum count
+            chunk_tokens = max(INGEST_CHUNK_TOKENS, math.ceil(size * 4 / (3 * CHARS_PER_TOKEN * INGEST_MAX_CHUNKS)))
+            spans = list(chunk_spans(buf, size, chunk_tokens * CHARS_PER_TOKEN))
+            with tracing.span('ingest.digest', file=name, bytes=size, chunks=len(spans)) as span:
+                tasks = {i: partial(_summarize_chunk, buf, s, i, len(spans), name, model) for i, s in enumerate(spans)}
+                found, complete = run_all(tasks, budget, max_workers=INGEST_PARALLEL)
+                summarized = sum(1 for summary in found.values() if summary)
+                excerpt = INGEST_SUMMARY_TOKENS * CHARS_PER_TOKEN
+                summaries = [
+                    found.get(i) or f"(excerpt, not summarized) {_decode(buf, s[0], min(s[1], s[0] + excerpt))}"
+                    for i, s in enumerate(spans)
+                ]
+                record['content'] = _reduce(summaries, name, model, budget)
+                span.set(summarized=summarized)
+        finally:
+            # Map workers abandoned at the deadline still hold buf; they unmap it
+            # when they let go of it, rather than reading a closed map
+            if mapped and complete and all(complete.values()):
+                buf.close()
+    record.update(chunks=len(spans), summarized=True, chunks_summarized=summarized)
+    return record
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Digest input files the way the research workflow does")
+    parser.add_argument('files', nargs='+')
+    parser.add_argument('--json', action='store_true', help="print the records as JSON lines")
+    args = parser.parse_args()
+
+    for path in args.files:
+        record = digest_file(path)
+        if args.json:
+            print(json.dumps(record, ensure_ascii=False))
+            continue
+        coverage = (f"{record['chunks_summarized']}/{record['chunks']} chunks summarized"
+                    if record['summarized'] else "kept as is")
+        print(f"--- {record['name']} ({record['size']:,} bytes, {coverage}) ---")
+        print(record['content'])
+        print()
+
+
+if __name__ == '__main__':
+    main()
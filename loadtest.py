@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Load generator for the server.py API.
+
+Each virtual user replays what the frontend does for one idea: POST
+/api/critique, /api/literature, /api/community, /api/directions and
+/api/draft in order, then picks another idea.  Concurrency is swept
+through increasing levels; for each level throughput, latency
+percentiles and error rate are reported, and the saturation point is
+the last level before adding users no longer buys throughput (or before
+the error rate / p95 budget is exceeded).
+
+By default the server runs in-process on a threaded WSGI server with
+every upstream and Gemini pointed at stub_servers.py:
+
+    python loadtest.py --levels 1,2,4,8,16 --duration 10 --latency 0.2
+
+To test a separately started instance instead:
+
+    python loadtest.py --url http://127.0.0.1:5000 --levels 1,4,16
+"""
+import argparse
+import json
+import logging
+import random
+import threading
+import time
+
+import requests
+
+from benchmark import DEFAULT_PROMPTS, configure_environment, percentile, quiet
+from stub_servers import StubServer
+
+SESSION = ["/api/critique", "/api/literature", "/api/community", "/api/directions", "/api/draft"]
+
+
+def start_local_server():
+    """Serve server.app on a random local port; returns (base_url, shutdown)"""
+    from werkzeug.serving import make_server
+    import server
+
+    # One access-log line per request would dominate the run's output
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    httpd = make_server("127.0.0.1", 0, server.app, threaded=True)
+    thread = threading.Thread(target=httpd.serve_forever, name="api-under-test", daemon=True)
+    thread.start()
+    return f"http://127.0.0.1:{httpd.server_port}", httpd.shutdown
+
+
+def run_level(base_url, concurrency, duration, ideas, timeout, seed):
+    """Closed-loop load: `concurrency` users replay sessions until `duration` elapses"""
+    samples = []
+    lock = threading.Lock()
+    stop_at = time.monotonic() + duration
+
+    def user(index):
+        rng = random.Random(seed + index)
+        session = requests.Session()
+        while time.monotonic() < stop_at:
+            idea = rng.choice(ideas)
+            for endpoint in SESSION:
+                if time.monotonic() >= stop_at:
+                    break
+                start = time.perf_counter()
+                try:
+                    ok = session.post(base_url + endpoint, json={"idea": idea}, timeout=timeout).status_code < 400
+                except requests.RequestException:
+                    ok = False
+                with lock:
+                    samples.append((endpoint, time.perf_counter() - start, ok))
+
+    started = time.monotonic()
+    users = [threading.Thread(target=user, args=(i,), daemon=True) for i in range(concurrency)]
+    for t in users:
+        t.start()
+    for t in users:
+        t.join()
+    wall = time.monotonic() - started
+
+    latencies = [latency for _, latency, _ in samples]
+    errors = sum(1 for _, _, ok in samples if not ok)
+    per_endpoint = {}
+    for endpoint in SESSION:
+        own = [latency for name, latency, _ in samples if name == endpoint]
+        per_endpoint[endpoint] = {"requests": len(own), "p50": percentile(own, 50), "p95": percentile(own, 95)}
+    return {
+        "concurrency": concurrency,
+        "requests": len(samples),
+        "throughput": len(samples) / wall if wall else 0.0,
+        "error_rate": errors / len(samples) if samples else 0.0,
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "p99": percentile(latencies, 99),
+        "endpoints": per_endpoint,
+    }
+
+
+def find_saturation(levels, min_gain, max_error_rate, p95_budget):
+    """
+    Last good level: the one before throughput gains drop below min_gain
+    or a level breaks the error-rate or p95 budget.  None (with the
+    reason) when even the first level breaks a budget.
+    """
+    for previous, level in zip([None] + levels[:-1], levels):
+        if level["error_rate"] > max_error_rate:
+            return previous, f"error rate {level['error_rate']:.1%} > {max_error_rate:.0%} at {level['concurrency']} users"
+        if p95_budget and level["p95"] > p95_budget:
+            return previous, f"p95 {level['p95']:.2f}s > {p95_budget:.2f}s at {level['concurrency']} users"
+        if previous and previous["throughput"] > 0:
+            gain = level["throughput"] / previous["throughput"] - 1
+            if gain < min_gain:
+                return previous, f"throughput gain {gain:.0%} going to {level['concurrency']} users"
+    return None, "not reached"
+
+
+def print_levels(levels):
+    print(f"\n{'users':>5} {'reqs':>6} {'req/s':>8} {'err%':>6} {'p50':>8} {'p95':>8} {'p99':>8}")
+    print("-" * 56)
+    for level in levels:
+        print(f"{level['concurrency']:>5} {level['requests']:>6} {level['throughput']:>8.2f} "
+              f"{level['error_rate'] * 100:>5.1f}% {level['p50']:>7.3f}s {level['p95']:>7.3f}s {level['p99']:>7.3f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrency sweep against the research API")
+    parser.add_argument("--url", help="base URL of a running server (default: start one in-process)")
+    parser.add_argument("--levels", default="1,2,4,8,16", help="comma-separated concurrency levels")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per level")
+    parser.add_argument("--timeout", type=float, default=60.0, help="per-request client timeout")
+    parser.add_argument("--latency", type=float, default=0.1, help="stub upstream latency (in-process mode)")
+    parser.add_argument("--jitter", type=float, default=0.05)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="stub upstream error rate")
+    parser.add_argument("--min-gain", type=float, default=0.10, help="throughput gain below which the API is saturated")
+    parser.add_argument("--max-error-rate", type=float, default=0.05)
+    parser.add_argument("--p95-budget", type=float, default=None, help="p95 latency budget in seconds")
+    parser.add_argument("--ideas", help="file with one idea per line")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="write the report to this file")
+    args = parser.parse_args()
+
+    ideas = DEFAULT_PROMPTS
+    if args.ideas:
+        with open(args.ideas, encoding="utf-8") as f:
+            ideas = [line.strip() for line in f if line.strip()]
+    levels = [int(n) for n in args.levels.split(",") if n.strip()]
+
+    stub = shutdown = None
+    base_url = args.url
+    if not base_url:
+        stub = StubServer(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate, seed=args.seed)
+        configure_environment(stub.start(), 0.0)
+        base_url, shutdown = start_local_server()
+        print(f"API under test on {base_url}, stub upstreams on {stub.base_url}")
+
+    results = []
+    try:
+        for concurrency in levels:
+            print(f"Running {concurrency} users for {args.duration:.0f}s...")
+            with quiet():
+                results.append(run_level(base_url, concurrency, args.duration, ideas, args.timeout, args.seed))
+    finally:
+        if shutdown:
+            shutdown()
+        if stub:
+            stub.stop()
+
+    print_levels(results)
+    saturated, reason = find_saturation(results, args.min_gain, args.max_error_rate, args.p95_budget)
+    if saturated:
+        print(f"\nSaturation point: {saturated['concurrency']} users at {saturated['throughput']:.1f} req/s ({reason})")
+    elif reason != "not reached":
+        print(f"\nNo level within budget ({reason})")
+    else:
+        print(f"\nSaturation point not reached up to {levels[-1]} users")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"config": vars(args), "levels": results,
+                       "saturation": saturated and saturated["concurrency"], "reason": reason}, f, indent=2)
+        print(f"Report written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,32 +3,33 @@
 Gemini Link Search - Enhanced API Version
 Main entry point for the CLI interface.
 """
+import contextvars
 import os
 import sys
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 import json
 from datetime import datetime
 from pathlib import Path
 from dotenv import load_dotenv
-import google.generativeai as genai
-from gemini import analyze_prompt_with_gemini, print_analysis
-from gitkag import search_github_api, search_kaggle
-from forum import search_reddit_api, search_medium, search_quora
-from scholar import search_semantic_scholar, search_google_scholar_serpapi
-from summarizer import print_results
+from gemini import generate_text
+from deadline import Deadline
+from search_engine import search_for_links, show_api_status
+import checkpoint
+import incremental
+import ingest
+import metrics
+import providers
+import resource_index
+import search_engine
+import storage
+import tracing
 
 load_dotenv()
 
 # Configure API Keys
 GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
-REDDIT_CLIENT_ID = os.getenv('REDDIT_CLIENT_ID')
-REDDIT_CLIENT_SECRET = os.getenv('REDDIT_CLIENT_SECRET')
-REDDIT_USER_AGENT = os.getenv('REDDIT_USER_AGENT', 'LinkSearchBot/1.0')
-GITHUB_TOKEN = os.getenv('GITHUB_TOKEN')
-SEMANTIC_SCHOLAR_API_KEY = os.getenv('SEMANTIC_SCHOLAR_API_KEY')
-SERPAPI_KEY = os.getenv('SERPAPI_KEY')
-KAGGLE_USERNAME = os.getenv('KAGGLE_USERNAME')
-KAGGLE_KEY = os.getenv('KAGGLE_KEY')
 
 # Check required API keys
 if not GEMINI_API_KEY:
@@ -36,165 +37,25 @@ if not GEMINI_API_KEY:
     print("Example: export GEMINI_API_KEY='your-api-key-here'")
     sys.exit(1)
 
-# Configure Gemini AI
-genai.configure(api_key=GEMINI_API_KEY)
-model = genai.GenerativeModel('gemini-1.5-flash')
-
-def show_api_status():
-    """Display the status of all configured APIs"""
-    print("API CONFIGURATION STATUS:")
-    print("-" * 50)
-
-    # Required APIs
-    print(f"   Gemini AI: Configured")
-
-    # Optional APIs
-    apis = [
-        ("Reddit", REDDIT_CLIENT_ID and REDDIT_CLIENT_SECRET),
-        ("GitHub", GITHUB_TOKEN),
-        ("Kaggle", KAGGLE_USERNAME and KAGGLE_KEY),
-        ("Semantic Scholar", SEMANTIC_SCHOLAR_API_KEY),
-        ("Google Scholar (SerpAPI)", SERPAPI_KEY),
-        ("Medium (Scraping)", True),
-        ("Quora (Scraping)", True)
-    ]
-
-    for name, configured in apis:
-        status = "Configured" if configured else "Not configured"
-        print(f"   {status}: {name}")
-
-    configured_count = sum(1 for _, configured in apis if configured) + 1
-    print(f"\n  Total APIs configured: {configured_count}/7")
-    print()
-
-def search_for_links(prompt):
-    """Main function to search for links across all platforms"""
-    print(f"\nSearching for: '{prompt}'")
-
-    # Step 1: Analyze with Gemini
-    analysis = analyze_prompt_with_gemini(prompt, model)
-    print_analysis(analysis)
-
-    # Step 2: Search across multiple platforms
-    print("\nSearching across multiple platforms...")
-    all_results = []
-    search_count = 0
-
-    # Get search terms from analysis
-    reddit_queries = analysis.get('reddit_queries', analysis.get('search_terms', [prompt]))[:2]
-    github_queries = analysis.get('github_queries', [prompt])[:2]
-    kaggle_queries = analysis.get('kaggle_queries', [prompt])[:2]
-    medium_queries = analysis.get('medium_queries', [prompt])[:2]
-    quora_queries = analysis.get('quora_queries', [prompt])[:2]
-    academic_terms = analysis.get('academic_terms', [prompt])[:2]
-
-    # Search Reddit
-    if REDDIT_CLIENT_ID and REDDIT_CLIENT_SECRET:
-        print("Searching Reddit...")
-        for query in reddit_queries:
-            reddit_results = search_reddit_api(query, 4)
-            all_results.extend(reddit_results)
-            search_count += 1
-            time.sleep(1)
-    else:
-        print("Skipping Reddit (API credentials not configured)")
-
-    # Search GitHub
-    print("Searching GitHub...")
-    for query in github_queries:
-        github_results = search_github_api(query, 5)
-        all_results.extend(github_results)
-        search_count += 1
-        time.sleep(1)
-
-    # Search Kaggle
-    if KAGGLE_USERNAME and KAGGLE_KEY:
-        print("Searching Kaggle...")
-        for query in kaggle_queries:
-            kaggle_results = search_kaggle(query, 4)
-            all_results.extend(kaggle_results)
-            search_count += 1
-            time.sleep(1)
-    else:
-        print("Skipping Kaggle (API credentials not configured)")
-
-    # Search Medium
-    print("Searching Medium...")
-    for query in medium_queries:
-        medium_results = search_medium(query, 4)
-        all_results.extend(medium_results)
-        search_count += 1
-        time.sleep(1)
-
-    # Search Quora
-    print("Searching Quora...")
-    for query in quora_queries:
-        quora_results = search_quora(query, 4)
-        all_results.extend(quora_results)
-        search_count += 1
-        time.sleep(1)
-
-    # Search Semantic Scholar
-    if SEMANTIC_SCHOLAR_API_KEY:
-        print("Searching Semantic Scholar...")
-        for term in academic_terms:
-            scholar_results = search_semantic_scholar(term, 4)
-            all_results.extend(scholar_results)
-            search_count += 1
-            time.sleep(1)
-    else:
-        print("Skipping Semantic Scholar (API key not configured)")
-
-    # Search Google Scholar via SerpAPI
-    if SERPAPI_KEY:
-        print("Searching Google Scholar...")
-        for term in academic_terms:
-            gs_results = search_google_scholar_serpapi(term, 4)
-            all_results.extend(gs_results)
-            search_count += 1
-            time.sleep(1)
-    else:
-        print("Skipping Google Scholar (SerpAPI key not configured)")
-
-    print(f"Completed {search_count} API calls")
-
-    # Step 3: Remove duplicates and filter
-    seen_urls = set()
-    unique_results = []
-
-    for result in all_results:
-        url = result.get('url', '')
-        if url and url not in seen_urls and len(url) > 10:
-            seen_urls.add(url)
-            unique_results.append(result)
-
-    # Step 4: Sort results by relevance/quality
-    def sort_key(result):
-        source = result.get('source', '')
-        if source == 'GitHub':
-            return result.get('stars', 0)
-        elif source == 'Reddit':
-            return result.get('score', 0)
-        elif source == 'Kaggle':
-            return result.get('votes', 0)
-        elif source in ['Semantic Scholar', 'Google Scholar']:
-            return result.get('citations', 0)
-        return 0
-
-    unique_results.sort(key=sort_key, reverse=True)
-
-    # Step 5: Show results (limit to top 30)
-    final_results = unique_results[:30]
-    print_results(final_results)
+# Gemini, provider sessions and worker pools are set up once for the whole process
+engine = search_engine.get()
+model = engine.model
 
-    return final_results
+# Optional overall time budget for one search, e.g. SEARCH_DEADLINE_SECONDS=5
+SEARCH_DEADLINE_SECONDS = float(os.getenv('SEARCH_DEADLINE_SECONDS') or 0) or None
+# Providers that can be asked for "only what is new" during an incremental refresh
+DATE_FILTERED_PROVIDERS = providers.supporting('since')
+# Research workflow stages in order; each one's output is checkpointed under the run id
+WORKFLOW_STAGES = ('input', 'critique', 'resources', 'direction', 'paper')
+# Start resource collection while the critique is still running (SPECULATIVE_COLLECTION=0 to turn off)
+SPECULATIVE_COLLECTION = os.getenv('SPECULATIVE_COLLECTION', '1') != '0'
 
 def main():
     """Main CLI interface"""
     print("GEMINI LINK SEARCH - ENHANCED API VERSION")
     print("=" * 70)
     print("AI-powered link discovery across multiple premium platforms")
-    print("Sources: Reddit • GitHub • Kaggle • Semantic Scholar • Google Scholar • Medium • Quora")
+    print(f"Sources: {' • '.join(provider.name for provider in providers.registry())}")
     print("=" * 70)
 
     # Show API status
@@ -204,6 +65,8 @@ def main():
     print("   Be specific in your prompts for better results")
     print("   Academic topics work best for research papers")
     print("   Technical topics will show more GitHub repositories")
+    print("   Type 'metrics' to see request counts and latency histograms")
+    print("   Type 'find <words>' to search resources from past research collections")
     print("   Type 'quit', 'exit', or 'q' to stop\n")
 
     search_number = 1
@@ -218,6 +81,16 @@ def main():
                 print("\nThank you for using Gemini Link Search!")
                 break
 
+            # Dump collected metrics (same text as the server's /api/metrics)
+            if prompt.lower() == 'metrics':
+                print(metrics.render())
+                continue
+
+            # Look up past collections locally instead of searching live
+            if prompt.lower().startswith('find '):
+                resource_index.print_hits(resource_index.search(prompt[5:]))
+                continue
+
             # Check for empty input
             if not prompt:
                 print("Please enter a search prompt.")
@@ -227,7 +100,7 @@ def main():
             start_time = time.time()
 
             # Search for links
-            results = search_for_links(prompt)
+            results = search_for_links(prompt, SEARCH_DEADLINE_SECONDS)
 
             # Show summary
             end_time = time.time()
@@ -236,6 +109,9 @@ def main():
             print(f"\nSEARCH SUMMARY:")
             print(f"   Search completed in {duration:.1f} seconds")
             print(f"   Found {len(results)} unique links")
+            if not results.is_complete:
+                missing = [name for name, done in results.complete.items() if not done]
+                print(f"   Incomplete sources: {', '.join(missing)}")
             print(f"   Query: '{prompt}'")
 
             # Ask if user wants to continue
@@ -301,14 +177,14 @@ def collect_research_input():
         
         if os.path.exists(file_path):
             try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                input_files.append({
-                    'path': file_path,
-                    'name': os.path.basename(file_path),
-                    'content': content[:5000]  # Limit content length
-                })
-                print(f"✓ Added: {os.path.basename(file_path)}")
+                # Long files are summarized chunk by chunk into a digest that fits the critique prompt
+                file_info = ingest.digest_file(file_path, model)
+                input_files.append(file_info)
+                if file_info['summarized']:
+                    print(f"✓ Added: {file_info['name']} ({file_info['size']:,} bytes, "
+                          f"digest of {file_info['chunks']} chunks)")
+                else:
+                    print(f"✓ Added: {file_info['name']}")
             except Exception as e:
                 print(f"Error reading file {file_path}: {e}")
         else:
@@ -328,6 +204,7 @@ def collect_research_input():
     
     return research_data
 
+@tracing.traced('stage.critique')
 def critique_research_proposal(research_data, model):
     """
     Function 2: Use Gemini to brutally critique the research idea with expert scoring
@@ -402,8 +279,7 @@ def critique_research_proposal(research_data, model):
     
     try:
         print("Analyzing research proposal with expert critique...")
-        response = model.generate_content(critique_prompt)
-        response_text = response.text.strip()
+        response_text = generate_text(critique_prompt, 'critique', model).strip()
         
         # Clean JSON response
         if response_text.startswith('```json'):
@@ -412,6 +288,7 @@ def critique_research_proposal(research_data, model):
             response_text = response_text[3:-3]
         
         critique = json.loads(response_text)
+        _record('critique', storage.save_critique, research_data, critique)
         
         # Display critique results
         print(f"\n🔥 EXPERT CRITIQUE RESULTS 🔥")
@@ -443,73 +320,148 @@ def critique_research_proposal(research_data, model):
         print(f"Error during critique: {e}")
         return None
 
-def collect_research_resources(research_data, model):
+@tracing.traced('stage.collect_resources')
+def gather_research_resources(research_data, deadline=None):
+    """Search for everything related to the research and build the package, without saving it"""
+    print("\nCOLLECTING RESEARCH RESOURCES")
+    print("=" * 50)
+    
+    # Use existing search_for_links function to gather all resources
+    search_query = f"{research_data['topic']} {research_data['description'][:200]}"
+    print(f"Searching for resources related to: {search_query[:100]}...")
+    
+    # Gather all resources using existing function
+    resources = search_for_links(search_query, deadline or SEARCH_DEADLINE_SECONDS)
+    organized_resources = organize_resources(resources)
+    
+    # Create comprehensive research package
+    return {
+        'research_info': research_data,
+        'resources': organized_resources,
+        'collection_timestamp': datetime.now().isoformat(),
+        'total_resources': len(resources),
+        'source_completeness': resources.complete,
+        'resource_counts': {key: len(value) for key, value in organized_resources.items()}
+    }
+
+def store_research_package(research_package):
+    """Save a freshly gathered package and report what it holds"""
+    filename = save_research_package(research_package)
+    
+    print(f"\n✅ RESOURCES COLLECTED AND SAVED")
+    print(f"Saved to: {filename}")
+    print(f"Total resources: {research_package['total_resources']}")
+    for category, count in research_package['resource_counts'].items():
+        if count > 0:
+            print(f"  {category.replace('_', ' ').title()}: {count}")
+    return research_package
+
+def collect_research_resources(research_data, model, deadline=None):
     """
     Function 3: Run all existing functions to gather resources and store in JSON
     """
-    print("\nCOLLECTING RESEARCH RESOURCES")
+    try:
+        return store_research_package(gather_research_resources(research_data, deadline))
+    except Exception as e:
+        print(f"Error collecting resources: {e}")
+        return None
+
+def organize_resources(resources):
+    """Group search results into the package categories by source"""
+    organized_resources = {
+        'papers': [],
+        'datasets': [],
+        'code_repos': [],
+        'discussions': [],
+        'articles': [],
+        'other': []
+    }
+    
+    for resource in resources:
+        organized_resources[providers.category(resource)].append(resource)
+    return organized_resources
+
+def open_output_file(prefix, extension):
+    """
+    Create prefix_YYYYMMDD_HHMMSS.extension for writing; runs finishing in
+    the same second (batch mode) get _2, _3... instead of overwriting
+    """
+    stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    suffix = 1
+    while True:
+        filename = f"{prefix}_{stamp}{f'_{suffix}' if suffix > 1 else ''}.{extension}"
+        try:
+            return filename, open(filename, 'x', encoding='utf-8')
+        except FileExistsError:
+            suffix += 1
+
+def _record(what, save, *args, **kwargs):
+    """Write to the research store; while files are still written a failure only warns"""
+    try:
+        return save(*args, **kwargs)
+    except Exception as e:
+        if not storage.SAVE_FILES:
+            raise
+        print(f"Could not store {what} in {storage.RESEARCH_DB}: {e}")
+        return None
+
+def save_research_package(research_package, kind='collect'):
+    """
+    Record a package in the research store and, unless SAVE_FILES=0, in a
+    new research_resources_*.json (added to the local index); returns
+    where it was saved
+    """
+    saved_to = []
+    if storage.SAVE_FILES:
+        filename, f = open_output_file('research_resources', 'json')
+        with f:
+            json.dump(research_package, f, indent=2, ensure_ascii=False)
+        try:
+            resource_index.add_file(filename)
+        except Exception as e:
+            print(f"Could not index {filename}: {e}")
+        saved_to.append(filename)
+    run_id = _record('resource package', storage.save_package, research_package, kind)
+    if run_id is not None:
+        saved_to.append(f"{storage.RESEARCH_DB} run #{run_id}")
+    return ', '.join(saved_to)
+
+@tracing.traced('stage.refresh_resources')
+def refresh_research_resources(topic, model):
+    """
+    Incremental version of collect_research_resources: fetch only what is
+    new since the newest saved package for topic and merge it in
+    """
+    print("\nREFRESHING RESEARCH RESOURCES")
     print("=" * 50)
     
     try:
-        # Use existing search_for_links function to gather all resources
-        search_query = f"{research_data['topic']} {research_data['description'][:200]}"
-        print(f"Searching for resources related to: {search_query[:100]}...")
-        
-        # Gather all resources using existing function
-        resources = search_for_links(search_query)
-        
-        # Organize resources by source
-        organized_resources = {
-            'papers': [],
-            'datasets': [],
-            'code_repos': [],
-            'discussions': [],
-            'articles': [],
-            'other': []
-        }
+        path, research_package = incremental.latest_package(topic)
+        if not research_package:
+            print(f"No saved resources for '{topic}'. Run the research workflow first.")
+            return None
         
-        for resource in resources:
-            source = resource.get('source', '').lower()
-            if source in ['semantic scholar', 'google scholar']:
-                organized_resources['papers'].append(resource)
-            elif source == 'kaggle':
-                organized_resources['datasets'].append(resource)
-            elif source == 'github':
-                organized_resources['code_repos'].append(resource)
-            elif source == 'reddit':
-                organized_resources['discussions'].append(resource)
-            elif source in ['medium', 'quora']:
-                organized_resources['articles'].append(resource)
-            else:
-                organized_resources['other'].append(resource)
-        
-        # Create comprehensive research package
-        research_package = {
-            'research_info': research_data,
-            'resources': organized_resources,
-            'collection_timestamp': datetime.now().isoformat(),
-            'total_resources': len(resources),
-            'resource_counts': {key: len(value) for key, value in organized_resources.items()}
-        }
+        started_at = datetime.now().isoformat()
+        research_data = research_package['research_info']
+        since = {name: incremental.source_since(research_package, name) for name in DATE_FILTERED_PROVIDERS}
+        print(f"Updating {path} (collected {research_package.get('collection_timestamp', '?')[:16]})")
         
-        # Save to JSON file
-        filename = f"research_resources_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(research_package, f, indent=2, ensure_ascii=False)
+        search_query = f"{research_data['topic']} {research_data['description'][:200]}"
+        resources = search_for_links(search_query, SEARCH_DEADLINE_SECONDS, since=since)
+        added = incremental.merge_delta(research_package, organize_resources(resources), resources.complete, started_at)
+        filename = save_research_package(research_package, 'refresh')
         
-        print(f"\n✅ RESOURCES COLLECTED AND SAVED")
-        print(f"File: {filename}")
-        print(f"Total resources: {len(resources)}")
-        for category, count in research_package['resource_counts'].items():
-            if count > 0:
-                print(f"  {category.replace('_', ' ').title()}: {count}")
+        print(f"\n✅ RESOURCES REFRESHED")
+        print(f"Saved to: {filename}")
+        print(f"New resources: {added} (total {research_package['total_resources']})")
         
         return research_package
         
     except Exception as e:
-        print(f"Error collecting resources: {e}")
+        print(f"Error refreshing resources: {e}")
         return None
 
+@tracing.traced('stage.direction')
 def analyze_research_direction(research_package, model):
     """
     Function 4: Use Gemini to analyze collected data and provide focused research direction
@@ -565,8 +517,7 @@ def analyze_research_direction(research_package, model):
     
     try:
         print("Analyzing research direction with expert guidance...")
-        response = model.generate_content(direction_prompt)
-        response_text = response.text.strip()
+        response_text = generate_text(direction_prompt, 'direction', model).strip()
         
         # Clean JSON response
         if response_text.startswith('```json'):
@@ -609,6 +560,7 @@ def analyze_research_direction(research_package, model):
         print(f"Error analyzing research direction: {e}")
         return None
 
+@tracing.traced('stage.paper_template')
 def generate_research_paper_template(research_package, direction_analysis, model):
     """
     Function 5: Generate a paper template and draft based on research direction
@@ -672,8 +624,7 @@ def generate_research_paper_template(research_package, direction_analysis, model
     
     try:
         print("Generating research paper template and draft...")
-        response = model.generate_content(template_prompt)
-        response_text = response.text.strip()
+        response_text = generate_text(template_prompt, 'paper_template', model).strip()
         
         # Clean JSON response
         if response_text.startswith('```json'):
@@ -709,21 +660,28 @@ def generate_research_paper_template(research_package, direction_analysis, model
             for item in paper_template['figures_tables']:
                 paper_content += f"- {item}\n"
         
-        # Save paper template
-        paper_filename = f"research_paper_draft_{datetime.now().strftime('%Y%m%d_%H%M%S')}.md"
-        with open(paper_filename, 'w', encoding='utf-8') as f:
-            f.write(paper_content)
-        
-        # Save template JSON
-        template_filename = f"paper_template_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-        with open(template_filename, 'w', encoding='utf-8') as f:
-            json.dump(paper_template, f, indent=2, ensure_ascii=False)
+        paper_filename = template_filename = None
+        if storage.SAVE_FILES:
+            # Save paper template
+            paper_filename, f = open_output_file('research_paper_draft', 'md')
+            with f:
+                f.write(paper_content)
+            
+            # Save template JSON
+            template_filename, f = open_output_file('paper_template', 'json')
+            with f:
+                json.dump(paper_template, f, indent=2, ensure_ascii=False)
+        draft_id = _record('paper draft', storage.save_draft, research_package['research_info']['topic'],
+                           paper_template, paper_content, direction_analysis)
         
         print(f"\n📝 RESEARCH PAPER GENERATED")
         print(f"\n📄 TITLE: {paper_template['title']}")
-        print(f"\n📁 FILES CREATED:")
-        print(f"  • Paper Draft: {paper_filename}")
-        print(f"  • Template JSON: {template_filename}")
+        print(f"\n📁 SAVED TO:")
+        if paper_filename:
+            print(f"  • Paper Draft: {paper_filename}")
+            print(f"  • Template JSON: {template_filename}")
+        if draft_id is not None:
+            print(f"  • {storage.RESEARCH_DB}: draft #{draft_id} (python storage.py export to write files)")
         
         print(f"\n📋 PAPER STRUCTURE:")
         for section_key, section_data in paper_template['sections'].items():
@@ -736,53 +694,230 @@ def generate_research_paper_template(research_package, direction_analysis, model
         return {
             'template': paper_template,
             'paper_file': paper_filename,
-            'template_file': template_filename
+            'template_file': template_filename,
+            'draft_id': draft_id
         }
         
     except Exception as e:
         print(f"Error generating paper template: {e}")
         return None
 
-def research_assistant_workflow():
+def _checkpointed(run_id, state, stage, produce):
+    """Output of stage from the run's checkpoints, else produce() (checkpointed when it succeeds)"""
+    if state.get(stage) is not None:
+        print(f"\n✓ {stage.title()} stage loaded from checkpoint")
+        return state[stage]
+    value = produce()
+    if value:
+        checkpoint.save(run_id, stage, value)
+        state[stage] = value
+    else:
+        print(f"\nWorkflow stopped at the {stage} stage. Resume it with mode 4, run id {run_id}")
+    return value
+
+_output_target = contextvars.ContextVar('output_target', default=None)
+# sys.stdout is routed only while a speculative stage is running
+_routing_lock = threading.Lock()
+_routing_users = 0
+
+class _RoutedStdout:
+    """sys.stdout stand-in: prints go to the calling context's target, if it has one"""
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, text):
+        return (_output_target.get() or self.stream).write(text)
+
+    def flush(self):
+        (_output_target.get() or self.stream).flush()
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+class _HeldOutput:
+    """Keeps writes back until release() shows them (and everything after), or discard() drops them"""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.parts = []
+        self.state = 'held'
+        self.lock = threading.Lock()
+
+    def write(self, text):
+        with self.lock:
+            if self.state == 'held':
+                self.parts.append(text)
+                return len(text)
+            if self.state == 'discarded':
+                return len(text)
+        return self.stream.write(text)
+
+    def flush(self):
+        if self.state == 'released':
+            self.stream.flush()
+
+    def release(self):
+        with self.lock:
+            self.stream.write(''.join(self.parts))
+            self.parts, self.state = [], 'released'
+
+    def discard(self):
+        with self.lock:
+            self.parts, self.state = [], 'discarded'
+
+def _route_stdout():
+    """Install the routing sys.stdout (nested calls share it); returns the real stream"""
+    global _routing_users
+    with _routing_lock:
+        if _routing_users == 0:
+            sys.stdout = _RoutedStdout(sys.stdout)
+        _routing_users += 1
+        return sys.stdout.stream
+
+def _unroute_stdout():
+    """Put the real sys.stdout back once the last speculative stage is done"""
+    global _routing_users
+    with _routing_lock:
+        _routing_users -= 1
+        if _routing_users == 0 and isinstance(sys.stdout, _RoutedStdout):
+            sys.stdout = sys.stdout.stream
+
+class SpeculativeStage:
+    """
+    Run fn(deadline) in the background before it is known whether its
+    result will be wanted.  Its output is held back until adopt(), which
+    shows it and waits for the result; cancel() expires its deadline,
+    which stops the remaining upstream calls, and drops the output.
+    sys.stdout is routed only until the stage has finished either way.
+    """
+
+    def __init__(self, fn, seconds=None):
+        self.deadline = Deadline(seconds)
+        self.output = _HeldOutput(_route_stdout())
+        self._done = threading.Lock()
+        self._finished = False
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='speculative')
+        self._future = self._executor.submit(contextvars.copy_context().run, self._run, fn)
+        self._executor.shutdown(wait=False)
+
+    def _run(self, fn):
+        _output_target.set(self.output)
+        return fn(self.deadline)
+
+    def _finish(self, *_):
+        with self._done:
+            if self._finished:
+                return
+            self._finished = True
+        _unroute_stdout()
+
+    def adopt(self):
+        self.output.release()
+        try:
+            return self._future.result()
+        finally:
+            self._finish()
+
+    def cancel(self):
+        self.deadline.cancel()
+        self.output.discard()
+        # The background work may still print until its calls wind down
+        self._future.add_done_callback(self._finish)
+
+def choose_workflow_run():
+    """Ask which checkpointed run to resume (Enter = newest unfinished one)"""
+    unfinished = checkpoint.runs(unfinished=WORKFLOW_STAGES)
+    if not unfinished:
+        print(f"No unfinished workflow runs in {checkpoint.WORKFLOW_DIR}.")
+        return None
+    print("\nUNFINISHED RUNS:")
+    for run in unfinished:
+        done = [stage for stage in WORKFLOW_STAGES if stage in run['stages']]
+        print(f"  {run['id']}  {run['topic'][:50]}  (done: {', '.join(done) or 'nothing'}, {run['updated']})")
+    run_id = input(f"\nRun id to resume (Enter for {unfinished[0]['id']}): ").strip()
+    return run_id or unfinished[0]['id']
+
+@tracing.traced('workflow')
+def research_assistant_workflow(run_id=None):
     """
     Main workflow function that orchestrates all research assistant functions
+
+    Every stage's output is checkpointed under a run id; passing run_id
+    resumes that run at its first stage without a checkpoint.
     """
     print("\n🔬 AI RESEARCH ASSISTANT WORKFLOW")
     print("=" * 70)
     print("Complete research workflow: Input → Critique → Resources → Direction → Paper")
     print("=" * 70)
     
+    speculative = None
     try:
+        state = {}
+        if run_id:
+            state = checkpoint.load(run_id)
+            if not state.get('input'):
+                print(f"No checkpointed input for run {run_id}.")
+                return
+            remaining = [stage for stage in WORKFLOW_STAGES if stage not in state]
+            print(f"Resuming run {run_id} ({state['input']['topic']}) at: {remaining[0] if remaining else 'done'}")
+        
         # Step 1: Collect research input
-        research_data = collect_research_input()
+        research_data = state.get('input')
         if not research_data:
-            return
-        
-        # Step 2: Critique the research proposal
-        critique = critique_research_proposal(research_data, model)
+            research_data = collect_research_input()
+            if not research_data:
+                return
+            run_id = checkpoint.new_run(research_data['topic'])
+            checkpoint.save(run_id, 'input', research_data)
+            print(f"Run id: {run_id}")
+        
+        # Step 2: Critique the research proposal, with resource collection
+        # (which needs only the input) already running in the background
+        if SPECULATIVE_COLLECTION and 'critique' not in state and 'resources' not in state:
+            print("\nStarting resource collection in the background while the critique runs...")
+            speculative = SpeculativeStage(
+                lambda deadline: gather_research_resources(research_data, deadline), SEARCH_DEADLINE_SECONDS)
+        
+        critique = _checkpointed(run_id, state, 'critique', lambda: critique_research_proposal(research_data, model))
         if not critique:
+            if speculative:
+                speculative.cancel()
             return
         
-        # Check if critique is too negative to continue
-        if critique['overall_score'] < 25:  # Less than 25/60
-            print(f"\n⚠️ WARNING: Research proposal received low score ({critique['overall_score']}/60)")
-            continue_choice = input("Continue with resource collection anyway? (y/n): ").strip().lower()
-            if continue_choice != 'y':
-                print("Research workflow stopped. Please revise your proposal and try again.")
-                return
-        
         # Step 3: Collect research resources
-        research_package = collect_research_resources(research_data, model)
+        def collect():
+            # Check if critique is too negative to continue
+            if critique['overall_score'] < 25:  # Less than 25/60
+                print(f"\n⚠️ WARNING: Research proposal received low score ({critique['overall_score']}/60)")
+                continue_choice = input("Continue with resource collection anyway? (y/n): ").strip().lower()
+                if continue_choice != 'y':
+                    if speculative:
+                        speculative.cancel()
+                        print("Background resource collection discarded.")
+                    print("Research workflow stopped. Please revise your proposal and try again.")
+                    return None
+            if speculative:
+                try:
+                    return store_research_package(speculative.adopt())
+                except Exception as e:
+                    print(f"Error collecting resources: {e}")
+                    return None
+            return collect_research_resources(research_data, model)
+        
+        research_package = _checkpointed(run_id, state, 'resources', collect)
         if not research_package:
             return
         
         # Step 4: Analyze research direction
-        direction_analysis = analyze_research_direction(research_package, model)
+        direction_analysis = _checkpointed(
+            run_id, state, 'direction', lambda: analyze_research_direction(research_package, model))
         if not direction_analysis:
             return
         
         # Step 5: Generate paper template
-        paper_result = generate_research_paper_template(research_package, direction_analysis, model)
+        paper_result = _checkpointed(
+            run_id, state, 'paper', lambda: generate_research_paper_template(research_package, direction_analysis, model))
         if not paper_result:
             return
         
@@ -793,22 +928,44 @@ def research_assistant_workflow():
         print(f"Research Topic: {research_data['topic']}")
         print(f"Critique Score: {critique['overall_score']}/60 ({critique['grade']})")
         print(f"Resources Collected: {research_package['total_resources']}")
-        print(f"Paper Draft: {paper_result['paper_file']}")
-        print("\nAll files have been saved to your current directory.")
+        paper_location = paper_result['paper_file'] or f"draft #{paper_result['draft_id']} in {storage.RESEARCH_DB}"
+        print(f"Paper Draft: {paper_location}")
+        print(f"Checkpoints: {os.path.join(checkpoint.WORKFLOW_DIR, run_id)}")
+        print("\nAll results have been saved (files in your current directory, history in the research database).")
         print("You can now proceed with your research based on the expert guidance provided!")
+
+        if tracing.ENABLED:
+            print("\nCRITICAL PATH:")
+            # The workflow span is still open here, so name it as the root
+            for span in tracing.critical_path(tracing.current().id):
+                print(f"  {span.name:<28} {span.duration:7.2f}s")
         
     except Exception as e:
         print(f"Error in research workflow: {e}")
+        if speculative:
+            speculative.cancel()
+        if run_id:
+            print(f"Completed stages are checkpointed; resume with mode 4, run id {run_id}")
 
 if __name__ == "__main__":
+    engine.warm_up(background=True)
+
     # Check if user wants research workflow or regular link search
     print("\nSELECT MODE:")
     print("1. 🔬 Research Assistant Workflow (New!)")
     print("2. 🔍 Regular Link Search")
+    print("3. 🔄 Refresh Resources for a Previous Topic")
+    print("4. ⏯️ Resume an Unfinished Research Workflow")
     
-    choice = input("\nEnter choice (1 or 2): ").strip()
+    choice = input("\nEnter choice (1, 2, 3 or 4): ").strip()
     
     if choice == '1':
         research_assistant_workflow()
+    elif choice == '4':
+        run_id = choose_workflow_run()
+        if run_id:
+            research_assistant_workflow(run_id)
+    elif choice == '3':
+        refresh_research_resources(input("Research topic to refresh: ").strip(), model)
     else:
         main()
\ No newline at end of file
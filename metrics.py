@@ -0,0 +1,127 @@
+"""
+In-process metrics with Prometheus text exposition.
+
+Counters and histograms are keyed by metric name plus a sorted tuple of
+label pairs.  server.py serves render() at /api/metrics; the CLI prints
+the same text with the 'metrics' command.
+"""
+import bisect
+import threading
+
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 15.0, 30.0, 60.0)
+
+_lock = threading.Lock()
+_help = {}
+_counters = {}
+_histograms = {}
+
+
+def _key(name, labels):
+    return name, tuple(sorted((labels or {}).items()))
+
+
+def describe(name, text):
+    _help[name] = text
+
+
+def inc(name, value=1, **labels):
+    """Add value to a counter"""
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def observe(name, value, buckets=DEFAULT_BUCKETS, **labels):
+    """Record one observation (usually seconds) in a histogram"""
+    key = _key(name, labels)
+    with _lock:
+        hist = _histograms.get(key)
+        if hist is None:
+            hist = _histograms[key] = {'buckets': buckets, 'counts': [0] * len(buckets), 'sum': 0.0, 'count': 0}
+        index = bisect.bisect_left(hist['buckets'], value)
+        if index < len(hist['counts']):
+            hist['counts'][index] += 1
+        hist['sum'] += value
+        hist['count'] += 1
+
+
+def record_cache(cache, hit):
+    inc('cache_requests_total', cache=cache, result='hit' if hit else 'miss')
+
+
+def cache_hit_ratios():
+    """{cache name: hit ratio} derived from cache_requests_total"""
+    totals = {}
+    with _lock:
+        for (name, labels), value in _counters.items():
+            if name != 'cache_requests_total':
+                continue
+            labels = dict(labels)
+            hits, total = totals.get(labels['cache'], (0, 0))
+            totals[labels['cache']] = (hits + (value if labels['result'] == 'hit' else 0), total + value)
+    return {cache: hits / total for cache, (hits, total) in totals.items() if total}
+
+
+def _format_labels(labels, extra=None):
+    pairs = list(labels) + list(extra or [])
+    if not pairs:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in pairs)
+    return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + '}'
+
+
+def render():
+    """All metrics in Prometheus text format (version 0.0.4)"""
+    lines = []
+    with _lock:
+        counters = sorted(_counters.items())
+        histograms = sorted((key, dict(h, counts=list(h['counts']))) for key, h in _histograms.items())
+
+    seen = set()
+    for (name, labels), value in counters:
+        if name not in seen:
+            seen.add(name)
+            if name in _help:
+                lines.append(f'# HELP {name} {_help[name]}')
+            lines.append(f'# TYPE {name} counter')
+        lines.append(f'{name}{_format_labels(labels)} {value}')
+
+    for (name, labels), hist in histograms:
+        if name not in seen:
+            seen.add(name)
+            if name in _help:
+                lines.append(f'# HELP {name} {_help[name]}')
+            lines.append(f'# TYPE {name} histogram')
+        cumulative = 0
+        for bound, count in zip(hist['buckets'], hist['counts']):
+            cumulative += count
+            lines.append(f'{name}_bucket{_format_labels(labels, [("le", bound)])} {cumulative}')
+        lines.append(f'{name}_bucket{_format_labels(labels, [("le", "+Inf")])} {hist["count"]}')
+        lines.append(f'{name}_sum{_format_labels(labels)} {hist["sum"]:.6f}')
+        lines.append(f'{name}_count{_format_labels(labels)} {hist["count"]}')
+
+    ratios = cache_hit_ratios()
+    if ratios:
+        lines.append('# TYPE cache_hit_ratio gauge')
+        for cache, ratio in sorted(ratios.items()):
+            lines.append(f'cache_hit_ratio{_format_labels([("cache", cache)])} {ratio:.4f}')
+    return '\n'.join(lines) + '\n'
+
+
+def reset():
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+
+
+describe('provider_requests_total', 'Upstream provider calls by outcome')
+describe('provider_request_seconds', 'Upstream provider call latency')
+describe('gemini_requests_total', 'Gemini calls by stage and outcome')
+describe('gemini_request_seconds', 'Gemini call latency per stage')
+describe('gemini_tokens_total', 'Gemini tokens per stage (estimated when the API reports no usage)')
+describe('rate_limiter_wait_seconds', 'Time spent waiting for a provider rate limiter slot')
+describe('search_seconds', 'End-to-end search_for_links latency')
+describe('cache_requests_total', 'Cache lookups by cache and result')
+describe('http_not_modified_total', 'Conditional GETs answered 304 and served from the stored response')
+describe('http_requests_total', 'API requests served by endpoint and status')
+describe('http_request_seconds', 'API request latency per endpoint')
@@ -0,0 +1,163 @@
+"""
+OpenAlex works harvester.
+
+    python openalex.py "graph neural networks drug discovery" --limit 2000 > works.jsonl
+    python openalex.py "federated learning" --since 2024-01-01 --limit 500 --abstracts
+
+harvest() walks OpenAlex's cursor pagination (200 works per page, no
+10,000-result ceiling) and yields one parsed work at a time, so memory
+stays flat however many pages are read.  Only the fields the pipeline
+uses are requested (select=), which also drops the large
+abstract_inverted_index unless abstracts are wanted.  Setting
+OPENALEX_MAILTO puts requests in OpenAlex's faster "polite pool".
+
+search_openalex() is the provider used by search_for_links; the
+records have the same shape as the other paper providers so they go
+through the usual dedup and ranking.
+"""
+import argparse
+import itertools
+import json
+import os
+import sys
+
+import deadline
+import http_client
+import ratelimit
+import resilience
+from incremental import parse_since
+
+WORKS_URL = 'https://api.openalex.org/works'
+OPENALEX_MAILTO = os.getenv('OPENALEX_MAILTO')
+MAX_PER_PAGE = 200
+
+FIELDS = ['id', 'doi', 'display_name', 'publication_year', 'publication_date', 'cited_by_count',
+          'primary_location', 'authorships']
+
+
+def rebuild_abstract(inverted_index):
+    """Abstract text from OpenAlex's {word: [positions]} form in one pass over the positions"""
+    if not inverted_index:
+        return ''
+    size = 1 + max((p for positions in inverted_index.values() for p in positions), default=-1)
+    words = [''] * size
+    for word, positions in inverted_index.items():
+        for position in positions:
+            words[position] = word
+    return ' '.join(word for word in words if word)
+
+
+def parse_work(work):
+    """OpenAlex work -> resource record (title/url/description/authors/year/citations/venue)"""
+    location = work.get('primary_location') or {}
+    authorships = work.get('authorships') or []
+    authors = [(a.get('author') or {}).get('display_name', '') for a in authorships[:3]]
+    if len(authorships) > 3:
+        authors.append('et al.')
+    abstract = rebuild_abstract(work.get('abstract_inverted_index'))
+    record = {
+        'title': work.get('display_name') or '',
+        'url': location.get('landing_page_url') or work.get('doi') or work.get('id', ''),
+        'description': abstract[:200] + '...' if abstract else 'No abstract available',
+        'authors': ', '.join(authors),
+        'year': work.get('publication_year') or 'Unknown',
+        'published': work.get('publication_date', ''),
+        'citations': work.get('cited_by_count', 0),
+        'venue': (location.get('source') or {}).get('display_name') or '',
+        'openalex_id': work.get('id', ''),
+        'source': 'OpenAlex'
+    }
+    if abstract:
+        record['abstract'] = abstract
+    return record
+
+
+def harvest(query=None, limit=None, since=None, filters=None, sort=None, abstracts=False, per_page=MAX_PER_PAGE):
+    """
+    Yield parsed works matching query, page by page via cursor pagination.
+
+    since (datetime) keeps works published on or after that date; filters
+    is a dict of extra OpenAlex filters, e.g. {'type': 'article'}.  Stops
+    after limit works, when the results run out, or when the active
+    deadline has passed.  Pages after the first are paced by the OpenAlex
+    rate limiter; the caller paces the first one.
+    """
+    select = FIELDS + (['abstract_inverted_index'] if abstracts else [])
+    params = {
+        'select': ','.join(select),
+        'per_page': min(per_page, limit or MAX_PER_PAGE, MAX_PER_PAGE),
+        'cursor': '*',
+    }
+    if query:
+        params['search'] = query
+    conditions = dict(filters or {})
+    if since:
+        conditions['from_publication_date'] = f"{since:%Y-%m-%d}"
+    if conditions:
+        params['filter'] = ','.join(f"{key}:{value}" for key, value in conditions.items())
+    if sort:
+        params['sort'] = sort
+    headers = {'User-Agent': 'LinkSearchBot/1.0'}
+    if OPENALEX_MAILTO:
+        params['mailto'] = OPENALEX_MAILTO
+        headers['User-Agent'] = f"LinkSearchBot/1.0 (mailto:{OPENALEX_MAILTO})"
+
+    yielded = 0
+    for page in itertools.count():
+        active = deadline.current()
+        if active is not None and active.expired():
+            return
+        if page:
+            ratelimit.acquire('OpenAlex')
+        response = http_client.get('OpenAlex', WORKS_URL, params=params, headers=headers, timeout=30)
+        response.raise_for_status()
+        data = response.json()
+        works = data.get('results') or []
+        for work in works:
+            yield parse_work(work)
+            yielded += 1
+            if limit and yielded >= limit:
+                return
+        params['cursor'] = (data.get('meta') or {}).get('next_cursor')
+        if not works or not params['cursor']:
+            return
+
+
+def search_openalex(query, limit=5, since=None, sort=None, abstracts=True):
+    """
+    Search OpenAlex works (since: published on or after it).  sort is an
+    OpenAlex sort such as 'relevance_score:desc'; abstracts=False skips
+    fetching abstracts, for bulk lookups that only need the metadata.
+    """
+    try:
+        results = []
+        for work in harvest(query, limit, since=since, sort=sort, abstracts=abstracts):
+            work.pop('abstract', None)
+            results.append(work)
+        return results
+    except Exception as e:
+        print(f"OpenAlex search error: {e}")
+        resilience.report_failure('OpenAlex', e)
+        return []
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream OpenAlex works for a query as JSON lines")
+    parser.add_argument('query')
+    parser.add_argument('--limit', type=int, default=1000, help="stop after this many works (0 = all)")
+    parser.add_argument('--since', help="only works published on or after this date (YYYY-MM-DD)")
+    parser.add_argument('--filter', action='append', default=[], help="extra OpenAlex filter key:value")
+    parser.add_argument('--sort', help="e.g. cited_by_count:desc")
+    parser.add_argument('--abstracts', action='store_true', help="also fetch and rebuild full abstracts")
+    args = parser.parse_args()
+
+    filters = dict(item.split(':', 1) for item in args.filter)
+    count = 0
+    for work in harvest(args.query, args.limit or None, parse_since(args.since), filters, args.sort, args.abstracts):
+        sys.stdout.write(json.dumps(work, ensure_ascii=False) + '\n')
+        count += 1
+    print(f"{count} works", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
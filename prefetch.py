@@ -0,0 +1,148 @@
+"""
+Speculative prefetch of API stages.
+
+When /api/critique arrives, the stages the frontend asks for next
+(literature, community, directions, draft) are started in the
+background; the follow-up request for the same idea then takes the
+prefetched result, waiting for it if it is still running, instead of
+doing the work again.
+
+Work is bounded: PREFETCH_WORKERS threads, and no more than
+PREFETCH_MAX_PENDING jobs queued or running; a prefetch that would go
+over is skipped.  Every job runs under its own Deadline, so cancel(),
+a TTL expiry (PREFETCH_TTL_SECONDS) or eviction stops its remaining
+upstream calls.  Outcomes are counted in prefetch_total{outcome} (hit,
+wasted, skipped, started) and in the "prefetch" cache hit ratio; every
+started prefetch ends up either a hit or wasted, including one still
+queued when its request arrives.
+"""
+import contextvars
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+import deadline
+import metrics
+
+PREFETCH_WORKERS = int(os.environ.get('PREFETCH_WORKERS', '4'))
+PREFETCH_MAX_PENDING = int(os.environ.get('PREFETCH_MAX_PENDING', '16'))
+PREFETCH_TTL_SECONDS = float(os.environ.get('PREFETCH_TTL_SECONDS', '300'))
+# Finished results kept at most; the oldest are dropped (and counted as wasted) first
+PREFETCH_MAX_ENTRIES = int(os.environ.get('PREFETCH_MAX_ENTRIES', '256'))
+
+OUTCOMES = ('started', 'hit', 'wasted', 'skipped')
+
+metrics.describe('prefetch_total', 'Speculative stage prefetches by outcome')
+
+
+def idea_key(idea):
+    return ' '.join(str(idea).lower().split())
+
+
+class Prefetcher:
+    def __init__(self, workers=PREFETCH_WORKERS, max_pending=PREFETCH_MAX_PENDING,
+                 ttl=PREFETCH_TTL_SECONDS, max_entries=PREFETCH_MAX_ENTRIES):
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='prefetch')
+        self.max_pending = max_pending
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries = OrderedDict()     # (stage, key) -> {'future', 'deadline', 'expires'}
+        self.counts = dict.fromkeys(OUTCOMES, 0)
+        self.lock = threading.Lock()
+
+    def _count(self, outcome, stage):
+        self.counts[outcome] += 1
+        metrics.inc('prefetch_total', outcome=outcome, stage=stage)
+
+    def _drop(self, entry_key):
+        entry = self.entries.pop(entry_key)
+        entry['deadline'].cancel()
+        entry['future'].cancel()
+        self._count('wasted', entry_key[0])
+
+    def _sweep(self):
+        now = time.monotonic()
+        for entry_key in [k for k, entry in self.entries.items() if entry['expires'] <= now]:
+            self._drop(entry_key)
+        while len(self.entries) > self.max_entries:
+            self._drop(next(iter(self.entries)))
+
+    def _pending(self):
+        return sum(1 for entry in self.entries.values() if not entry['future'].done())
+
+    def start(self, key, stages, seconds=None):
+        """Run {stage: fn(deadline)} in the background for key, skipping stages already prefetched"""
+        with self.lock:
+            self._sweep()
+            for stage, fn in stages.items():
+                if (stage, key) in self.entries:
+                    continue
+                if self._pending() >= self.max_pending:
+                    self._count('skipped', stage)
+                    continue
+                budget = deadline.Deadline(seconds)
+                future = self.pool.submit(contextvars.copy_context().run, self._run, fn, budget)
+                self.entries[(stage, key)] = {
+                    'future': future,
+                    'deadline': budget,
+                    'expires': time.monotonic() + self.ttl,
+                }
+                self._count('started', stage)
+
+    @staticmethod
+    def _run(fn, budget):
+        with deadline.activate(budget):
+            return fn(budget)
+
+    def take(self, stage, key, timeout=None):
+        """
+        (True, result) when stage was prefetched for key, waiting up to
+        timeout seconds if it is still running; (False, None) otherwise,
+        in which case the caller does the work itself
+        """
+        with self.lock:
+            self._sweep()
+            entry = self.entries.pop((stage, key), None)
+        if entry is None or entry['future'].cancel():
+            # Never prefetched, or still queued: cheaper to run it in the request
+            if entry is not None:
+                with self.lock:
+                    self._count('wasted', stage)
+            metrics.record_cache('prefetch', False)
+            return False, None
+        try:
+            value = entry['future'].result(timeout)
+        except TimeoutError:
+            entry['deadline'].cancel()
+            value = None
+        except Exception:
+            value = None
+        with self.lock:
+            self._count('hit' if value is not None else 'wasted', stage)
+        metrics.record_cache('prefetch', value is not None)
+        return value is not None, value
+
+    def cancel(self, key):
+        """Stop and forget every prefetch for key; returns how many there were"""
+        with self.lock:
+            dropped = [entry_key for entry_key in self.entries if entry_key[1] == key]
+            for entry_key in dropped:
+                self._drop(entry_key)
+        return len(dropped)
+
+    def stats(self):
+        with self.lock:
+            self._sweep()
+            counts = dict(self.counts)
+            pending = self._pending()
+            cached = len(self.entries)
+        settled = counts['hit'] + counts['wasted']
+        return {
+            **counts,
+            'pending': pending,
+            'cached': cached,
+            'hit_ratio': round(counts['hit'] / settled, 4) if settled else None,
+            'waste_ratio': round(counts['wasted'] / settled, 4) if settled else None,
+        }
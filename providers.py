@@ -0,0 +1,302 @@
+"""
+Search provider registry.
+
+Every search source is registered once, with its search callable and
+what the engine needs to know to schedule it:
+
+    register('OpenAlex', search_openalex, kind='paper', queries=('academic_terms',),
+             filters={'since'}, popularity='citations', interval=0.1)
+
+    kind         what the results are, which decides their package category:
+                 paper, code, dataset, discussion or article (see CATEGORIES)
+    queries      analysis fields its queries come from; the first one present wins
+    limit        results asked for per query
+    filters      keyword filters the callable accepts ('since', OpenAlex's 'sort')
+    popularity   result field used as the popularity signal in ranking
+    requires     environment variables that must be set for it to be used
+    concurrency  calls in flight at once, across all threads and requests
+    interval     minimum seconds between call starts (its rate quota)
+    cost         relative price of one call; the query budget divides a
+                 provider's expected yield by it
+    batch        callable taking all of a search's queries in one call,
+                 used while batch_requires is set (GitHub GraphQL)
+
+call() runs one query the same way for every source: a concurrency slot
+(waiting no longer than the active deadline), the rate limiter, a
+tracing span, and a result cache of PROVIDER_CACHE_SIZE entries kept
+PROVIDER_CACHE_SECONDS.  A search that failed (the provider reported it
+through resilience.report_failure) raises ProviderError instead of
+passing off its empty list as "nothing found", and is never cached.
+search_for_links (main.py, app.py) and the server's literature and
+community stages all go through here, so a new source is one register()
+call.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import cassette
+import deadline
+import metrics
+import query_budget
+import ratelimit
+import resilience
+import tracing
+from forum import search_hacker_news, search_medium, search_quora, search_reddit_api
+from gitkag import search_github_api, search_github_graphql, search_kaggle
+from openalex import search_openalex
+from scholar import search_arxiv, search_google_scholar_serpapi, search_semantic_scholar
+
+PROVIDER_CACHE_SECONDS = float(os.environ.get('PROVIDER_CACHE_SECONDS', '300'))
+PROVIDER_CACHE_SIZE = int(os.environ.get('PROVIDER_CACHE_SIZE', '512'))
+DEFAULT_CONCURRENCY = 4
+# Research package category for each result kind
+CATEGORIES = {
+    'paper': 'papers',
+    'dataset': 'datasets',
+    'code': 'code_repos',
+    'discussion': 'discussions',
+    'article': 'articles',
+}
+
+metrics.describe('provider_slot_timeouts_total', 'Provider queries dropped waiting for a concurrency slot')
+
+
+class ProviderError(Exception):
+    """A provider search failed; results holds whatever it returned anyway"""
+
+    def __init__(self, provider, errors, results=None):
+        super().__init__(f"{provider} search failed: {'; '.join(errors)}")
+        self.provider = provider
+        self.results = results or []
+
+
+class Provider:
+    def __init__(self, name, search, kind, queries=('search_terms',), limit=4, filters=(), popularity=None,
+                 requires=(), concurrency=DEFAULT_CONCURRENCY, interval=None, cost=1.0, batch=None,
+                 batch_requires=(), note=None):
+        self.name = name
+        self.search = search
+        self.kind = kind
+        self.queries = tuple(queries)
+        self.limit = limit
+        self.filters = frozenset(filters)
+        self.popularity = popularity
+        self.requires = tuple(requires)
+        self.concurrency = concurrency
+        self.interval = interval
+        self.cost = cost
+        self.batch = batch
+        self.batch_requires = tuple(batch_requires)
+        self.note = note
+        self.slots = threading.BoundedSemaphore(concurrency)
+
+    @property
+    def label(self):
+        return f"{self.name} ({self.note})" if self.note else self.name
+
+    def missing(self):
+        """Required environment variables that are not set"""
+        return [variable for variable in self.requires if not os.getenv(variable)]
+
+    def configured(self):
+        return not self.missing()
+
+    def batching(self):
+        return self.batch is not None and all(os.getenv(variable) for variable in self.batch_requires)
+
+
+_registry = OrderedDict()
+_cache = OrderedDict()       # (name, query, limit, filters) -> (expires, results)
+_cache_lock = threading.Lock()
+
+
+def register(name, search, kind, **metadata):
+    """Add (or replace) a source; see the module docstring for the metadata"""
+    provider = Provider(name, search, kind, **metadata)
+    _registry[name] = provider
+    ratelimit.configure(name, provider.interval)
+    return provider
+
+
+def get(name):
+    return _registry[name]
+
+
+def registry(kind=None):
+    """Registered providers in registration order, optionally of one kind"""
+    return [p for p in _registry.values() if kind is None or p.kind == kind]
+
+
+def supporting(filter_name):
+    """Names of the providers that accept filter_name (e.g. 'since')"""
+    return {p.name for p in _registry.values() if filter_name in p.filters}
+
+
+def status():
+    """[(label, configured)] for every registered provider"""
+    return [(p.label, p.configured()) for p in _registry.values()]
+
+
+def select(since=None, names=None):
+    """Providers one search should ask, printing why the others are skipped"""
+    chosen = []
+    for provider in _registry.values():
+        if names is not None and provider.name not in names:
+            continue
+        missing = provider.missing()
+        if missing:
+            print(f"Skipping {provider.name} ({' and '.join(missing)} not set)")
+        elif since is not None and 'since' not in provider.filters:
+            print(f"Skipping {provider.name} (no date filter for incremental refresh)")
+        else:
+            chosen.append(provider)
+    return chosen
+
+
+def queries_for(provider, analysis, prompt):
+    """Candidate queries from the prompt analysis; one list-valued query when the provider batches"""
+    queries = [prompt]
+    for field in provider.queries:
+        if analysis.get(field):
+            queries = list(analysis[field])
+            break
+    queries = queries[:query_budget.MAX_QUERIES_PER_PROVIDER]
+    return [queries] if provider.batching() else queries
+
+
+def popularity(result):
+    """Popularity signal of a result, through its provider's declared field"""
+    provider = _registry.get(result.get('source', ''))
+    if provider is None or provider.popularity is None:
+        return 0
+    return result.get(provider.popularity, 0) or 0
+
+
+def category(result):
+    """Package category of a result, from its provider's kind ('other' for unknown sources)"""
+    provider = _registry.get(result.get('source', ''))
+    return CATEGORIES.get(provider.kind, 'other') if provider is not None else 'other'
+
+
+def _cache_key(name, query, limit, filters):
+    query = tuple(query) if isinstance(query, list) else query
+    return name, query, limit, tuple(sorted(filters.items()))
+
+
+def _cached(key):
+    if PROVIDER_CACHE_SECONDS <= 0 or cassette.ACTIVE:
+        return None
+    with _cache_lock:
+        entry = _cache.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            _cache.move_to_end(key)
+            hit = [dict(r) for r in entry[1]]
+        else:
+            _cache.pop(key, None)
+            hit = None
+    metrics.record_cache('provider_results', hit is not None)
+    return hit
+
+
+def _store(key, results):
+    if PROVIDER_CACHE_SECONDS <= 0 or cassette.ACTIVE or not results:
+        return
+    with _cache_lock:
+        _cache[key] = (time.monotonic() + PROVIDER_CACHE_SECONDS, [dict(r) for r in results])
+        _cache.move_to_end(key)
+        while len(_cache) > PROVIDER_CACHE_SIZE:
+            _cache.popitem(last=False)
+
+
+def call(name, query, limit=None, **filters):
+    """
+    One query against one provider: from the cache, or within a
+    concurrency slot and the provider's rate limit.  A list query goes to
+    the provider's batch callable.  Filters the provider does not accept,
+    and ones that are None, are dropped.  Raises ProviderError when the
+    search failed or no slot freed up before the deadline.
+    """
+    provider = _registry[name]
+    limit = provider.limit if limit is None else limit
+    filters = {k: v for k, v in filters.items() if v is not None and k in provider.filters}
+    key = _cache_key(name, query, limit, filters)
+    found = _cached(key)
+    if found is not None:
+        return found
+
+    active = deadline.current()
+    if not provider.slots.acquire(timeout=active.timeout() if active is not None else None):
+        metrics.inc('provider_slot_timeouts_total', provider=name)
+        raise ProviderError(name, ['no free slot before the deadline'])
+    try:
+        ratelimit.acquire(name)
+        search = provider.batch if isinstance(query, list) else provider.search
+        with tracing.span('search.query', provider=name, query=query) as span, \
+                resilience.watch_failures() as failures:
+            found = search(query, limit, **filters)
+            span.set(results=len(found), failed=bool(failures))
+    finally:
+        provider.slots.release()
+    if failures:
+        raise ProviderError(name, failures, found)
+    _store(key, found)
+    return found
+
+
+def run_queries(name, queries, limit, progress, plan=None, **filters):
+    """
+    Run one provider's queries back to back, collecting into progress;
+    a failed query sets progress['failed'] and the rest still run.
+    Results arriving after the active deadline are dropped, since the
+    caller has stopped reading progress by then.
+    """
+    print(f"Searching {name}...")
+    for index, query in enumerate(queries):
+        if not resilience.is_available(name):
+            print(f"Skipping remaining {name} queries (circuit open)")
+            progress['skipped'] = True
+            break
+        if plan is not None and not plan.should_continue(name, index):
+            break
+        try:
+            found = call(name, query, limit, **filters)
+        except ProviderError as e:
+            progress['failed'] = True
+            found = e.results
+        if plan is not None:
+            plan.observe(name, index, found)
+        active = deadline.current()
+        if active is not None and active.expired():
+            break
+        progress['results'].extend(found)
+        progress['calls'] += 1
+
+
+register('Reddit', search_reddit_api, 'discussion', queries=('reddit_queries', 'search_terms'),
+         filters={'since'}, popularity='score', requires=('REDDIT_CLIENT_ID', 'REDDIT_CLIENT_SECRET'),
+         interval=0.6)
+# Search API allows 30 requests a minute with a token; GraphQL sends all queries as one
+register('GitHub', search_github_api, 'code', queries=('github_queries',), limit=5, filters={'since'},
+         popularity='stars', interval=2.0, batch=search_github_graphql, batch_requires=('GITHUB_TOKEN',))
+register('Kaggle', search_kaggle, 'dataset', queries=('kaggle_queries',), filters={'since'},
+         popularity='votes', requires=('KAGGLE_USERNAME', 'KAGGLE_KEY'))
+register('Medium', search_medium, 'article', queries=('medium_queries',), concurrency=2, cost=2.0,
+         note='Scraping')
+# Every call starts a headless browser
+register('Quora', search_quora, 'article', queries=('quora_queries',), concurrency=1, cost=2.0,
+         note='Scraping')
+register('Semantic Scholar', search_semantic_scholar, 'paper', queries=('academic_terms',), filters={'since'},
+         popularity='citations', requires=('SEMANTIC_SCHOLAR_API_KEY',), interval=1.0)
+# Every SerpAPI search counts against a paid plan
+register('Google Scholar', search_google_scholar_serpapi, 'paper', queries=('academic_terms',),
+         filters={'since'}, popularity='citations', requires=('SERPAPI_KEY',), concurrency=2, cost=3.0,
+         note='SerpAPI')
+register('OpenAlex', search_openalex, 'paper', queries=('academic_terms',),
+         filters={'since', 'sort', 'abstracts'}, popularity='citations', interval=0.1)
+# arXiv asks API clients for one request every three seconds
+register('arXiv', search_arxiv, 'paper', queries=('academic_terms',), filters={'since'}, concurrency=1,
+         interval=3.0)
+register('Hacker News', search_hacker_news, 'discussion', queries=('reddit_queries', 'search_terms'),
+         filters={'since'}, popularity='score')
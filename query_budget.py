@@ -0,0 +1,136 @@
+"""
+Adaptive query budget for search_for_links.
+
+Instead of a fixed two queries for every provider, each search gets
+SEARCH_CALL_BUDGET provider calls.  Every provider is asked its first
+query; the rest of the budget goes to the extra queries that have paid
+off best so far, and extra queries are not sent at all once
+SEARCH_ENOUGH_RESULTS unique results have come in.
+
+What "paid off" means is kept per provider and query slot ('first' or
+'extra') in QUERY_STATS_FILE, as moving averages per call of:
+
+    results   how many results the call returned
+    unique    how many of them no earlier call of the same search had found
+    top       how many of those new ones made the final ranked top 30
+
+Extra queries are ranked by 'top', plus an exploration bonus for slots
+with few measurements so a source that was unlucky once is tried again,
+divided by the provider's declared cost per call; ones expected to add
+fewer than MIN_EXTRA_YIELD top results are not sent even when budget is
+left.
+"""
+import json
+import os
+import threading
+
+QUERY_STATS_FILE = os.environ.get('QUERY_STATS_FILE', '.query_stats.json')
+SEARCH_CALL_BUDGET = int(os.environ.get('SEARCH_CALL_BUDGET', '12'))
+SEARCH_ENOUGH_RESULTS = int(os.environ.get('SEARCH_ENOUGH_RESULTS', '60'))
+# Queries per provider the plan may choose from (taken from the prompt analysis)
+MAX_QUERIES_PER_PROVIDER = 3
+# Weight of the newest search in the moving averages
+DECAY = 0.2
+# Bonus for slots measured fewer than a handful of times
+EXPLORATION = 2.0
+MIN_EXTRA_YIELD = float(os.environ.get('MIN_EXTRA_YIELD', '0.5'))
+
+_lock = threading.Lock()
+_stats = None
+
+
+def _load():
+    global _stats
+    if _stats is None:
+        try:
+            with open(QUERY_STATS_FILE, 'r', encoding='utf-8') as f:
+                _stats = json.load(f)
+        except (OSError, ValueError):
+            _stats = {}
+    return _stats
+
+
+def _save(stats):
+    temporary = f"{QUERY_STATS_FILE}.tmp"
+    try:
+        with open(temporary, 'w', encoding='utf-8') as f:
+            json.dump(stats, f, indent=1, sort_keys=True)
+        os.replace(temporary, QUERY_STATS_FILE)
+    except OSError as e:
+        print(f"Could not save query statistics to {QUERY_STATS_FILE}: {e}")
+
+
+def stats():
+    """{provider: {slot: {'calls', 'results', 'unique', 'top'}}} (a copy)"""
+    with _lock:
+        return json.loads(json.dumps(_load()))
+
+
+def expected_yield(provider, slot='extra'):
+    """Expected top-30 results from one more call of this kind, with the exploration bonus"""
+    with _lock:
+        entry = _load().get(provider, {}).get(slot)
+    if not entry:
+        return EXPLORATION
+    return entry['top'] + EXPLORATION / (1 + entry['calls'])
+
+
+class SearchPlan:
+    """Which queries one search may send, and what they brought back"""
+
+    def __init__(self, queries, budget=SEARCH_CALL_BUDGET, enough=SEARCH_ENOUGH_RESULTS, costs=None):
+        self.budget = budget
+        self.enough = enough
+        self.queries = {name: list(qs)[:MAX_QUERIES_PER_PROVIDER] for name, qs in queries.items()}
+        self.allowed = {name: min(1, len(qs)) for name, qs in self.queries.items()}
+
+        # Each further query of a provider is worth a bit less than the one before
+        costs = costs or {}
+        extras = [
+            (expected_yield(name) / index / costs.get(name, 1), name)
+            for name, qs in self.queries.items()
+            for index in range(1, len(qs))
+            if expected_yield(name) / index >= MIN_EXTRA_YIELD
+        ]
+        extras.sort(key=lambda candidate: candidate[0], reverse=True)
+        for _, name in extras[:max(0, budget - sum(self.allowed.values()))]:
+            self.allowed[name] += 1
+
+        self.seen = set()
+        self.calls = []          # (provider, slot, result count, urls no earlier call found)
+        self.lock = threading.Lock()
+
+    def queries_for(self, name):
+        return self.queries.get(name, [])[:self.allowed.get(name, 0)]
+
+    def should_continue(self, name, index):
+        """First queries always run; extra ones only while results are still short"""
+        if index == 0:
+            return True
+        with self.lock:
+            return len(self.seen) < self.enough
+
+    def observe(self, name, index, results):
+        urls = {r.get('url') for r in results if r.get('url')}
+        with self.lock:
+            new = urls - self.seen
+            self.seen.update(urls)
+            self.calls.append((name, 'first' if index == 0 else 'extra', len(results), new))
+
+    def record(self, ranked):
+        """Fold this search's outcome into the history and save it"""
+        top = {r.get('url') for r in ranked}
+        with _lock:
+            history = _load()
+            for name, slot, count, new in self.calls:
+                entry = history.setdefault(name, {}).setdefault(slot, {'calls': 0})
+                observed = {'results': count, 'unique': len(new), 'top': len(top & new)}
+                for key, value in observed.items():
+                    entry[key] = value if key not in entry else (1 - DECAY) * entry[key] + DECAY * value
+                entry['calls'] += 1
+            if self.calls:
+                _save(history)
+
+    def summary(self):
+        sent = len(self.calls)
+        return f"{sent} calls of a budget of {self.budget}, {len(self.seen)} unique results"
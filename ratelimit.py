@@ -0,0 +1,72 @@
+"""
+Per-provider request pacing.
+
+Replaces the fixed time.sleep(1) between consecutive queries: each
+provider may only start a new request once its minimum interval has
+passed, no matter which thread issues it.  Waits never extend past the
+active deadline.
+
+A provider's interval is what it declared through configure() (see
+providers.py), else PROVIDER_MIN_INTERVAL; setting PROVIDER_MIN_INTERVAL
+explicitly applies it to every provider, declared ones included.
+"""
+import os
+import threading
+import time
+
+import deadline
+import metrics
+
+DEFAULT_INTERVAL = float(os.environ.get('PROVIDER_MIN_INTERVAL', '1.0'))
+_OVERRIDDEN = 'PROVIDER_MIN_INTERVAL' in os.environ
+
+
+class RateLimiter:
+    """Minimum spacing between request starts, shared by all threads"""
+
+    def __init__(self, min_interval=DEFAULT_INTERVAL):
+        self.min_interval = min_interval
+        self.next_slot = 0.0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Block until this caller's slot; returns seconds spent waiting"""
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + self.min_interval
+        wait = slot - now
+        active = deadline.current()
+        if active is not None:
+            wait = active.timeout(wait)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+_limiters = {}
+_intervals = {}
+_limiters_lock = threading.Lock()
+
+
+def configure(provider, min_interval):
+    """Declare a provider's own minimum interval between request starts"""
+    if min_interval is None or _OVERRIDDEN:
+        return
+    with _limiters_lock:
+        _intervals[provider] = min_interval
+        if provider in _limiters:
+            _limiters[provider].min_interval = min_interval
+
+
+def get_limiter(provider):
+    with _limiters_lock:
+        if provider not in _limiters:
+            _limiters[provider] = RateLimiter(_intervals.get(provider, DEFAULT_INTERVAL))
+        return _limiters[provider]
+
+
+def acquire(provider):
+    waited = get_limiter(provider).acquire()
+    metrics.observe('rate_limiter_wait_seconds', waited, provider=provider)
+    return waited
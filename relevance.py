@@ -0,0 +1,108 @@
+"""
+Prompt relevance scoring for search results.
+
+Each result's title (counted twice) and description become a TF-IDF
+vector over word unigrams and bigrams; IDF comes from the candidate set
+itself, so terms every result shares (the provider's echo of the query)
+carry little weight.  The vectors are held as sparse (row, column,
+weight) arrays and all cosine similarities to the prompt are computed
+in one pass of NumPy bincounts; a few thousand candidates take tens of
+milliseconds, mostly tokenizing.  That makes over-fetching from providers
+(SEARCH_OVERFETCH) and keeping only the most relevant results cheap.
+"""
+import itertools
+import os
+from collections import defaultdict
+
+import numpy as np
+
+from resource_index import STOPWORDS, TOKEN
+
+# Share of the final score that comes from prompt similarity (the rest is popularity)
+RELEVANCE_WEIGHT = float(os.getenv('RELEVANCE_WEIGHT', '0.7'))
+
+
+def _token_ids(texts, vocabulary):
+    """(row, token id) arrays for every token of every text"""
+    rows, ids = [], []
+    for i, text in enumerate(texts):
+        tokens = [vocabulary[t] for t in TOKEN.findall(str(text).lower())]
+        rows.extend([i] * len(tokens))
+        ids.extend(tokens)
+    return np.asarray(rows, np.int64), np.asarray(ids, np.int64)
+
+
+def _drop_stopwords(rows, ids, vocabulary):
+    """Filter stopwords and one-letter tokens once per distinct word instead of per token"""
+    dropped = np.fromiter((len(t) < 2 or t in STOPWORDS for t in vocabulary), bool, len(vocabulary))
+    keep = ~dropped[ids]
+    return rows[keep], ids[keep]
+
+
+def _features(rows, ids):
+    """Unigram keys plus one key per adjacent token pair within the same row"""
+    same = rows[1:] == rows[:-1]
+    bigrams = ((ids[:-1][same] + 1) << 32) | ids[1:][same]
+    return np.concatenate([rows, rows[:-1][same]]), np.concatenate([ids, bigrams])
+
+
+def result_text(result):
+    title = result.get('title') or ''
+    return f"{title} {title} {result.get('description') or ''}"
+
+
+def similarities(query, documents):
+    """Cosine similarity between query and every document, as a float array"""
+    n_docs = len(documents)
+    vocabulary = defaultdict(itertools.count().__next__)
+    doc_tokens = _token_ids(documents, vocabulary)
+    query_tokens = _token_ids([query], vocabulary)
+    rows, keys = _features(*_drop_stopwords(*doc_tokens, vocabulary))
+    _, query_keys = _features(*_drop_stopwords(*query_tokens, vocabulary))
+    if not len(rows) or not len(query_keys):
+        return np.zeros(n_docs)
+
+    # Dense column numbers for every unigram/bigram seen in documents or query
+    features, cols = np.unique(np.concatenate([keys, query_keys]), return_inverse=True)
+    size = len(features)
+    cols, query_cols = cols[:len(keys)], cols[len(keys):]
+
+    pairs, tf = np.unique(rows * size + cols, return_counts=True)
+    rows, cols = pairs // size, pairs % size
+    idf = np.log((1 + n_docs) / (1 + np.bincount(cols, minlength=size))) + 1
+    weights = (1 + np.log(tf)) * idf[cols]
+
+    query_cols, query_tf = np.unique(query_cols, return_counts=True)
+    query_vector = np.zeros(size)
+    query_vector[query_cols] = (1 + np.log(query_tf)) * idf[query_cols]
+
+    dots = np.bincount(rows, weights=weights * query_vector[cols], minlength=n_docs)
+    norms = np.sqrt(np.bincount(rows, weights=weights * weights, minlength=n_docs)) * np.linalg.norm(query_vector)
+    return np.divide(dots, norms, out=np.zeros(n_docs), where=norms > 0)
+
+
+def rerank(query, results, popularity, limit=30, weight=RELEVANCE_WEIGHT):
+    """
+    Top `limit` results by weight * prompt similarity + (1 - weight) *
+    popularity, where popularity(result) (stars, citations, votes...) is
+    log-scaled and normalized per source so a GitHub star count does not
+    drown out a paper's citations.  Adds a 'relevance' field to results.
+    """
+    if not results:
+        return []
+    similarity = similarities(query, [result_text(r) for r in results])
+
+    popular = np.log1p(np.maximum(np.asarray([popularity(r) or 0 for r in results], dtype=float), 0))
+    _, source_ids = np.unique([r.get('source', '') for r in results], return_inverse=True)
+    source_max = np.zeros(source_ids.max() + 1)
+    np.maximum.at(source_max, source_ids, popular)
+    scale = source_max[source_ids]
+    popular = np.divide(popular, scale, out=np.zeros_like(popular), where=scale > 0)
+
+    score = weight * similarity + (1 - weight) * popular
+    order = np.argsort(-score, kind='stable')[:limit]
+    ranked = []
+    for i in order:
+        results[i]['relevance'] = round(float(similarity[i]), 3)
+        ranked.append(results[i])
+    return ranked
@@ -0,0 +1,230 @@
+"""
+Per-provider circuit breakers and hedged requests.
+
+Every upstream source (GitHub, Reddit, Medium, ...) gets its own
+ProviderHealth record that tracks recent latency and error rate.  When a
+provider keeps failing its circuit opens and calls are rejected
+immediately instead of waiting out the full HTTP timeout; after a cool
+down a single probe call is let through to decide whether to close it
+again.
+
+Provider search functions print their errors and return an empty list.
+They also call report_failure(), so a caller inside watch_failures()
+can tell a failed search from one that found nothing.
+"""
+import contextlib
+import contextvars
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import deadline
+import metrics
+import tracing
+
+FAILURE_THRESHOLD = float(os.environ.get('CIRCUIT_FAILURE_RATE', '0.5'))
+MIN_CALLS = int(os.environ.get('CIRCUIT_MIN_CALLS', '4'))
+RESET_SECONDS = float(os.environ.get('CIRCUIT_RESET_SECONDS', '60'))
+WINDOW_SIZE = int(os.environ.get('CIRCUIT_WINDOW', '20'))
+HEDGE_ENABLED = os.environ.get('HEDGE_REQUESTS', '0') == '1'
+HEDGE_MIN_SAMPLES = 5
+
+_failures = contextvars.ContextVar('provider_failures', default=None)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is skipped because the provider's circuit is open"""
+
+    def __init__(self, provider, retry_in):
+        super().__init__(f"{provider} circuit open, retry in {retry_in:.0f}s")
+        self.provider = provider
+        self.retry_in = retry_in
+
+
+class ProviderHealth:
+    """Rolling latency/error window and circuit state for one provider"""
+
+    def __init__(self, name, window=WINDOW_SIZE):
+        self.name = name
+        self.latencies = deque(maxlen=window)
+        self.outcomes = deque(maxlen=window)
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+        self.lock = threading.Lock()
+
+    def error_rate(self):
+        if not self.outcomes:
+            return 0.0
+        return self.outcomes.count(False) / len(self.outcomes)
+
+    def p95(self):
+        if len(self.latencies) < HEDGE_MIN_SAMPLES:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+    def before_call(self):
+        """Reject the call if the circuit is open; allow one probe once it cools down"""
+        with self.lock:
+            if self.state == CLOSED:
+                return
+            elapsed = time.monotonic() - self.opened_at
+            if self.state == OPEN and elapsed >= RESET_SECONDS:
+                self.state = HALF_OPEN
+            if self.state == HALF_OPEN and not self.probe_in_flight:
+                self.probe_in_flight = True
+                return
+            raise CircuitOpenError(self.name, max(0.0, RESET_SECONDS - elapsed))
+
+    def record(self, ok, latency):
+        with self.lock:
+            self.outcomes.append(ok)
+            if ok:
+                self.latencies.append(latency)
+            if self.state == HALF_OPEN:
+                self.probe_in_flight = False
+                if ok:
+                    self.state = CLOSED
+                    self.outcomes.clear()
+                else:
+                    self.state = OPEN
+                    self.opened_at = time.monotonic()
+            elif (self.state == CLOSED and len(self.outcomes) >= MIN_CALLS
+                  and self.error_rate() >= FAILURE_THRESHOLD):
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+                print(f"{self.name}: circuit opened ({self.error_rate():.0%} errors), "
+                      f"skipping for {RESET_SECONDS:.0f}s")
+
+    def release_probe(self):
+        """Give up a half-open probe without judging the provider"""
+        with self.lock:
+            self.probe_in_flight = False
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'state': self.state,
+                'error_rate': round(self.error_rate(), 3),
+                'calls': len(self.outcomes),
+                'p95_seconds': self.p95(),
+            }
+
+
+_providers = {}
+_providers_lock = threading.Lock()
+_hedge_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix='hedge')
+
+
+def get_health(provider):
+    with _providers_lock:
+        if provider not in _providers:
+            _providers[provider] = ProviderHealth(provider)
+        return _providers[provider]
+
+
+def is_available(provider):
+    """True unless the provider's circuit is open and still cooling down"""
+    health = get_health(provider)
+    return health.state != OPEN or time.monotonic() - health.opened_at >= RESET_SECONDS
+
+
+def health_report():
+    with _providers_lock:
+        names = list(_providers)
+    return {name: get_health(name).snapshot() for name in names}
+
+
+def _hedged(health, fn, args, kwargs):
+    """Start fn; if it is still running after the provider's p95, race a duplicate"""
+    threshold = health.p95()
+    # Each attempt runs in a copy of the caller's context: its deadline, span and output target
+    first = _hedge_pool.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+    if threshold is None:
+        return first.result()
+    done, _ = wait([first], timeout=threshold)
+    if done:
+        return first.result()
+    second = _hedge_pool.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+    pending = {first, second}
+    error = None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is None:
+                return future.result()
+            error = future.exception()
+    raise error
+
+
+def call(provider, fn, *args, hedge=None, is_failure=None, **kwargs):
+    """
+    Run fn(*args, **kwargs) under the provider's circuit breaker.
+
+    Raises CircuitOpenError without calling fn when the circuit is open.
+    is_failure(result) lets callers count bad results (e.g. HTTP 5xx) as
+    errors even though fn returned normally.
+    """
+    with tracing.span('provider.call', provider=provider) as span:
+        result = _call(provider, fn, args, kwargs, hedge, is_failure)
+        span.set(circuit=get_health(provider).state)
+        return result
+
+
+def _call(provider, fn, args, kwargs, hedge, is_failure):
+    health = get_health(provider)
+    try:
+        health.before_call()
+    except CircuitOpenError:
+        metrics.inc('provider_requests_total', provider=provider, outcome='circuit_open')
+        raise
+    hedge = HEDGE_ENABLED if hedge is None else hedge
+    start = time.monotonic()
+    try:
+        if hedge:
+            result = _hedged(health, fn, args, kwargs)
+        else:
+            result = fn(*args, **kwargs)
+    except Exception:
+        elapsed = time.monotonic() - start
+        active = deadline.current()
+        # A timeout caused by the caller's own budget says nothing about the provider
+        if active is None or not active.expired():
+            health.record(False, elapsed)
+            metrics.inc('provider_requests_total', provider=provider, outcome='error')
+        else:
+            health.release_probe()
+            metrics.inc('provider_requests_total', provider=provider, outcome='deadline')
+        metrics.observe('provider_request_seconds', elapsed, provider=provider)
+        raise
+    elapsed = time.monotonic() - start
+    ok = not (is_failure and is_failure(result))
+    health.record(ok, elapsed)
+    metrics.inc('provider_requests_total', provider=provider, outcome='ok' if ok else 'error')
+    metrics.observe('provider_request_seconds', elapsed, provider=provider)
+    return result
+
+
+def report_failure(provider, error):
+    """Note that provider's search failed (it still returns its empty list)"""
+    failures = _failures.get()
+    if failures is not None:
+        failures.append(f"{provider}: {error}")
+
+
+@contextlib.contextmanager
+def watch_failures():
+    """Collect the failures reported inside the block into the yielded list"""
+    failures = []
+    token = _failures.set(failures)
+    try:
+        yield failures
+    finally:
+        _failures.reset(token)
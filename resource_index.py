@@ -0,0 +1,305 @@
+"""
+Local full-text index over every saved research_resources_*.json.
+
+    python resource_index.py "graph neural network drug"
+    python resource_index.py "pytorch geometric" --source GitHub --limit 5
+    python resource_index.py --rebuild
+
+Titles, descriptions, authors and venues of all collected resources go
+into an in-memory inverted index ranked with BM25 (titles weighted
+double).  Per-document term counts are persisted to RESOURCE_INDEX_FILE
+together with each package's mtime, so only new or changed packages are
+tokenized on the next start; collect_research_resources adds its file
+as soon as it is written.  The same resource seen in several runs is
+returned once, from its most recent collection.
+"""
+import argparse
+import glob
+import heapq
+import json
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter
+
+RESOURCE_DIR = os.environ.get('RESOURCE_DIR', '.')
+RESOURCE_INDEX_FILE = os.environ.get('RESOURCE_INDEX_FILE') or os.path.join(RESOURCE_DIR, '.resource_index.json')
+# How often a query re-checks the directory for packages written by other processes
+REFRESH_SECONDS = float(os.environ.get('RESOURCE_INDEX_REFRESH_SECONDS', '5'))
+
+PATTERN = 'research_resources_*.json'
+FIELD_WEIGHTS = {'title': 2, 'description': 1, 'authors': 1, 'venue': 1}
+K1 = 1.2
+B = 0.75
+STOPWORDS = frozenset("""
+a an and are as at be by for from has have in into is it its of on or that the this to was were with
+no not available via using based towards toward new
+""".split())
+
+# Word pattern, also used by the relevance reranker
+TOKEN = re.compile(r'[a-z0-9]+')
+
+
+def tokenize(text):
+    return [t for t in TOKEN.findall(str(text).lower()) if len(t) > 1 and t not in STOPWORDS]
+
+
+def _term_counts(resource):
+    counts = Counter()
+    for field, weight in FIELD_WEIGHTS.items():
+        value = resource.get(field)
+        if isinstance(value, list):
+            value = ' '.join(map(str, value))
+        if value:
+            for term in tokenize(value):
+                counts[term] += weight
+    return counts
+
+
+def _documents(path):
+    """One index document per resource in a saved research package"""
+    with open(path, 'r', encoding='utf-8') as f:
+        package = json.load(f)
+    info = package.get('research_info') or {}
+    collected = package.get('collection_timestamp', '')
+    docs = []
+    for category, resources in (package.get('resources') or {}).items():
+        for resource in resources:
+            counts = _term_counts(resource)
+            if not counts:
+                continue
+            docs.append({
+                'file': os.path.basename(path),
+                'topic': info.get('topic', ''),
+                'category': category,
+                'collected': collected,
+                'title': resource.get('title', ''),
+                'url': resource.get('url', ''),
+                'source': resource.get('source', ''),
+                'description': str(resource.get('description', ''))[:300],
+                'tf': dict(counts),
+                'length': sum(counts.values()),
+            })
+    return docs
+
+
+class ResourceIndex:
+    """BM25 inverted index over saved packages, updated file by file"""
+
+    def __init__(self, directory=RESOURCE_DIR, index_file=RESOURCE_INDEX_FILE):
+        self.directory = directory
+        self.index_file = index_file
+        self._lock = threading.RLock()
+        self._files = {}       # file name -> mtime it was indexed at
+        self._docs = []
+        self._postings = {}    # term -> [(doc position, weighted tf)]
+        self._total_length = 0
+        self._norms = None
+        self._checked = 0.0
+        self._load()
+
+    def __len__(self):
+        return len(self._docs)
+
+    def _load(self):
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+            self._files = saved['files']
+            self._docs = saved['docs']
+        except FileNotFoundError:
+            return
+        except (ValueError, KeyError) as e:
+            print(f"Ignoring unreadable resource index {self.index_file}: {e}")
+            self._files, self._docs = {}, []
+        self._rebuild_postings()
+
+    def _save(self):
+        tmp = f"{self.index_file}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'files': self._files, 'docs': self._docs}, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp, self.index_file)
+
+    def _rebuild_postings(self):
+        postings = {}
+        for position, doc in enumerate(self._docs):
+            for term, tf in doc['tf'].items():
+                postings.setdefault(term, []).append((position, tf))
+        self._postings = postings
+        self._total_length = sum(doc['length'] for doc in self._docs)
+        self._norms = None
+
+    def _length_norms(self):
+        """BM25 length normalization per document, recomputed after each update"""
+        if self._norms is None:
+            average = self._total_length / len(self._docs)
+            self._norms = [K1 * (1 - B + B * doc['length'] / average) for doc in self._docs]
+        return self._norms
+
+    def _index_files(self, changed):
+        """(Re)index the given {name: mtime}; returns True when anything changed"""
+        if not changed:
+            return False
+        names = set(changed)
+        removed = any(doc['file'] in names for doc in self._docs)
+        if removed:
+            self._docs = [doc for doc in self._docs if doc['file'] not in names]
+        added = []
+        for name, mtime in sorted(changed.items()):
+            try:
+                added.extend(_documents(os.path.join(self.directory, name)))
+            except (OSError, ValueError) as e:
+                print(f"Skipping {name}: {e}")
+                continue
+            self._files[name] = mtime
+        if removed:
+            self._docs.extend(added)
+            self._rebuild_postings()
+        else:
+            # Append-only update: extend postings in place instead of a rebuild
+            start = len(self._docs)
+            self._docs.extend(added)
+            for position, doc in enumerate(added, start):
+                for term, tf in doc['tf'].items():
+                    self._postings.setdefault(term, []).append((position, tf))
+                self._total_length += doc['length']
+            self._norms = None
+        return True
+
+    def refresh(self):
+        """Index packages that are new or modified since they were last indexed"""
+        with self._lock:
+            self._checked = time.monotonic()
+            on_disk = {}
+            for path in glob.glob(os.path.join(self.directory, PATTERN)):
+                try:
+                    on_disk[os.path.basename(path)] = os.path.getmtime(path)
+                except OSError:
+                    continue
+            changed = {name: mtime for name, mtime in on_disk.items() if self._files.get(name) != mtime}
+            gone = [name for name in self._files if name not in on_disk]
+            for name in gone:
+                del self._files[name]
+            if gone:
+                self._docs = [doc for doc in self._docs if doc['file'] not in gone]
+                self._rebuild_postings()
+            if self._index_files(changed) or gone:
+                self._save()
+            return len(changed)
+
+    def add_file(self, path):
+        """Index one freshly written package (called by collect_research_resources)"""
+        with self._lock:
+            name = os.path.basename(path)
+            if self._index_files({name: os.path.getmtime(path)}):
+                self._save()
+
+    def rebuild(self):
+        with self._lock:
+            self._files, self._docs = {}, []
+            self._rebuild_postings()
+            return self.refresh()
+
+    def search(self, query, limit=10, source=None, topic=None):
+        """Top resources for query by BM25, one hit per URL (newest collection wins)"""
+        if time.monotonic() - self._checked > REFRESH_SECONDS:
+            self.refresh()
+        terms = set(tokenize(query))
+        with self._lock:
+            n = len(self._docs)
+            if not n or not terms:
+                return []
+            norms = self._length_norms()
+            scores = {}
+            for term in terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5)) * (K1 + 1)
+                get = scores.get
+                for position, tf in postings:
+                    scores[position] = get(position, 0.0) + idf * tf / (tf + norms[position])
+            source = source.lower() if source else None
+            topic = topic.lower() if topic else None
+            docs = self._docs
+
+            def wanted(position):
+                doc = docs[position]
+                return ((not source or doc['source'].lower() == source)
+                        and (not topic or topic in doc['topic'].lower()))
+
+            # Filter first, so a rare source or topic is not cut with the rest;
+            # then only the best few hundred candidates need the per-URL dedup
+            matching = scores.items() if not (source or topic) else (
+                (position, score) for position, score in scores.items() if wanted(position))
+            candidates = heapq.nlargest(max(limit * 20, 200), matching, key=lambda item: item[1])
+            best = {}
+            for position, score in candidates:
+                doc = docs[position]
+                key = doc['url'] or doc['title']
+                kept = best.get(key)
+                if kept is None or (doc['collected'], score) > (kept[1]['collected'], kept[0]):
+                    best[key] = (score, doc)
+        ranked = sorted(best.values(), key=lambda item: -item[0])[:limit]
+        return [
+            {k: v for k, v in doc.items() if k not in ('tf', 'length')} | {'score': round(score, 3)}
+            for score, doc in ranked
+        ]
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_index():
+    """Process-wide index, loaded (and refreshed) on first use"""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = ResourceIndex()
+            _index.refresh()
+        return _index
+
+
+def search(query, limit=10, source=None, topic=None):
+    return get_index().search(query, limit, source, topic)
+
+
+def add_file(path):
+    get_index().add_file(path)
+
+
+def print_hits(hits):
+    if not hits:
+        print("No matching resources in past collections.")
+        return
+    for i, hit in enumerate(hits, 1):
+        print(f"{i}. {hit['title']} [{hit['source']}] ({hit['score']})")
+        print(f"   {hit['url']}")
+        print(f"   from '{hit['topic'][:60]}' collected {hit['collected'][:16]} ({hit['file']})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Search resources from past research collections")
+    parser.add_argument('query', nargs='*')
+    parser.add_argument('--source', help="only this source, e.g. GitHub or 'Semantic Scholar'")
+    parser.add_argument('--topic', help="only packages whose topic contains this text")
+    parser.add_argument('--limit', type=int, default=10)
+    parser.add_argument('--rebuild', action='store_true', help="re-tokenize every package from scratch")
+    args = parser.parse_args()
+
+    index = ResourceIndex()
+    started = time.perf_counter()
+    indexed = index.rebuild() if args.rebuild else index.refresh()
+    print(f"{len(index)} resources indexed ({indexed} package(s) updated in {time.perf_counter() - started:.2f}s)")
+    if args.query:
+        started = time.perf_counter()
+        hits = index.search(' '.join(args.query), args.limit, args.source, args.topic)
+        print(f"Query took {(time.perf_counter() - started) * 1000:.1f} ms\n")
+        print_hits(hits)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,8 +1,87 @@
+import argparse
+import json
 import os
-import requests
-
-def search_semantic_scholar(query, limit=5):
-    """Search Semantic Scholar for academic papers"""
+import re
+import sys
+from datetime import datetime
+
+import deadline
+import http_client
+import ratelimit
+import resilience
+
+S2_SEARCH_URL = 'https://api.semanticscholar.org/graph/v1/paper/search'
+S2_BULK_URL = 'https://api.semanticscholar.org/graph/v1/paper/search/bulk'
+S2_FIELDS = 'title,authors,year,url,abstract,citationCount,venue,publicationTypes'
+# Enough for dedup and ranking; bulk sweeps ask for this unless told otherwise
+S2_MINIMAL_FIELDS = 'paperId,title,url,year,citationCount'
+ARXIV_URL = 'http://export.arxiv.org/api/query'
+
+def parse_semantic_scholar_paper(paper):
+    """Semantic Scholar paper -> resource record; fields that were not requested come out empty"""
+    authors = []
+    if paper.get('authors'):
+        authors = [author.get('name', '') for author in paper['authors'][:3]]
+        if len(paper['authors']) > 3:
+            authors.append('et al.')
+
+    return {
+        'title': paper.get('title', ''),
+        'url': paper.get('url', ''),
+        'description': paper.get('abstract', '')[:200] + '...' if paper.get('abstract') else 'No abstract available',
+        'authors': ', '.join(authors),
+        'year': paper.get('year', 'Unknown'),
+        'citations': paper.get('citationCount', 0),
+        'venue': paper.get('venue', 'Unknown'),
+        'types': paper.get('publicationTypes', []),
+        'source': 'Semantic Scholar'
+    }
+
+def bulk_search_semantic_scholar(query, limit=None, fields=S2_MINIMAL_FIELDS, since=None, sort=None):
+    """
+    Stream papers from the bulk search endpoint (up to 1000 per request),
+    following its continuation token until limit papers, the last page or
+    the active deadline.  fields trims the payload to what the caller
+    needs; sort is e.g. 'citationCount:desc'.  Pages after the first are
+    paced by the Semantic Scholar rate limiter.
+    """
+    headers = {}
+    if os.getenv('SEMANTIC_SCHOLAR_API_KEY'):
+        headers['X-API-KEY'] = os.getenv('SEMANTIC_SCHOLAR_API_KEY')
+    params = {'query': query, 'fields': fields}
+    if since:
+        params['publicationDateOrYear'] = f"{since:%Y-%m-%d}:"
+    if sort:
+        params['sort'] = sort
+
+    yielded = 0
+    first = True
+    while True:
+        active = deadline.current()
+        if active is not None and active.expired():
+            return
+        if not first:
+            ratelimit.acquire('Semantic Scholar')
+        first = False
+        response = http_client.get('Semantic Scholar', S2_BULK_URL, headers=headers, params=params, timeout=30)
+        response.raise_for_status()
+        data = response.json()
+        for paper in data.get('data') or []:
+            if not paper.get('url') and not paper.get('paperId'):
+                continue
+            record = parse_semantic_scholar_paper(paper)
+            if not record['url']:
+                record['url'] = f"https://www.semanticscholar.org/paper/{paper['paperId']}"
+            yield record
+            yielded += 1
+            if limit and yielded >= limit:
+                return
+        if not data.get('token') or not data.get('data'):
+            return
+        params['token'] = data['token']
+
+def search_semantic_scholar(query, limit=5, since=None):
+    """Search Semantic Scholar for academic papers (since: published on or after it)"""
     try:
         SEMANTIC_SCHOLAR_API_KEY = os.getenv('SEMANTIC_SCHOLAR_API_KEY')
         if not SEMANTIC_SCHOLAR_API_KEY:
@@ -15,11 +94,12 @@ def search_semantic_scholar(query, limit=5):
         params = {
             'query': query,
             'limit': limit,
-            'fields': 'title,authors,year,url,abstract,citationCount,venue,publicationTypes'
+            'fields': S2_FIELDS
         }
+        if since:
+            params['publicationDateOrYear'] = f"{since:%Y-%m-%d}:"
 
-        response = requests.get('https://api.semanticscholar.org/graph/v1/paper/search',
-                              headers=headers, params=params, timeout=15)
+        response = http_client.get('Semantic Scholar', S2_SEARCH_URL, headers=headers, params=params, timeout=15)
 
         if response.status_code == 200:
             data = response.json()
@@ -30,35 +110,21 @@ def search_semantic_scholar(query, limit=5):
                     if not paper.get('url'):
                         continue
 
-                    authors = []
-                    if paper.get('authors'):
-                        authors = [author.get('name', '') for author in paper['authors'][:3]]
-                        if len(paper['authors']) > 3:
-                            authors.append('et al.')
-
-                    results.append({
-                        'title': paper.get('title', ''),
-                        'url': paper.get('url', ''),
-                        'description': paper.get('abstract', '')[:200] + '...' if paper.get('abstract') else 'No abstract available',
-                        'authors': ', '.join(authors),
-                        'year': paper.get('year', 'Unknown'),
-                        'citations': paper.get('citationCount', 0),
-                        'venue': paper.get('venue', 'Unknown'),
-                        'types': paper.get('publicationTypes', []),
-                        'source': 'Semantic Scholar'
-                    })
+                    results.append(parse_semantic_scholar_paper(paper))
 
             return results
         else:
             print(f"Semantic Scholar API error: {response.status_code}")
+            resilience.report_failure('Semantic Scholar', f"HTTP {response.status_code}")
             return []
 
     except Exception as e:
         print(f"Semantic Scholar search error: {e}")
+        resilience.report_failure('Semantic Scholar', e)
         return []
 
-def search_google_scholar_serpapi(query, limit=5):
-    """Search Google Scholar using SerpAPI"""
+def search_google_scholar_serpapi(query, limit=5, since=None):
+    """Search Google Scholar using SerpAPI (since: from that year on; finer filtering is up to the caller)"""
     try:
         SERPAPI_KEY = os.getenv('SERPAPI_KEY')
         if not SERPAPI_KEY:
@@ -71,8 +137,10 @@ def search_google_scholar_serpapi(query, limit=5):
             'num': limit,
             'hl': 'en'
         }
+        if since:
+            params['as_ylo'] = since.year
 
-        response = requests.get('https://serpapi.com/search', params=params, timeout=15)
+        response = http_client.get('Google Scholar', 'https://serpapi.com/search', params=params, timeout=15)
 
         if response.status_code == 200:
             data = response.json()
@@ -101,8 +169,77 @@ def search_google_scholar_serpapi(query, limit=5):
             return results
         else:
             print(f"SerpAPI error: {response.status_code}")
+            resilience.report_failure('Google Scholar', f"HTTP {response.status_code}")
             return []
 
     except Exception as e:
         print(f"Google Scholar search error: {e}")
-        return []
\ No newline at end of file
+        resilience.report_failure('Google Scholar', e)
+        return []
+
+def search_arxiv(query, limit=5, since=None):
+    """Search arXiv's Atom API (since: submitted on or after it)"""
+    try:
+        search_query = f"all:{query}"
+        if since:
+            search_query += f" AND submittedDate:[{since:%Y%m%d%H%M} TO {datetime.now():%Y%m%d%H%M}]"
+
+        params = {'search_query': search_query, 'start': 0, 'max_results': limit}
+        response = http_client.get('arXiv', ARXIV_URL, params=params,
+                                   headers={'User-Agent': 'LinkSearchBot/1.0'}, timeout=15)
+
+        if response.status_code == 200:
+            results = []
+            # The feed is simple enough that a regex pass beats an XML parser
+            for entry in re.findall(r"<entry>(.*?)</entry>", response.text, flags=re.S):
+                title = re.search(r"<title>(.*?)</title>", entry, flags=re.S)
+                link = re.search(r'<link rel="alternate" type="text/html" href="(.*?)"', entry)
+                published = re.search(r"<published>(\d{4})", entry)
+                summary = re.search(r"<summary>(.*?)</summary>", entry, flags=re.S)
+                if not title or not link:
+                    continue
+                abstract = re.sub(r"\s+", " ", summary.group(1)).strip() if summary else ''
+                results.append({
+                    'title': re.sub(r"\s+", " ", title.group(1)).strip(),
+                    'url': link.group(1),
+                    'description': abstract[:200] + '...' if abstract else 'No abstract available',
+                    'authors': '',
+                    'year': published.group(1) if published else '',
+                    'citations': 0,
+                    'venue': 'arXiv',
+                    'source': 'arXiv'
+                })
+
+            return results
+        else:
+            print(f"arXiv API error: {response.status_code}")
+            resilience.report_failure('arXiv', f"HTTP {response.status_code}")
+            return []
+
+    except Exception as e:
+        print(f"arXiv search error: {e}")
+        resilience.report_failure('arXiv', e)
+        return []
+
+
+def main():
+    from incremental import parse_since
+
+    parser = argparse.ArgumentParser(description="Stream Semantic Scholar bulk search results as JSON lines")
+    parser.add_argument('query', help="bulk search syntax: + (and), | (or), - (not), \"phrases\"")
+    parser.add_argument('--limit', type=int, default=1000, help="stop after this many papers (0 = all)")
+    parser.add_argument('--fields', default=S2_MINIMAL_FIELDS, help=f"comma-separated S2 fields (full: {S2_FIELDS})")
+    parser.add_argument('--since', help="only papers published on or after this date (YYYY-MM-DD)")
+    parser.add_argument('--sort', help="e.g. citationCount:desc")
+    args = parser.parse_args()
+
+    count = 0
+    for paper in bulk_search_semantic_scholar(args.query, args.limit or None, args.fields,
+                                              parse_since(args.since), args.sort):
+        sys.stdout.write(json.dumps(paper, ensure_ascii=False) + '\n')
+        count += 1
+    print(f"{count} papers", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
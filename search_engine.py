@@ -0,0 +1,213 @@
+"""
+Multi-source link search, shared by every entry point.
+
+    import search_engine
+    results = search_engine.get().search("graph neural networks for drug discovery", deadline=10)
+
+One SearchEngine per process holds what a search needs:
+- the Gemini model;
+- a pooled, kept-alive HTTP session per provider, sized to its declared
+  concurrency;
+- the worker pool provider queries run on;
+- the provider registry with its result cache.
+
+The CLI (main.py, app.py), batch.py and server.py all take it from
+get(), so nothing is set up per search and every entry point searches
+the same way.
+
+warm_up() does what the first search would otherwise pay for: loading
+the query budget history and fetching provider tokens.  Entry points
+start it in the background when the process starts.
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+import google.generativeai as genai
+import requests
+from requests.adapters import HTTPAdapter
+
+import forum
+import http_client
+import metrics
+import providers
+import query_budget
+import relevance
+import tracing
+from deadline import Deadline, PartialResults, run_all
+from deadline import call as run_with_deadline
+from gemini import DEFAULT_MODEL_NAME, analyze_prompt_with_gemini, fallback_analysis, print_analysis
+from summarizer import print_results
+
+# Share of the budget the Gemini prompt analysis may use before falling back
+ANALYSIS_BUDGET_SHARE = 0.3
+# Ask providers for this many times their usual result count and let the
+# relevance reranker keep the best 30 (e.g. SEARCH_OVERFETCH=3)
+SEARCH_OVERFETCH = max(1.0, float(os.getenv('SEARCH_OVERFETCH') or 1))
+# Provider queries running at once across all searches of the process
+SEARCH_WORKERS = int(os.getenv('SEARCH_WORKERS', '32'))
+
+metrics.describe('search_engine_warm_up_seconds', 'Time spent warming up the search engine')
+
+
+class SearchEngine:
+    def __init__(self, model_name=DEFAULT_MODEL_NAME, workers=SEARCH_WORKERS):
+        genai.configure(api_key=os.getenv('GEMINI_API_KEY', ''))
+        self.model = genai.GenerativeModel(model_name)
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='search')
+        self.sessions = {}
+        for provider in providers.registry():
+            session = requests.Session()
+            # Room for a hedged duplicate of every call in flight
+            adapter = HTTPAdapter(pool_maxsize=2 * provider.concurrency)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            http_client.set_session(provider.name, session)
+            self.sessions[provider.name] = session
+        self.warmed = threading.Event()
+
+    def warm_up(self, background=False):
+        """Load the query history and get provider tokens now rather than in the first search"""
+        if background:
+            threading.Thread(target=self.warm_up, name='search-warm-up', daemon=True).start()
+            return
+        # Timed by the metric only: a span here would be a root of its own
+        # and could pass for the process's critical path
+        started = time.monotonic()
+        query_budget.stats()
+        if providers.get('Reddit').configured() and not forum.reddit_access_token:
+            forum.get_reddit_access_token()
+        metrics.observe('search_engine_warm_up_seconds', time.monotonic() - started)
+        self.warmed.set()
+
+    def show_status(self):
+        """Display the status of all configured APIs"""
+        print("API CONFIGURATION STATUS:")
+        print("-" * 50)
+
+        # Required APIs
+        print(f"   Gemini AI: Configured")
+
+        # Optional APIs
+        apis = providers.status()
+
+        for name, configured in apis:
+            status = "Configured" if configured else "Not configured"
+            print(f"   {status}: {name}")
+
+        configured_count = sum(1 for _, configured in apis if configured) + 1
+        print(f"\n  Total APIs configured: {configured_count}/{len(apis) + 1}")
+        print()
+
+    @tracing.traced('search')
+    def search(self, prompt, deadline=None, since=None, verbose=True):
+        """
+        Search for links across all configured providers
+
+        deadline is an optional time budget in seconds (or a Deadline). Sources
+        still running when it expires are abandoned; the returned list carries a
+        `complete` dict saying which sources answered in full.
+
+        since (a datetime, or {provider: datetime}) restricts the search to
+        items newer than that; providers without a date filter are skipped.
+        verbose=False leaves out the printed analysis and results.
+        """
+        print(f"\nSearching for: '{prompt}'")
+        tracing.annotate(query=prompt, deadline=deadline)
+        started = time.monotonic()
+        budget = deadline if isinstance(deadline, Deadline) else Deadline(deadline)
+
+        # Step 1: Analyze with Gemini (bounded to a share of the budget)
+        analysis, analyzed = run_with_deadline(
+            lambda: analyze_prompt_with_gemini(prompt, self.model),
+            budget.child(ANALYSIS_BUDGET_SHARE)
+        )
+        if not analyzed:
+            print("Prompt analysis did not finish in time, searching with the raw prompt")
+            analysis = fallback_analysis(prompt)
+        if verbose:
+            print_analysis(analysis)
+
+        # Step 2: Search across multiple platforms
+        print("\nSearching across multiple platforms...")
+
+        # Every configured provider is asked; the query budget decides how many of its queries are sent
+        searches = {provider.name: provider for provider in providers.select(since)}
+
+        # Providers run concurrently; whatever has arrived when the budget runs out is kept
+        # Extra queries go to the providers whose extra queries have paid off before
+        plan = query_budget.SearchPlan(
+            {name: providers.queries_for(provider, analysis, prompt) for name, provider in searches.items()},
+            costs={name: provider.cost for name, provider in searches.items()},
+        )
+        progress = {name: {'results': [], 'calls': 0, 'skipped': False, 'failed': False} for name in searches}
+        tasks = {
+            name: partial(providers.run_queries, name, plan.queries_for(name), round(provider.limit * SEARCH_OVERFETCH),
+                          progress[name], plan, since=since.get(name) if isinstance(since, dict) else since)
+            for name, provider in searches.items()
+        }
+        _, finished = run_all(tasks, budget, executor=self.pool)
+        # Abandoned providers keep running; work from a copy of what had arrived by now
+        progress = {name: dict(state, results=list(state['results'])) for name, state in progress.items()}
+
+        all_results = []
+        complete = {}
+        for name, state in progress.items():
+            all_results.extend(state['results'])
+            # A source that failed is incomplete even though its task returned
+            complete[name] = finished[name] and not state['skipped'] and not state['failed']
+        search_count = sum(state['calls'] for state in progress.values())
+
+        print(f"Completed {search_count} API calls ({plan.summary()})")
+        incomplete = [name for name, done in complete.items() if not done]
+        if incomplete:
+            print(f"Partial results (incomplete sources: {', '.join(incomplete)})")
+
+        # Step 3: Remove duplicates and filter
+        seen_urls = set()
+        unique_results = []
+
+        for result in all_results:
+            url = result.get('url', '')
+            if url and url not in seen_urls and len(url) > 10:
+                seen_urls.add(url)
+                unique_results.append(result)
+
+        # Step 4: Rank by similarity to the prompt, blended with each provider's popularity signal
+        relevance_query = ' '.join([prompt] + [str(topic) for topic in analysis.get('main_topics', [])])
+        ranked = relevance.rerank(relevance_query, unique_results, providers.popularity, limit=30)
+        plan.record(ranked)
+
+        # Step 5: Show results (top 30)
+        final_results = PartialResults(ranked, complete)
+        if verbose:
+            print_results(final_results)
+        metrics.observe('search_seconds', time.monotonic() - started)
+        tracing.annotate(results=len(final_results), complete=final_results.is_complete)
+
+        return final_results
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get():
+    """The process's SearchEngine, built on first use"""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = SearchEngine()
+        return _engine
+
+
+def search_for_links(prompt, deadline=None, since=None):
+    """Main function to search for links across all platforms (see SearchEngine.search)"""
+    return get().search(prompt, deadline, since)
+
+
+def show_api_status():
+    """Display the status of all configured APIs"""
+    get().show_status()
@@ -1,41 +1,262 @@
 # server.py
-import os, json, re, requests
-from flask import Flask, request, jsonify
+import os, json, time, gzip, zlib
+from flask import Flask, Response, g, request, jsonify
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
 from datetime import datetime
 
-from gemini import analyze_prompt_with_gemini
-from google.generativeai import GenerativeModel
+try:
+    import orjson
+except ImportError:  # stdlib encoder, slower but equivalent output
+    orjson = None
+
+from gemini import analyze_prompt_with_gemini, fallback_analysis, generate_text
+from deadline import Deadline, run_all
+from deadline import call as run_with_deadline
+import incremental
+import metrics
+import prefetch
+import providers
+import resource_index
+import search_engine
+import resilience
+import tracing
 
 GEMINI_MODEL = os.environ.get("GEMINI_MODEL", "gemini-1.5-flash")
-UA = os.environ.get("HTTP_USER_AGENT", "gd-research-lab/1.0 (+local)")
+# Default time budget per request in seconds; callers may override it
+API_DEADLINE_SECONDS = os.environ.get("API_DEADLINE_SECONDS")
+# How the budget is split: prompt analysis, then upstream sources, rest for the summary
+ANALYSIS_BUDGET_SHARE = 0.25
+SOURCES_BUDGET_SHARE = 0.6
+# Upper bound for "max_papers" in /api/literature (OpenAlex works per request)
+MAX_PAPERS = int(os.environ.get("MAX_PAPERS", "2000"))
+# Papers shown to Gemini when organizing the literature; the response still lists them all
+PROMPT_PAPERS = int(os.environ.get("PROMPT_PAPERS", "30"))
+# /api/* responses are gzipped for clients that accept it, except tiny ones
+GZIP_MIN_BYTES = int(os.environ.get("GZIP_MIN_BYTES", "1024"))
+GZIP_LEVEL = int(os.environ.get("GZIP_LEVEL", "5"))
+# Streamed arrays are flushed to the client in chunks of about this size
+STREAM_CHUNK_BYTES = 64 * 1024
+# PREFETCH=1: every /api/critique also starts the later stages for the same idea
+# in the background (a request can opt in with "prefetch": true instead)
+PREFETCH = os.environ.get("PREFETCH") == "1"
+PREFETCH_DEADLINE_SECONDS = os.environ.get("PREFETCH_DEADLINE_SECONDS", API_DEADLINE_SECONDS)
+# Body fields a follow-up request may carry and still use a prefetched result
+PREFETCHABLE_FIELDS = {"idea", "deadline", "stream", "prefetch"}
+
+
+def _dumps(obj):
+    """Compact JSON as UTF-8 bytes, through orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=str, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """jsonify() via _dumps: no key sorting, no str round trip for responses"""
+
+    sort_keys = False
+
+    def dumps(self, obj, **kwargs):
+        return _dumps(obj).decode("utf-8")
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(_dumps(obj), mimetype=self.mimetype)
+
 
 app = Flask(__name__)
+# Same engine as the CLI: built once per process, warmed up in the background
+engine = search_engine.get()
+engine.warm_up(background=True)
+app.json = FastJSONProvider(app)
 CORS(app, resources={r"/api/*": {"origins": "*"}}, supports_credentials=True)
 
 
+@app.before_request
+def _start_timer():
+    g.request_started = time.monotonic()
+    g.trace_span = tracing.span(f"api {request.path}", method=request.method)
+    g.trace_span.__enter__()
+
+
+@app.teardown_request
+def _end_span(error=None):
+    trace_span = g.pop("trace_span", None)
+    if trace_span is not None:
+        trace_span.__exit__(None, None, None)
+
+
+@app.after_request
+def _record_request(response):
+    endpoint = request.url_rule.rule if request.url_rule else "unmatched"
+    metrics.inc("http_requests_total", endpoint=endpoint, status=response.status_code)
+    started = getattr(g, "request_started", None)
+    if started is not None:
+        metrics.observe("http_request_seconds", time.monotonic() - started, endpoint=endpoint)
+    return response
+
+
+def _gzip_stream(chunks):
+    # Sync-flush after every chunk so the client can decode as data arrives
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode("utf-8")
+        yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
+
+
+@app.after_request
+def _compress(response):
+    if (
+        not request.path.startswith("/api/")
+        or response.status_code < 200
+        or response.status_code in (204, 304)
+        or "Content-Encoding" in response.headers
+    ):
+        return response
+    response.vary.add("Accept-Encoding")
+    if request.accept_encodings["gzip"] <= 0:
+        return response
+    if response.is_streamed:
+        response.response = _gzip_stream(response.response)
+        response.headers.pop("Content-Length", None)
+    else:
+        data = response.get_data()
+        if len(data) < GZIP_MIN_BYTES:
+            return response
+        response.set_data(gzip.compress(data, GZIP_LEVEL, mtime=0))
+    response.headers["Content-Encoding"] = "gzip"
+    return response
+
+
+def _wants_stream(body=None):
+    """Streaming is opted into with "stream": true in the JSON body or ?stream=1"""
+    return bool((body or {}).get("stream")) or request.args.get("stream") in ("1", "true")
+
+
+def _json_response(payload, stream_key=None, stream=False):
+    """
+    jsonify(payload), or with stream=True a response that writes
+    payload[stream_key] (any iterable) one element at a time, so a large
+    array is never encoded in one piece before the first byte goes out
+    """
+    if not stream or stream_key not in payload:
+        return jsonify(payload)
+    head = {key: value for key, value in payload.items() if key != stream_key}
+    items = payload[stream_key]
+
+    def generate():
+        buffer = bytearray(_dumps(head)[:-1])
+        if head:
+            buffer += b","
+        buffer += _dumps(stream_key) + b":["
+        for i, item in enumerate(items):
+            if i:
+                buffer += b","
+            buffer += _dumps(item)
+            if len(buffer) >= STREAM_CHUNK_BYTES:
+                yield bytes(buffer)
+                buffer.clear()
+        buffer += b"]}"
+        yield bytes(buffer)
+
+    return app.response_class(generate(), mimetype="application/json")
+
+
+@app.get("/api/metrics")
+def metrics_endpoint():
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+
+@app.get("/api/trace")
+def trace_endpoint():
+    """Spans recorded so far as Chrome trace JSON (needs TRACING=1 or TRACE_FILE)"""
+    return jsonify(tracing.to_chrome_trace())
+
+
+prefetcher = prefetch.Prefetcher()
+
+
+@app.get("/api/prefetch")
+def prefetch_stats():
+    """Prefetch outcomes so far, with hit and waste ratios"""
+    return jsonify({"enabled": PREFETCH, **prefetcher.stats()})
+
+
+@app.delete("/api/prefetch")
+def prefetch_cancel():
+    """Cancel the background stages started for an idea ({"idea": ...} or ?idea=)"""
+    idea = ((request.get_json(silent=True) or {}).get("idea") or request.args.get("idea") or "").strip()
+    if not idea:
+        return jsonify({"error": "idea is required"}), 400
+    return jsonify({"cancelled": prefetcher.cancel(prefetch.idea_key(idea))})
+
+
+def _prefetched(stage, idea, body, budget=None):
+    """(True, payload) when a prefetch for this exact request is available"""
+    if not set(body) <= PREFETCHABLE_FIELDS:
+        return False, None
+    return prefetcher.take(stage, prefetch.idea_key(idea), budget.remaining() if budget else None)
+
+
 @app.get("/api/health")
 def health():
-    return jsonify({"ok": True, "time": datetime.utcnow().isoformat() + "Z"})
-
-
-def _http_json(url, params=None, timeout=15):
-    r = requests.get(url, params=params, headers={"User-Agent": UA}, timeout=timeout)
-    r.raise_for_status()
-    return r.json()
-
-
-def _call_gemini_json(prompt: str):
-    gm = GenerativeModel(GEMINI_MODEL)
-    resp = gm.generate_content(prompt)
-    txt = getattr(resp, "text", None)
-    if not txt and getattr(resp, "candidates", None):
-        for c in resp.candidates:
-            if getattr(c, "content", None) and getattr(c.content, "parts", None):
-                maybe = "".join(getattr(p, "text", "") for p in c.content.parts)
-                if maybe:
-                    txt = maybe
-                    break
+    return jsonify(
+        {
+            "ok": True,
+            "time": datetime.utcnow().isoformat() + "Z",
+            "providers": resilience.health_report(),
+        }
+    )
+
+
+@app.get("/api/resources/search")
+def resources_search():
+    """Search resources from past research collections (?q=...&source=...&topic=...&limit=...)"""
+    q = (request.args.get("q") or "").strip()
+    if not q:
+        return jsonify({"error": "q is required"}), 400
+    try:
+        limit = max(1, min(int(request.args.get("limit", 10)), 100))
+    except ValueError:
+        limit = 10
+    hits = resource_index.search(q, limit, request.args.get("source"), request.args.get("topic"))
+    return _json_response({"query": q, "results": hits}, "results", _wants_stream())
+
+
+@app.post("/api/search")
+def search():
+    """Multi-source link search as in the CLI ({"query": ..., optional "deadline" and "since"})"""
+    body = request.get_json() or {}
+    query = (body.get("query") or "").strip()
+    if not query:
+        return jsonify({"error": "query is required"}), 400
+    results = engine.search(query, _request_deadline(body), _request_since(body), verbose=False)
+    payload = {"query": query, "complete": results.complete, "results": list(results)}
+    return _json_response(payload, "results", _wants_stream(body))
+
+
+def _request_deadline(body):
+    """Deadline from the JSON body ("deadline": seconds) or X-Deadline-Seconds header"""
+    seconds = body.get("deadline") or request.headers.get("X-Deadline-Seconds") or API_DEADLINE_SECONDS
+    try:
+        return Deadline(float(seconds)) if seconds else Deadline()
+    except (TypeError, ValueError):
+        return Deadline()
+
+
+def _analyze_within(idea, budget):
+    """Prompt analysis bounded to its share of the budget; falls back to the raw idea"""
+    analysis, analyzed = run_with_deadline(
+        lambda: analyze_prompt_with_gemini(idea), budget.child(ANALYSIS_BUDGET_SHARE)
+    )
+    return (analysis if analyzed else fallback_analysis(idea)), analyzed
+
+
+def _call_gemini_json(prompt: str, stage: str):
+    txt = generate_text(prompt, stage, GEMINI_MODEL)
     if not txt:
         return {}
     t = txt.strip()
@@ -54,10 +275,25 @@ def _call_gemini_json(prompt: str):
 # ---------- STEP 1: Critique ----------
 @app.post("/api/critique")
 def critique():
-    idea = (request.get_json() or {}).get("idea", "").strip()
+    body = request.get_json() or {}
+    idea = body.get("idea", "").strip()
     if not idea:
         return jsonify({"error": "idea is required"}), 400
 
+    if PREFETCH or body.get("prefetch"):
+        # The frontend asks for these next; start them while the critique runs
+        prefetcher.start(
+            prefetch.idea_key(idea),
+            {
+                "literature": lambda budget: _literature_payload(idea, budget),
+                "community": lambda budget: _community_payload(idea, budget),
+                # Bounded like the stages above, so cancel, TTL expiry and eviction stop them too
+                "directions": lambda budget: run_with_deadline(lambda: _directions_payload(idea), budget)[0],
+                "draft": lambda budget: run_with_deadline(lambda: _draft_payload(idea), budget)[0],
+            },
+            float(PREFETCH_DEADLINE_SECONDS) if PREFETCH_DEADLINE_SECONDS else None,
+        )
+
     analysis = analyze_prompt_with_gemini(idea)
     prompt = f"""
 Return ONLY JSON (no prose) with this exact structure:
@@ -71,7 +307,7 @@ Return ONLY JSON (no prose) with this exact structure:
 }}
 Research idea: "{idea}"
 """
-    out = _call_gemini_json(prompt) or {}
+    out = _call_gemini_json(prompt, "critique") or {}
     out.setdefault("meta", {})
     out["meta"].setdefault("title", idea[:120])
     out["meta"].setdefault("description", "Automated critique & scoring from Gemini.")
@@ -80,65 +316,58 @@ Research idea: "{idea}"
 
 
 # ---------- STEP 2: Literature ----------
+def _request_since(body):
+    """Optional "since" (ISO date/time) in the JSON body: only return newer items"""
+    try:
+        return incremental.parse_since(body.get("since"))
+    except ValueError:
+        return None
+
+
+def _papers(provider, query, since=None, limit=10, **options):
+    return [
+        {"title": p["title"], "venue": p.get("venue", ""), "year": p.get("year", ""), "link": p["url"]}
+        for p in providers.call(provider, query, limit, since=since, **options)
+    ]
+
+
 @app.post("/api/literature")
 def literature():
-    idea = (request.get_json() or {}).get("idea", "").strip()
+    body = request.get_json() or {}
+    idea = body.get("idea", "").strip()
     if not idea:
         return jsonify({"error": "idea is required"}), 400
 
-    analysis = analyze_prompt_with_gemini(idea)
+    budget = _request_deadline(body)
+    hit, payload = _prefetched("literature", idea, body, budget)
+    if not hit:
+        try:
+            max_papers = max(1, min(int(body.get("max_papers") or 10), MAX_PAPERS))
+        except (TypeError, ValueError):
+            max_papers = 10
+        payload = _literature_payload(idea, budget, _request_since(body), max_papers)
+    return _json_response(payload, "key_papers", _wants_stream(body))
+
+
+def _literature_payload(idea, budget, since=None, max_papers=10):
+    analysis, analyzed = _analyze_within(idea, budget)
     query = " ".join(
         analysis.get("academic_terms")
         or analysis.get("search_terms")
         or [idea]
     )
 
-    # OpenAlex (papers)
-    key_papers = []
-    try:
-        j = _http_json(
-            "https://api.openalex.org/works",
-            {"search": query, "per_page": 10, "sort": "relevance_score:desc"},
-        )
-        for w in j.get("results", []):
-            key_papers.append(
-                {
-                    "title": w.get("display_name"),
-                    "venue": (w.get("host_venue") or {}).get("display_name") or "",
-                    "year": w.get("publication_year") or "",
-                    "link": (w.get("primary_location") or {}).get("landing_page_url")
-                    or w.get("id"),
-                }
-            )
-    except Exception as e:
-        print("OpenAlex error:", e)
-
-    # arXiv (Atom feed -> quick parse for title/link)
-    try:
-        r = requests.get(
-            "http://export.arxiv.org/api/query",
-            params={"search_query": f"all:{query}", "start": 0, "max_results": 10},
-            headers={"User-Agent": UA},
-            timeout=15,
-        )
-        if r.ok:
-            entries = re.findall(r"<entry>(.*?)</entry>", r.text, flags=re.S)
-            for e in entries:
-                t = re.search(r"<title>(.*?)</title>", e, flags=re.S)
-                l = re.search(
-                    r'<link rel="alternate" type="text/html" href="(.*?)"', e
-                )
-                if t:
-                    key_papers.append(
-                        {
-                            "title": re.sub(r"\s+", " ", t.group(1)).strip(),
-                            "venue": "arXiv",
-                            "year": "",
-                            "link": l.group(1) if l else "",
-                        }
-                    )
-    except Exception as e:
-        print("arXiv error:", e)
+    # OpenAlex + arXiv in parallel; keep whatever arrives in time
+    found, complete = run_all(
+        {
+            # Up to MAX_PAPERS works: most relevant first, and no abstracts since only metadata is returned
+            "openalex": lambda: _papers("OpenAlex", query, since, max_papers,
+                                        sort="relevance_score:desc", abstracts=False),
+            "arxiv": lambda: _papers("arXiv", query, since),
+        },
+        budget.child(SOURCES_BUDGET_SHARE),
+    )
+    key_papers = found.get("openalex", []) + found.get("arxiv", [])
 
     # Ask Gemini to organize the head (questions/gaps/etc.) based on idea + papers
     organize_prompt = f"""
@@ -149,69 +378,58 @@ Return ONLY JSON with:
   "trends": [], "major_gaps": [], "emerging_trends": [], "opportunities": []
 }}
 Idea: "{idea}"
-Papers: {json.dumps(key_papers, ensure_ascii=False)}
+Papers: {json.dumps([p["title"] for p in key_papers[:PROMPT_PAPERS]], ensure_ascii=False)}
 """
-    head = _call_gemini_json(organize_prompt) or {}
+    head, complete["summary"] = run_with_deadline(lambda: _call_gemini_json(organize_prompt, "literature"), budget)
+    head = head or {}
     head.setdefault("meta", {})
     head["meta"].setdefault("title", f"Literature & Resources for: {idea}")
     head["meta"].setdefault("description", "Auto-curated snapshot.")
     head["meta"].setdefault("domain", ", ".join(analysis.get("main_topics", []) or ["general"]))
 
-    return jsonify(
-        {
-            **head,
-            "key_papers": key_papers,
-            "datasets": [],  # plug a dataset API here if you have one
-            "tools": ["PyTorch", "scikit-learn", "HuggingFace", "Weights & Biases"],
-            "venues": ["NeurIPS", "ICLR", "ICML", "KDD", "Nature"],
-        }
-    )
+    return {
+        **head,
+        "datasets": [],  # plug a dataset API here if you have one
+        "tools": ["PyTorch", "scikit-learn", "HuggingFace", "Weights & Biases"],
+        "venues": ["NeurIPS", "ICLR", "ICML", "KDD", "Nature"],
+        "completeness": {"analysis": analyzed, **complete},
+        "key_papers": key_papers,
+    }
 
 
 # ---------- STEP 3: Community Trends ----------
+def _threads(provider, q, since=None):
+    # Reddit results carry their discussion page; other sources link the story itself
+    return [
+        {"title": t["title"], "link": t.get("permalink") or t["url"]}
+        for t in providers.call(provider, q, 10, since=since)
+    ]
+
+
 @app.post("/api/community")
 def community():
-    idea = (request.get_json() or {}).get("idea", "").strip()
+    body = request.get_json() or {}
+    idea = body.get("idea", "").strip()
     if not idea:
         return jsonify({"error": "idea is required"}), 400
 
-    analysis = analyze_prompt_with_gemini(idea)
+    budget = _request_deadline(body)
+    hit, payload = _prefetched("community", idea, body, budget)
+    if not hit:
+        payload = _community_payload(idea, budget, _request_since(body))
+    return jsonify(payload)
+
+
+def _community_payload(idea, budget, since=None):
+    analysis, analyzed = _analyze_within(idea, budget)
     q = " ".join(analysis.get("reddit_queries") or analysis.get("search_terms") or [idea])
 
-    # Reddit (no-auth JSON)
-    reddit = []
-    try:
-        r = requests.get(
-            "https://www.reddit.com/search.json",
-            params={"q": q, "sort": "relevance", "t": "year", "limit": 10},
-            headers={"User-Agent": UA},
-            timeout=15,
-        )
-        if r.ok:
-            data = r.json()
-            for ch in data.get("data", {}).get("children", []):
-                d = ch.get("data", {})
-                if d.get("title") and d.get("permalink"):
-                    reddit.append(
-                        {"title": d["title"], "link": f"https://www.reddit.com{d['permalink']}"}
-                    )
-    except Exception as e:
-        print("Reddit error:", e)
-
-    # Hacker News (Algolia)
-    hn = []
-    try:
-        j = _http_json(
-            "https://hn.algolia.com/api/v1/search",
-            {"query": q, "tags": "story", "hitsPerPage": 10},
-        )
-        for h in j.get("hits", []):
-            title = h.get("title")
-            url = h.get("url") or f"https://news.ycombinator.com/item?id={h.get('objectID')}"
-            if title and url:
-                hn.append({"title": title, "link": url})
-    except Exception as e:
-        print("HN error:", e)
+    found, complete = run_all(
+        {"reddit": lambda: _threads("Reddit", q, since), "hn": lambda: _threads("Hacker News", q, since)},
+        budget.child(SOURCES_BUDGET_SHARE),
+    )
+    reddit = found.get("reddit", [])
+    hn = found.get("hn", [])
 
     # Trend summary from titles via Gemini
     trend_prompt = f"""
@@ -219,18 +437,28 @@ Return ONLY JSON {{"trends":[]}} summarizing recurring themes from these thread
 Reddit: {json.dumps([t['title'] for t in reddit], ensure_ascii=False)}
 HN: {json.dumps([t['title'] for t in hn], ensure_ascii=False)}
 """
-    trends = _call_gemini_json(trend_prompt).get("trends", []) or []
+    summary, complete["summary"] = run_with_deadline(lambda: _call_gemini_json(trend_prompt, "community"), budget)
+    trends = (summary or {}).get("trends", []) or []
 
-    return jsonify({"trends": trends, "threads": {"reddit": reddit, "hn": hn}})
+    return {
+        "trends": trends,
+        "threads": {"reddit": reddit, "hn": hn},
+        "completeness": {"analysis": analyzed, **complete},
+    }
 
 
 # ---------- STEP 4: Directions & Resources ----------
 @app.post("/api/directions")
 def directions():
-    idea = (request.get_json() or {}).get("idea", "").strip()
+    body = request.get_json() or {}
+    idea = body.get("idea", "").strip()
     if not idea:
         return jsonify({"error": "idea is required"}), 400
+    hit, payload = _prefetched("directions", idea, body)
+    return jsonify(payload if hit else _directions_payload(idea))
+
 
+def _directions_payload(idea):
     prompt = f"""
 Return ONLY JSON with:
 {{
@@ -245,16 +473,21 @@ Return ONLY JSON with:
 }}
 Idea: "{idea}"
 """
-    return jsonify(_call_gemini_json(prompt) or {})
+    return _call_gemini_json(prompt, "directions") or {}
 
 
 # ---------- STEP 5: Draft Outline ----------
 @app.post("/api/draft")
 def draft():
-    idea = (request.get_json() or {}).get("idea", "").strip()
+    body = request.get_json() or {}
+    idea = body.get("idea", "").strip()
     if not idea:
         return jsonify({"error": "idea is required"}), 400
+    hit, payload = _prefetched("draft", idea, body)
+    return jsonify(payload if hit else _draft_payload(idea))
+
 
+def _draft_payload(idea):
     prompt = f"""
 Return ONLY JSON:
 {{
@@ -271,7 +504,7 @@ Return ONLY JSON:
 }}
 Idea: "{idea}"
 """
-    return jsonify(_call_gemini_json(prompt) or {})
+    return _call_gemini_json(prompt, "draft") or {}
 
 
 if __name__ == "__main__":
@@ -0,0 +1,360 @@
+"""
+SQLite store for research history.
+
+Every collected (or refreshed) resource package, critique and paper
+draft is recorded in RESEARCH_DB (default research.db):
+
+    topics      one row per normalized topic
+    runs        one row per resource package (collect or refresh)
+    resources   one row per resource, indexed by source, URL and date
+    critiques   critique JSON with score/grade/verdict columns
+    drafts      direction analysis, paper template JSON and Markdown
+
+History questions ("latest package for this topic", "every GitHub repo
+collected this month") are index lookups instead of parsing every
+research_resources_*.json.  Writes for one package happen in a single
+transaction with executemany.  Set SAVE_FILES=0 to stop the workflow
+writing the timestamped JSON/Markdown files; `export` regenerates them
+in the same format when needed.
+
+    python storage.py import [directory]      load existing JSON/Markdown output
+    python storage.py topics
+    python storage.py runs "graph neural networks"
+    python storage.py resources --source GitHub --since 2025-09-01
+    python storage.py export <run id | topic> [--dir out/]
+"""
+import argparse
+import glob
+import json
+import os
+import re
+import sqlite3
+import threading
+from datetime import datetime
+
+RESEARCH_DB = os.environ.get('RESEARCH_DB', 'research.db')
+# Workflow still writes its timestamped files unless SAVE_FILES=0
+SAVE_FILES = os.environ.get('SAVE_FILES', '1') != '0'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS topics (
+    id INTEGER PRIMARY KEY,
+    topic_key TEXT NOT NULL UNIQUE,
+    topic TEXT NOT NULL,
+    created_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    topic_id INTEGER NOT NULL REFERENCES topics(id),
+    kind TEXT NOT NULL,
+    collected_at TEXT NOT NULL,
+    total_resources INTEGER NOT NULL,
+    meta TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS resources (
+    id INTEGER PRIMARY KEY,
+    run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    category TEXT NOT NULL,
+    source TEXT,
+    title TEXT,
+    url TEXT,
+    collected_at TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS critiques (
+    id INTEGER PRIMARY KEY,
+    topic_id INTEGER NOT NULL REFERENCES topics(id),
+    created_at TEXT NOT NULL,
+    overall_score REAL,
+    grade TEXT,
+    verdict TEXT,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS drafts (
+    id INTEGER PRIMARY KEY,
+    topic_id INTEGER NOT NULL REFERENCES topics(id),
+    run_id INTEGER REFERENCES runs(id),
+    created_at TEXT NOT NULL,
+    title TEXT,
+    direction TEXT,
+    template TEXT NOT NULL,
+    markdown TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_topic_date ON runs(topic_id, collected_at);
+CREATE INDEX IF NOT EXISTS resources_run ON resources(run_id, position);
+CREATE INDEX IF NOT EXISTS resources_source_date ON resources(source, collected_at);
+CREATE INDEX IF NOT EXISTS resources_date ON resources(collected_at);
+CREATE INDEX IF NOT EXISTS resources_url ON resources(url);
+CREATE INDEX IF NOT EXISTS critiques_topic_date ON critiques(topic_id, created_at);
+CREATE INDEX IF NOT EXISTS drafts_topic_date ON drafts(topic_id, created_at);
+"""
+
+_local = threading.local()
+
+
+def topic_key(topic):
+    return ' '.join(str(topic).lower().split())
+
+
+def connect(path=None):
+    """Per-thread connection (WAL, so batch workers can read while one writes)"""
+    path = path or RESEARCH_DB
+    connections = getattr(_local, 'connections', None)
+    if connections is None:
+        connections = _local.connections = {}
+    if path not in connections:
+        conn = sqlite3.connect(path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA foreign_keys=ON')
+        conn.executescript(SCHEMA)
+        connections[path] = conn
+    return connections[path]
+
+
+def _topic_id(conn, topic, created_at):
+    key = topic_key(topic)
+    conn.execute('INSERT OR IGNORE INTO topics (topic_key, topic, created_at) VALUES (?, ?, ?)',
+                 (key, topic, created_at))
+    return conn.execute('SELECT id FROM topics WHERE topic_key = ?', (key,)).fetchone()[0]
+
+
+def save_package(package, kind='collect', path=None):
+    """Store a research package and all its resources in one transaction; returns the run id"""
+    conn = connect(path)
+    info = package.get('research_info') or {}
+    collected_at = package.get('collection_timestamp') or datetime.now().isoformat()
+    meta = {k: v for k, v in package.items() if k != 'resources'}
+    categories = list((package.get('resources') or {}).keys())
+    meta['categories'] = categories
+    with conn:
+        topic_id = _topic_id(conn, info.get('topic', ''), collected_at)
+        run_id = conn.execute(
+            'INSERT INTO runs (topic_id, kind, collected_at, total_resources, meta) VALUES (?, ?, ?, ?, ?)',
+            (topic_id, kind, collected_at, package.get('total_resources', 0), json.dumps(meta, ensure_ascii=False)),
+        ).lastrowid
+        rows = (
+            (run_id, position, category, r.get('source'), r.get('title'), r.get('url'), collected_at,
+             json.dumps(r, ensure_ascii=False))
+            for category in categories
+            for position, r in enumerate(package['resources'][category])
+        )
+        conn.executemany(
+            'INSERT INTO resources (run_id, position, category, source, title, url, collected_at, data) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?)', rows)
+    return run_id
+
+
+def save_critique(research_data, critique, created_at=None, path=None):
+    conn = connect(path)
+    created_at = created_at or datetime.now().isoformat()
+    with conn:
+        topic_id = _topic_id(conn, research_data.get('topic', ''), created_at)
+        return conn.execute(
+            'INSERT INTO critiques (topic_id, created_at, overall_score, grade, verdict, data) VALUES (?, ?, ?, ?, ?, ?)',
+            (topic_id, created_at, critique.get('overall_score'), critique.get('grade'), critique.get('verdict'),
+             json.dumps(critique, ensure_ascii=False)),
+        ).lastrowid
+
+
+def save_draft(topic, template, markdown, direction=None, created_at=None, path=None, run_id=None):
+    """
+    Store a paper template/draft, linked to run_id or else to the topic's
+    newest resource run collected no later than the draft
+    """
+    conn = connect(path)
+    created_at = created_at or datetime.now().isoformat()
+    with conn:
+        topic_id = _topic_id(conn, topic, created_at)
+        if run_id is None:
+            run = conn.execute('SELECT id FROM runs WHERE topic_id = ? AND collected_at <= ? '
+                               'ORDER BY collected_at DESC LIMIT 1', (topic_id, created_at)).fetchone()
+            run_id = run[0] if run else None
+        return conn.execute(
+            'INSERT INTO drafts (topic_id, run_id, created_at, title, direction, template, markdown) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?)',
+            (topic_id, run_id, created_at, template.get('title'),
+             json.dumps(direction, ensure_ascii=False) if direction is not None else None,
+             json.dumps(template, ensure_ascii=False), markdown),
+        ).lastrowid
+
+
+def load_package(run_id, path=None):
+    """Rebuild the package dict exactly as it was saved"""
+    conn = connect(path)
+    run = conn.execute('SELECT meta FROM runs WHERE id = ?', (run_id,)).fetchone()
+    if run is None:
+        return None
+    package = json.loads(run['meta'])
+    resources = {category: [] for category in package.pop('categories', [])}
+    for row in conn.execute('SELECT category, data FROM resources WHERE run_id = ? ORDER BY category, position',
+                            (run_id,)):
+        resources.setdefault(row['category'], []).append(json.loads(row['data']))
+    # Keep the original key order of the JSON file
+    ordered = {'research_info': package.pop('research_info', {}), 'resources': resources}
+    ordered.update(package)
+    return ordered
+
+
+def latest_run(topic, path=None):
+    """Row (id, collected_at, kind, total_resources) of the newest run for topic, or None"""
+    return connect(path).execute(
+        'SELECT runs.id, runs.collected_at, runs.kind, runs.total_resources FROM runs '
+        'JOIN topics ON topics.id = runs.topic_id WHERE topics.topic_key = ? '
+        'ORDER BY runs.collected_at DESC LIMIT 1', (topic_key(topic),)).fetchone()
+
+
+def latest_package(topic, path=None):
+    """(run id, package) of the newest stored package for topic, or (None, None)"""
+    run = latest_run(topic, path)
+    return (run['id'], load_package(run['id'], path)) if run else (None, None)
+
+
+def topics(path=None):
+    return connect(path).execute(
+        'SELECT topics.topic, COUNT(runs.id) AS runs, MAX(runs.collected_at) AS last_collected FROM topics '
+        'LEFT JOIN runs ON runs.topic_id = topics.id GROUP BY topics.id ORDER BY last_collected DESC').fetchall()
+
+
+def runs(topic=None, path=None):
+    sql = ('SELECT runs.id, topics.topic, runs.kind, runs.collected_at, runs.total_resources FROM runs '
+           'JOIN topics ON topics.id = runs.topic_id')
+    args = ()
+    if topic:
+        sql += ' WHERE topics.topic_key = ?'
+        args = (topic_key(topic),)
+    return connect(path).execute(sql + ' ORDER BY runs.collected_at DESC', args).fetchall()
+
+
+def resources(topic=None, source=None, since=None, limit=100, path=None):
+    """Stored resources, newest first, one row per URL"""
+    sql = ('SELECT resources.source, resources.title, resources.url, MAX(resources.collected_at) AS collected_at, '
+           'topics.topic FROM resources JOIN runs ON runs.id = resources.run_id '
+           'JOIN topics ON topics.id = runs.topic_id WHERE 1 = 1')
+    args = []
+    if topic:
+        sql += ' AND topics.topic_key = ?'
+        args.append(topic_key(topic))
+    if source:
+        sql += ' AND resources.source = ?'
+        args.append(source)
+    if since:
+        sql += ' AND resources.collected_at >= ?'
+        args.append(since)
+    sql += ' GROUP BY resources.url ORDER BY collected_at DESC LIMIT ?'
+    args.append(limit)
+    return connect(path).execute(sql, args).fetchall()
+
+
+def _stamp(timestamp):
+    return datetime.fromisoformat(timestamp).strftime('%Y%m%d_%H%M%S')
+
+
+def export(run_or_topic, directory='.', path=None):
+    """Write a run (by id, or a topic's latest) and its drafts in the workflow's file formats"""
+    conn = connect(path)
+    if str(run_or_topic).isdigit():
+        run_id = int(run_or_topic)
+    else:
+        run = latest_run(run_or_topic, path)
+        run_id = run['id'] if run else None
+    package = load_package(run_id, path) if run_id is not None else None
+    if package is None:
+        return []
+    os.makedirs(directory, exist_ok=True)
+    written = []
+    filename = os.path.join(directory, f"research_resources_{_stamp(package['collection_timestamp'])}.json")
+    with open(filename, 'w', encoding='utf-8') as f:
+        json.dump(package, f, indent=2, ensure_ascii=False)
+    written.append(filename)
+    for draft in conn.execute('SELECT created_at, template, markdown FROM drafts WHERE run_id = ?', (run_id,)):
+        stamp = _stamp(draft['created_at'])
+        paper = os.path.join(directory, f"research_paper_draft_{stamp}.md")
+        with open(paper, 'w', encoding='utf-8') as f:
+            f.write(draft['markdown'])
+        template = os.path.join(directory, f"paper_template_{stamp}.json")
+        with open(template, 'w', encoding='utf-8') as f:
+            json.dump(json.loads(draft['template']), f, indent=2, ensure_ascii=False)
+        written.extend([paper, template])
+    return written
+
+
+def _file_time(path):
+    match = re.search(r'(\d{8}_\d{6})', os.path.basename(path))
+    return datetime.strptime(match.group(1), '%Y%m%d_%H%M%S').isoformat() if match else None
+
+
+def import_files(directory='.', path=None):
+    """Load existing research_resources_*.json / paper_template_*.json output into the store"""
+    conn = connect(path)
+    known = {row[0] for row in conn.execute('SELECT collected_at FROM runs')}
+    packages = drafts = 0
+    for filename in sorted(glob.glob(os.path.join(directory, 'research_resources_*.json'))):
+        with open(filename, 'r', encoding='utf-8') as f:
+            package = json.load(f)
+        if package.get('collection_timestamp') in known:
+            continue
+        save_package(package, 'refresh' if package.get('refresh_history') else 'collect', path)
+        packages += 1
+    known_drafts = {row[0] for row in conn.execute('SELECT created_at FROM drafts')}
+    for filename in sorted(glob.glob(os.path.join(directory, 'paper_template_*.json'))):
+        created_at = _file_time(filename)
+        markdown_file = filename.replace('paper_template_', 'research_paper_draft_')[:-len('.json')] + '.md'
+        if created_at in known_drafts or not os.path.exists(markdown_file):
+            continue
+        with open(filename, 'r', encoding='utf-8') as f:
+            template = json.load(f)
+        with open(markdown_file, 'r', encoding='utf-8') as f:
+            markdown = f.read()
+        # Attach to the package collected just before the draft
+        row = conn.execute('SELECT topics.topic, runs.id FROM runs JOIN topics ON topics.id = runs.topic_id '
+                           'WHERE runs.collected_at <= ? ORDER BY runs.collected_at DESC LIMIT 1',
+                           (created_at,)).fetchone()
+        save_draft(row[0] if row else template.get('title', ''), template, markdown, created_at=created_at, path=path,
+                   run_id=row[1] if row else None)
+        drafts += 1
+    return packages, drafts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query and export the research history database")
+    parser.add_argument('--db', default=None, help=f"database file (default {RESEARCH_DB})")
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('topics')
+    p = sub.add_parser('runs')
+    p.add_argument('topic', nargs='?')
+    p = sub.add_parser('resources')
+    p.add_argument('--topic')
+    p.add_argument('--source')
+    p.add_argument('--since', help="ISO date, e.g. 2025-09-01")
+    p.add_argument('--limit', type=int, default=50)
+    p = sub.add_parser('export')
+    p.add_argument('run', help="run id or topic (latest run)")
+    p.add_argument('--dir', default='.')
+    p = sub.add_parser('import')
+    p.add_argument('directory', nargs='?', default='.')
+    args = parser.parse_args()
+
+    if args.command == 'topics':
+        for row in topics(args.db):
+            print(f"{row['runs']:4} runs  last {str(row['last_collected'])[:16]}  {row['topic']}")
+    elif args.command == 'runs':
+        for row in runs(args.topic, args.db):
+            print(f"#{row['id']:<5} {row['collected_at'][:16]}  {row['kind']:<8} {row['total_resources']:4} resources  {row['topic']}")
+    elif args.command == 'resources':
+        for row in resources(args.topic, args.source, args.since, args.limit, args.db):
+            print(f"{row['collected_at'][:10]}  [{row['source']}] {row['title']}\n            {row['url']}")
+    elif args.command == 'export':
+        written = export(args.run, args.dir, args.db)
+        if not written:
+            print(f"No stored run for {args.run}")
+        for filename in written:
+            print(f"Wrote {filename}")
+    elif args.command == 'import':
+        packages, drafts = import_files(args.directory, args.db)
+        print(f"Imported {packages} resource package(s) and {drafts} draft(s)")
+
+
+if __name__ == '__main__':
+    main()
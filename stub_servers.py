@@ -0,0 +1,389 @@
+"""
+Local stand-ins for every upstream provider and for Gemini.
+
+One threaded HTTP server answers for all hosts: http_client rewrites
+https://api.github.com/search/repositories to
+<base>/api.github.com/search/repositories when UPSTREAM_BASE_URL is
+set, and gemini.generate_text posts to <base>/gemini/generate when
+GEMINI_BASE_URL is set.  Latency, jitter, error rate and payload size
+are configurable so benchmarks can reproduce slow or flaky sources.
+
+    python stub_servers.py --port 8765 --latency 0.2 --error-rate 0.05
+"""
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+
+def _h(text):
+    """Stable short id for a query so URLs repeat across runs"""
+    return zlib.crc32(text.encode("utf-8")) % 10000
+
+
+def _analysis(prompt):
+    return {
+        "main_topics": ["graph neural networks", "drug discovery"],
+        "search_terms": ["graph neural networks drug discovery"],
+        "related_concepts": ["molecular property prediction"],
+        "academic_terms": ["graph neural network molecular property prediction", "GNN drug-target interaction"],
+        "github_queries": ["graph neural network drug discovery", "molecule gnn"],
+        "reddit_queries": ["gnn drug discovery", "machine learning chemistry"],
+        "kaggle_queries": ["molecular dataset"],
+        "medium_queries": ["graph neural networks tutorial"],
+        "quora_queries": ["what are graph neural networks"],
+    }
+
+
+def _critique(prompt):
+    return {
+        "overall_score": 38,
+        "grade": "Good",
+        "scores": {"novelty": 6, "significance": 7, "feasibility": 7, "literature": 6, "clarity": 6, "success_potential": 6},
+        "strengths": ["Clear problem", "Available data", "Strong baselines"],
+        "weaknesses": ["Incremental", "Evaluation underspecified", "No ablations planned"],
+        "recommendations": ["Define metrics", "Add ablations", "Compare to SOTA"],
+        "brutal_feedback": "Solid but incremental. " * 20,
+        "verdict": "Major Revisions",
+        # server.py /api/critique shape
+        "meta": {"title": "Stub critique", "description": "", "domain": "ml"},
+        "reasons": {"noveltyReason": "", "feasibilityReason": "", "impactReason": ""},
+        "gaps": ["gap"], "suggestions": ["suggestion"],
+    }
+
+
+def _direction(prompt):
+    return {
+        "refined_research_focus": "Uncertainty-aware GNNs for property prediction",
+        "research_niche": "Low-data molecular regimes",
+        "key_gaps_identified": ["Calibration", "Scaffold splits", "Data scarcity"],
+        "methodological_approach": "Bayesian message passing with scaffold-split evaluation",
+        "expected_contributions": ["Benchmark", "Method", "Analysis"],
+        "research_timeline": {"phase_1": "Survey", "phase_2": "Method", "phase_3": "Evaluation"},
+        "key_papers_to_review": ["Paper A", "Paper B"],
+        "datasets_to_use": ["MoleculeNet"],
+        "collaboration_opportunities": ["Chemistry lab"],
+        "risk_assessment": ["Compute budget"],
+        "success_metrics": ["ROC-AUC", "ECE"],
+        "next_immediate_steps": ["Read", "Replicate", "Extend"],
+    }
+
+
+def _template(prompt):
+    sections = {
+        f"{i}_{key}": {"title": key.title(), "content": "Draft content. " * 40, "subsections": ["Background", "Details"]}
+        for i, key in enumerate(["introduction", "literature_review", "methodology", "results", "discussion", "conclusion"], 1)
+    }
+    return {
+        "title": "Stub Paper", "abstract": "Abstract. " * 30, "keywords": ["gnn", "molecules"],
+        "sections": sections, "figures_tables": ["Figure 1"], "reference_framework": ["By topic"],
+    }
+
+
+def _gemini_payload(prompt):
+    """Pick a plausible JSON answer from the shape the prompt asks for"""
+    if "EXCERPT:" in prompt or "PART SUMMARIES:" in prompt:
+        # Ingestion map/reduce steps answer in plain text
+        return f"Summary of {len(prompt)} prompt characters: methods, data and results."
+    if "Analyze this user prompt" in prompt:
+        body = _analysis(prompt)
+    elif "research committee" in prompt or '"scores"' in prompt:
+        body = _critique(prompt)
+    elif "paper template" in prompt:
+        body = _template(prompt)
+    elif "research direction analysis" in prompt:
+        body = _direction(prompt)
+    elif '"research_questions"' in prompt:
+        body = {"meta": {"title": "Stub literature", "description": "", "domain": "ml"},
+                "research_questions": ["RQ1"], "niches": [], "methodologies": [], "trends": [],
+                "major_gaps": [], "emerging_trends": [], "opportunities": []}
+    elif '"trends"' in prompt:
+        body = {"trends": ["Trend A", "Trend B"]}
+    elif '"directions"' in prompt:
+        body = {"summary": "Stub", "directions": ["D1"], "resources": {"tools": [], "checklists": [], "datasets": [], "papers": []}}
+    elif '"outline"' in prompt:
+        body = {"title": "Stub draft", "outline": [{"section": "Abstract", "bullets": ["b"]}]}
+    else:
+        body = {}
+    return "```json\n" + json.dumps(body) + "\n```"
+
+
+class StubConfig:
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, items=10, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.items = items
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+
+    def delay(self):
+        with self.lock:
+            self.requests += 1
+            jitter = self.random.uniform(-self.jitter, self.jitter) if self.jitter else 0.0
+            fail = self.random.random() < self.error_rate
+        time.sleep(max(0.0, self.latency + jitter))
+        return fail
+
+
+def _github(n, q):
+    return {"total_count": n, "items": [
+        {"full_name": f"stub/{q[:20].replace(' ', '-')}-{i}", "html_url": f"https://github.com/stub/repo-{_h(q)}-{i}",
+         "description": f"Repository {i} about {q}", "stargazers_count": 1000 - i * 7, "forks_count": 50 + i,
+         "language": "Python", "updated_at": "2025-01-01T00:00:00Z", "pushed_at": "2025-01-01T00:00:00Z",
+         "topics": ["ml"], "license": {"spdx_id": "MIT"}} for i in range(n)]}
+
+
+def _github_graphql(body, max_items):
+    # One aliased search per "qN" variable, answered with the REST stub's repositories
+    variables = json.loads(body or b"{}").get("variables", {})
+    n = min(int(variables.get("n", 5)), max_items)
+    data = {}
+    for alias, q in variables.items():
+        if alias == "n":
+            continue
+        data[alias] = {"nodes": [
+            {"nameWithOwner": repo["full_name"], "url": repo["html_url"], "description": repo["description"],
+             "stargazerCount": repo["stargazers_count"], "forkCount": repo["forks_count"],
+             "updatedAt": repo["updated_at"], "pushedAt": repo["pushed_at"],
+             "primaryLanguage": {"name": repo["language"]}, "licenseInfo": {"spdxId": repo["license"]["spdx_id"]},
+             "repositoryTopics": {"nodes": [{"topic": {"name": t}} for t in repo["topics"]]},
+             "defaultBranchRef": {"target": {"committedDate": "2025-01-02T00:00:00Z"}}}
+            for repo in _github(n, q)["items"]]}
+    return {"data": data}
+
+
+def _reddit(n, q):
+    children = []
+    for i in range(n):
+        children.append({"data": {
+            "title": f"Discussion {i}: {q}", "url": f"https://example.org/reddit/{_h(q)}/{i}",
+            "permalink": f"/r/MachineLearning/comments/{i}/stub/", "subreddit": "MachineLearning",
+            "score": 500 - i, "num_comments": 40 + i, "created_utc": 1735689600 + i, "is_self": False}})
+    return {"data": {"children": children}}
+
+
+def _semantic_scholar(n, q):
+    return {"total": n, "token": None, "data": [
+        {"paperId": f"stub{_h(q)}{i}", "title": f"Paper {i} on {q}",
+         "url": f"https://www.semanticscholar.org/paper/stub{_h(q)}{i}",
+         "abstract": "Abstract text. " * 30, "authors": [{"name": f"Author {j}"} for j in range(4)],
+         "year": 2020 + i % 5, "citationCount": 300 - i, "venue": "NeurIPS", "publicationTypes": ["Conference"],
+         "publicationDate": "2024-05-01"} for i in range(n)]}
+
+
+def _s2_bulk(n, q, token=None, fields=None, pages=3):
+    # Continuation tokens "t1", "t2"... for `pages` pages; only the requested fields come back
+    page = int(token[1:]) if token and token.startswith("t") else 0
+    papers = _semantic_scholar(n, q)["data"]
+    for paper in papers:
+        paper["paperId"] += f"p{page}"
+        paper["url"] += f"p{page}"
+    if fields:
+        wanted = set(fields.split(",")) | {"paperId"}
+        papers = [{k: v for k, v in paper.items() if k in wanted} for paper in papers]
+    return {"total": n * pages, "token": f"t{page + 1}" if page + 1 < pages else None, "data": papers}
+
+
+def _s2_batch(ids, pool=200):
+    # Papers cite each other within a fixed pool of ids so walks find shared neighbours
+    papers = []
+    for pid in ids:
+        k = _h(pid) % pool
+        papers.append({
+            "paperId": pid, "title": f"Paper {pid}", "year": 2015 + k % 10, "citationCount": k,
+            "venue": "Stub Venue", "url": f"https://www.semanticscholar.org/paper/{pid}",
+            "references": [{"paperId": f"S2P{(k * 7 + j * 13) % pool}"} for j in range(5)],
+            "citations": [{"paperId": f"S2P{(k * 11 + j * 17) % pool}"} for j in range(5)],
+        })
+    return papers
+
+
+def _serpapi(n, q):
+    return {"organic_results": [
+        {"title": f"Scholar result {i}: {q}", "link": f"https://scholar.example.org/{_h(q)}/{i}",
+         "snippet": "Snippet text. " * 10, "publication_info": {"summary": "A Author, B Author - Journal, 2023"},
+         "inline_links": {"cited_by": {"total": 200 - i}}} for i in range(n)]}
+
+
+def _openalex(n, q, cursor=None, pages=3):
+    # Cursor requests get `pages` pages ("*", "p1", "p2"...); plain ones a single page
+    page = int(cursor[1:]) if cursor and cursor.startswith("p") else 0
+    next_cursor = f"p{page + 1}" if cursor and page + 1 < pages else None
+    words = (q or "topic").split()
+    results = [
+        {"id": f"https://openalex.org/W{_h(q)}{i}", "display_name": f"Work {i} on {q}",
+         "publication_year": 2021 + i % 4, "publication_date": "2024-03-01", "cited_by_count": 100 - i,
+         "host_venue": {"display_name": "Stub Journal"},
+         "primary_location": {"landing_page_url": f"https://doi.org/10.0000/stub.{i}", "source": {"display_name": "Stub Journal"}},
+         "authorships": [{"author": {"display_name": f"Author {j}"}} for j in range(3)],
+         "abstract_inverted_index": {w: [k] for k, w in enumerate(words * 3)}}
+        for i in range(page * n, (page + 1) * n)]
+    return {"meta": {"count": n * (pages if cursor else 1), "next_cursor": next_cursor}, "results": results}
+
+
+def _hn(n, q):
+    return {"hits": [{"title": f"HN story {i}: {q}", "url": f"https://news.example.org/{i}", "objectID": str(i)} for i in range(n)]}
+
+
+def _arxiv(n, q):
+    entries = "".join(
+        f"<entry><title>arXiv paper {i}: {q}</title>"
+        f'<link rel="alternate" type="text/html" href="http://arxiv.org/abs/2401.{i:05d}"/>'
+        f"<published>2024-01-0{i % 9 + 1}T00:00:00Z</published></entry>" for i in range(n))
+    return f'<?xml version="1.0"?><feed xmlns="http://www.w3.org/2005/Atom">{entries}</feed>'
+
+
+def _medium(n, q):
+    articles = "".join(
+        f'<article><h2>Medium post {i}: {q}</h2><a href="/@stub/post-{i}">read</a><p>Post summary {i}</p></article>'
+        for i in range(n))
+    return f"<html><body>{articles}</body></html>"
+
+
+def _quora(n, q):
+    links = "".join(
+        f'<a class="question_link" href="https://www.quora.com/stub-question-{i}">'
+        f'<span class="ui_qtext_rendered_qtext">Question {i} about {q}?</span></a>' for i in range(n))
+    return f"<html><body>{links}</body></html>"
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    config = StubConfig()
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body, content_type="application/json"):
+        if not isinstance(body, (str, bytes)):
+            body = json.dumps(body)
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        # Lowercase validator header, as HTTP/2 front ends send it
+        if status == 200 and self.command == "GET":
+            etag = f'"{hashlib.sha1(body).hexdigest()[:16]}"'
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("etag", etag)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+        else:
+            etag = None
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        if etag:
+            self.send_header("etag", etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def _dispatch(self, method):
+        body = self._body()
+        if self.config.delay():
+            return self._send(503, {"error": "injected failure"})
+        parts = urlsplit(self.path)
+        host, _, path = parts.path.lstrip("/").partition("/")
+        path = "/" + path
+        qs = {k: v[0] for k, v in parse_qs(parts.query).items()}
+        n = int(qs.get("per_page") or qs.get("limit") or qs.get("num") or qs.get("max_results")
+                or qs.get("hitsPerPage") or self.config.items)
+        n = min(n, self.config.items)
+        q = qs.get("q") or qs.get("query") or qs.get("search") or qs.get("search_query") or ""
+
+        if host == "gemini":
+            prompt = json.loads(body or b"{}").get("prompt", "")
+            return self._send(200, {"text": _gemini_payload(prompt)})
+        if host == "api.github.com" and path == "/graphql":
+            return self._send(200, _github_graphql(body, self.config.items))
+        if host == "api.github.com" and path.startswith("/search"):
+            return self._send(200, _github(n, q))
+        if host == "www.reddit.com" and path == "/api/v1/access_token":
+            return self._send(200, {"access_token": "stub-token", "expires_in": 3600})
+        if host in ("oauth.reddit.com", "www.reddit.com"):
+            return self._send(200, _reddit(n, q))
+        if host == "api.semanticscholar.org" and path.endswith("/paper/batch"):
+            return self._send(200, _s2_batch(json.loads(body or b"{}").get("ids", [])))
+        if host == "api.semanticscholar.org" and path.endswith("/search/bulk"):
+            return self._send(200, _s2_bulk(n, q, qs.get("token"), qs.get("fields")))
+        if host == "api.semanticscholar.org":
+            return self._send(200, _semantic_scholar(n, q))
+        if host == "serpapi.com":
+            return self._send(200, _serpapi(n, q))
+        if host == "api.openalex.org":
+            return self._send(200, _openalex(n, q, qs.get("cursor")))
+        if host == "hn.algolia.com":
+            return self._send(200, _hn(n, q))
+        if host == "export.arxiv.org":
+            return self._send(200, _arxiv(n, q), "application/atom+xml")
+        if host == "medium.com":
+            return self._send(200, _medium(n, q), "text/html")
+        if host == "www.quora.com":
+            return self._send(200, _quora(n, q), "text/html")
+        return self._send(404, {"error": f"no stub for {host}{path}"})
+
+
+class StubServer:
+    """Run the stub handler on a background thread; base_url is what UPSTREAM_BASE_URL should be"""
+
+    def __init__(self, host="127.0.0.1", port=0, **config):
+        handler = type("ConfiguredStubHandler", (StubHandler,), {"config": StubConfig(**config)})
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self.config = handler.config
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name="stub-server", daemon=True)
+        self.thread.start()
+        return self.base_url
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve stand-in provider and Gemini APIs locally")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="+/- seconds of random latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 503")
+    parser.add_argument("--items", type=int, default=10, help="max results per response")
+    args = parser.parse_args()
+
+    server = StubServer(args.host, args.port, latency=args.latency, jitter=args.jitter,
+                        error_rate=args.error_rate, items=args.items)
+    print(f"Stub upstreams on {server.base_url}")
+    print(f"  export UPSTREAM_BASE_URL={server.base_url} GEMINI_BASE_URL={server.base_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
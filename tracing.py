@@ -0,0 +1,174 @@
+"""
+Lightweight nested tracing spans.
+
+Spans nest through a context variable, so a provider call made inside
+search_for_links (even on a worker thread started by deadline.run_all)
+becomes a child of the search span.  Finished spans are kept in memory
+and exported as Chrome trace-event JSON, which chrome://tracing,
+Perfetto (ui.perfetto.dev) or speedscope show as a timeline.
+
+Tracing is off unless TRACE_FILE (export path, written at exit) or
+TRACING=1 is set; disabled spans cost one context-variable lookup.
+"""
+import atexit
+import contextlib
+import contextvars
+import functools
+import itertools
+import json
+import os
+import threading
+import time
+from collections import deque
+
+TRACE_FILE = os.environ.get('TRACE_FILE')
+ENABLED = bool(TRACE_FILE) or os.environ.get('TRACING', '0') == '1'
+MAX_SPANS = int(os.environ.get('TRACE_MAX_SPANS', '100000'))
+
+_current = contextvars.ContextVar('span', default=None)
+_finished = deque(maxlen=MAX_SPANS)
+_ids = itertools.count(1)
+_epoch = time.perf_counter()
+
+
+class Span:
+    """One timed operation with attributes and an optional parent"""
+
+    __slots__ = ('id', 'parent_id', 'name', 'attrs', 'start', 'end', 'thread')
+
+    def __init__(self, name, parent, attrs):
+        self.id = next(_ids)
+        self.parent_id = parent.id if parent else None
+        self.name = name
+        self.attrs = attrs
+        self.start = time.perf_counter() - _epoch
+        self.end = None
+        self.thread = threading.get_ident()
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    @property
+    def duration(self):
+        return (self.end if self.end is not None else time.perf_counter() - _epoch) - self.start
+
+
+class _NullSpan:
+    def set(self, **attrs):
+        pass
+
+
+_null_span = _NullSpan()
+
+
+@contextlib.contextmanager
+def span(name, **attrs):
+    """Time the enclosed block as a child of the current span"""
+    if not ENABLED:
+        yield _null_span
+        return
+    current = Span(name, _current.get(), attrs)
+    token = _current.set(current)
+    try:
+        yield current
+    except Exception as e:
+        current.set(error=f"{type(e).__name__}: {e}")
+        raise
+    finally:
+        current.end = time.perf_counter() - _epoch
+        _current.reset(token)
+        _finished.append(current)
+
+
+def current():
+    """Innermost active span, or None"""
+    return _current.get()
+
+
+def annotate(**attrs):
+    """Attach attributes to the innermost active span"""
+    current = _current.get()
+    if current is not None:
+        current.set(**attrs)
+
+
+def traced(name):
+    """Decorator form of span() for whole functions such as workflow stages"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def spans():
+    return list(_finished)
+
+
+def clear():
+    _finished.clear()
+
+
+def to_chrome_trace(finished=None):
+    """Spans as Chrome trace events ('X' complete events, microseconds)"""
+    events = []
+    pid = os.getpid()
+    for s in finished if finished is not None else spans():
+        args = {k: v if isinstance(v, (int, float, bool, type(None))) else str(v) for k, v in s.attrs.items()}
+        args['span_id'] = s.id
+        if s.parent_id is not None:
+            args['parent_id'] = s.parent_id
+        events.append({
+            'name': s.name,
+            'cat': s.name.split('.', 1)[0],
+            'ph': 'X',
+            'ts': round(s.start * 1e6, 1),
+            'dur': round(s.duration * 1e6, 1),
+            'pid': pid,
+            'tid': s.thread,
+            'args': args,
+        })
+    return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+
+def export(path=None):
+    """Write the Chrome trace JSON to path (default TRACE_FILE); returns the path"""
+    path = path or TRACE_FILE or f"trace_{time.strftime('%Y%m%d_%H%M%S')}.json"
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(to_chrome_trace(), f)
+    return path
+
+
+def critical_path(root_id=None):
+    """
+    Chain of spans that determined the end time of a root span: starting
+    at the root, repeatedly follow the child that finished last.  root_id
+    may name the current span, so a stage can report its own critical
+    path before it ends; without root_id the longest finished root is used.
+    """
+    finished = spans()
+    children = {}
+    for s in finished:
+        children.setdefault(s.parent_id, []).append(s)
+    if root_id is None:
+        roots = children.get(None, [])
+        if not roots:
+            return []
+        node = max(roots, key=lambda s: s.duration)
+    else:
+        node = next((s for s in finished if s.id == root_id), None)
+        active = _current.get()
+        if node is None and active is not None and active.id == root_id:
+            node = active
+    path = []
+    while node is not None:
+        path.append(node)
+        kids = children.get(node.id)
+        node = max(kids, key=lambda s: s.end) if kids else None
+    return path
+
+
+if TRACE_FILE:
+    atexit.register(lambda: spans() and export(TRACE_FILE))